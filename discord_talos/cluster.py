@@ -0,0 +1,143 @@
+"""
+    Talos cluster launcher. Runs several Talos processes, each owning a range of shards, and restarts any that
+    crash. The first process is the primary, and is the only one to run bot-wide tasks.
+
+    Author: CraftSpider
+"""
+
+import sys
+import time
+import signal
+import logging
+import argparse
+import subprocess
+
+# How long to wait before restarting a crashed process, in seconds
+RESTART_DELAY = 5
+# How often to check on running processes, in seconds
+POLL_INTERVAL = 1
+
+log = logging.getLogger("talos.cluster")
+
+
+def _interrupt(signum, frame):
+    """
+        Signal handler that turns a termination signal into a KeyboardInterrupt, so the cluster shuts down cleanly
+    :param signum: Number of the received signal
+    :param frame: Current stack frame
+    """
+    raise KeyboardInterrupt
+
+
+def shard_ranges(shard_count, processes):
+    """
+        Split shards as evenly as possible between processes
+    :param shard_count: Total number of shards
+    :param processes: Number of processes to split between
+    :return: List of shard id lists, one per process
+    """
+    if processes > shard_count:
+        raise ValueError("Can't run more processes than shards")
+    return [list(range(i * shard_count // processes, (i + 1) * shard_count // processes)) for i in range(processes)]
+
+
+class ClusterProcess:
+    """
+        One Talos process of a cluster, along with the arguments needed to restart it
+    """
+
+    __slots__ = ("cluster_id", "shard_ids", "shard_count", "process", "restart_at")
+
+    def __init__(self, cluster_id, shard_ids, shard_count):
+        """
+            Initialize a cluster process. Doesn't start it
+        :param cluster_id: Index of the process in the cluster
+        :param shard_ids: List of shard ids the process runs
+        :param shard_count: Total number of shards in the cluster
+        """
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.process = None
+        self.restart_at = None
+
+    def args(self):
+        """
+            Get the command line used to run this process
+        :return: List of arguments
+        """
+        return [
+            sys.executable, "runner.py", "discord",
+            "--shard-count", str(self.shard_count),
+            "--shard-ids", ",".join(map(str, self.shard_ids)),
+            "--cluster-id", str(self.cluster_id)
+        ]
+
+    def start(self):
+        """
+            Start the Talos process
+        """
+        log.info(f"Starting cluster process {self.cluster_id} with shards {self.shard_ids}")
+        self.process = subprocess.Popen(self.args())
+        self.restart_at = None
+
+    def poll(self):
+        """
+            Check on the process, scheduling a restart if it crashed and starting it if the restart is due
+        """
+        if self.restart_at is not None:
+            if time.monotonic() >= self.restart_at:
+                self.start()
+            return
+        code = self.process.poll()
+        if code is not None:
+            log.warning(f"Cluster process {self.cluster_id} exited with code {code}, restarting in {RESTART_DELAY}s")
+            self.restart_at = time.monotonic() + RESTART_DELAY
+
+    def stop(self):
+        """
+            Stop the Talos process, waiting for it to exit
+        """
+        self.restart_at = None
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait()
+
+
+def main():
+    """
+        Run a Talos cluster until interrupted
+    :return: Exit status code
+    """
+    logging.basicConfig(format="%(levelname)s:%(name)s:%(message)s", level=logging.INFO)
+    parser = argparse.ArgumentParser(prog="runner.py cluster", description="Run Talos as several processes")
+    parser.add_argument("processes", type=int, help="Number of Talos processes to run")
+    parser.add_argument("--shard-count", type=int, help="Total number of shards, defaults to one per process")
+    args = parser.parse_args()
+
+    shard_count = args.shard_count or args.processes
+    try:
+        ranges = shard_ranges(shard_count, args.processes)
+    except ValueError as e:
+        log.fatal(e)
+        return 1
+    cluster = [ClusterProcess(i, shard_ids, shard_count) for i, shard_ids in enumerate(ranges)]
+
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        for process in cluster:
+            process.start()
+        while True:
+            time.sleep(POLL_INTERVAL)
+            for process in cluster:
+                process.poll()
+    except KeyboardInterrupt:
+        log.info("Stopping Talos cluster")
+    finally:
+        for process in cluster:
+            process.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -150,8 +150,8 @@ class AdminCommands(dutils.TalosCog):
     async def _ad_add(self, ctx, member: discord.Member):
         """Adds a user to the guild admin list."""
         new_admin = sql.TalosAdmin((ctx.guild.id, member.id))
-        if new_admin not in self.database.get_admins(ctx.guild.id):
-            self.database.save_item(new_admin)
+        if new_admin not in await self.bot.async_database.get_admins(ctx.guild.id):
+            await self.bot.async_database.save_item(new_admin)
             await ctx.send(f"Added admin {member.name}!")
         else:
             await ctx.send("That user is already an admin!")
@@ -169,9 +169,9 @@ class AdminCommands(dutils.TalosCog):
         elif member.isnumeric():
             member = int(member)
 
-        admin = list(filter(lambda x: x.user_id == member, self.database.get_admins(ctx.guild.id)))
+        admin = list(filter(lambda x: x.user_id == member, await self.bot.async_database.get_admins(ctx.guild.id)))
         if admin:
-            self.database.remove_item(admin[0])
+            await self.bot.async_database.remove_item(admin[0])
             if member_object:
                 await ctx.send(f"Removed admin from {member_object.name}")
             else:
@@ -183,7 +183,7 @@ class AdminCommands(dutils.TalosCog):
     @commands.guild_only()
     async def _ad_list(self, ctx):
         """Displays all admins for the current guild"""
-        admin_list = self.database.get_admins(ctx.guild.id)
+        admin_list = await self.bot.async_database.get_admins(ctx.guild.id)
         if len(admin_list) > 0:
             out = "```"
             for admin in admin_list:
@@ -199,7 +199,7 @@ class AdminCommands(dutils.TalosCog):
     @dutils.dev_check()
     async def _ad_all(self, ctx):
         """Displays all admins in every guild Talos is in"""
-        all_admins = self.database.get_all_admins()
+        all_admins = await self.bot.async_database.get_all_admins()
         consumed = []
         out = "```"
         for admin in all_admins:
@@ -267,7 +267,7 @@ class AdminCommands(dutils.TalosCog):
             priority = priority or PRIORITY_LEVELS[level]
 
             perm_rule = sql.PermissionRule((ctx.guild.id, command, level, name, priority, allow))
-            self.database.save_item(perm_rule)
+            await self.bot.async_database.save_item(perm_rule)
             await ctx.send(f"Permissions for command **{command}** at level **{level}** updated.")
         elif not found:
             await ctx.send("I don't recognize that command, so I can't set permissions for it!")
@@ -290,7 +290,7 @@ class AdminCommands(dutils.TalosCog):
                 elif level == "channel":
                     name = str(discord.utils.find(lambda c: c.name == name, ctx.guild.channels))
             perm_rule = sql.PermissionRule((ctx.guild.id, command, level, name, None, None))
-            self.database.remove_item(perm_rule, general=True)
+            await self.bot.async_database.remove_item(perm_rule, general=True)
             if command is None:
                 await ctx.send("Permissions for guild cleared")
             elif level is None:
@@ -306,7 +306,7 @@ class AdminCommands(dutils.TalosCog):
     @commands.guild_only()
     async def _p_list(self, ctx):
         """Displays a list of all permissions rules for the current guild"""
-        result = self.database.get_perm_rules(ctx.guild.id)
+        result = await self.bot.async_database.get_perm_rules(ctx.guild.id)
         if len(result) == 0:
             await ctx.send("No permissions set for this guild.")
             return
@@ -335,7 +335,7 @@ class AdminCommands(dutils.TalosCog):
     @dutils.dev_check()
     async def _p_all(self, ctx):
         """Displays all permissions rules, in all guilds Talos is in."""
-        result = self.database.get_all_perm_rules()
+        result = await self.bot.async_database.get_all_perm_rules()
         if len(result) == 0:
             await ctx.send("All permissions default")
             return
@@ -379,7 +379,7 @@ class AdminCommands(dutils.TalosCog):
     async def _opt_set(self, ctx, option, value):
         """Set an option. Most options are true or false. See `^help options list` for available options"""
         try:
-            guild_options = self.database.get_guild_options(ctx.guild.id)
+            guild_options = await self.bot.async_database.get_guild_options(ctx.guild.id)
             cur_val = getattr(guild_options, option)
             if isinstance(cur_val, (int, bool)):
                 if value.upper() == "ALLOW" or value.upper() == "TRUE":
@@ -392,7 +392,9 @@ class AdminCommands(dutils.TalosCog):
             if isinstance(cur_val, str):
                 value = utils.replace_escapes(value)
             setattr(guild_options, option, value)
-            self.database.save_item(guild_options)
+            await self.bot.async_database.save_item(guild_options)
+            if option == "prefix":
+                self.bot.prefixes.set_guild(ctx.guild.id, value)
             await ctx.send(f"Option {option} set to `{value}`")
         except AttributeError:
             await ctx.send("I don't recognize that option.")
@@ -412,7 +414,7 @@ class AdminCommands(dutils.TalosCog):
         prefix: command prefix for Talos to use in this guild. @ mention will always work
         timezone: what timezone for Talos to use for displayed times, supports any timezone abbreviation"""
         out = "```"
-        options = self.database.get_guild_options(ctx.guild.id)
+        options = await self.bot.async_database.get_guild_options(ctx.guild.id)
         for item in options.__slots__[1:]:
             out += f"{item}: {getattr(options, item)}\n"
         out += "```"
@@ -426,9 +428,11 @@ class AdminCommands(dutils.TalosCog):
     async def _opt_default(self, ctx, option):
         """Sets an option to its default value, as in a guild Talos had just joined."""
         try:
-            guild_options = self.database.get_guild_options(ctx.guild.id)
+            guild_options = await self.bot.async_database.get_guild_options(ctx.guild.id)
             setattr(guild_options, option, None)
-            self.database.save_item(guild_options)
+            await self.bot.async_database.save_item(guild_options)
+            if option == "prefix":
+                self.bot.prefixes.set_guild(ctx.guild.id, None)
             await ctx.send(f"Option {option} set to default")
         except AttributeError:
             await ctx.send("I don't recognize that option.")
@@ -437,7 +441,7 @@ class AdminCommands(dutils.TalosCog):
     @dutils.dev_check()
     async def _opt_all(self, ctx):
         """Displays all guild options in every guild Talos is in. Condensed to save your screen."""
-        all_options = self.database.get_all_guild_options()
+        all_options = await self.bot.async_database.get_all_guild_options()
         out = "```"
         for options in all_options:
             out += f"Guild: {self.bot.get_guild(options.id)}\n"
@@ -467,34 +471,34 @@ class AdminCommands(dutils.TalosCog):
         if name in self.bot.all_commands:
             await ctx.send("Talos already has that command, no overwriting allowed.")
             return
-        elif self.database.get_guild_command(ctx.guild.id, name):
+        elif await self.bot.async_database.get_guild_command(ctx.guild.id, name):
             await ctx.send("That command already exists. Maybe you meant to `edit` it instead?")
             return
-        self.database.save_item(sql.GuildCommand((ctx.guild.id, name, text)))
+        await self.bot.async_database.save_item(sql.GuildCommand((ctx.guild.id, name, text)))
         await ctx.send(f"Command {name} created")
 
     @command.command(name="edit", description="Edit existing command")
     async def _c_edit(self, ctx, name, *, text):
         """Edits an existing command. Same format as adding a command."""
-        if not self.database.get_guild_command(ctx.guild.id, name):
+        if not await self.bot.async_database.get_guild_command(ctx.guild.id, name):
             await ctx.send("That command doesn't exist. Maybe you meant to `add` it instead?")
             return
-        self.database.save_item(sql.GuildCommand((ctx.guild.id, name, text)))
+        await self.bot.async_database.save_item(sql.GuildCommand((ctx.guild.id, name, text)))
         await ctx.send(f"Command {name} successfully edited")
 
     @command.command(name="remove", description="Remove existing command")
     async def _c_remove(self, ctx, name):
         """Removes a command from the guild."""
-        if self.database.get_guild_command(ctx.guild.id, name) is None:
+        if await self.bot.async_database.get_guild_command(ctx.guild.id, name) is None:
             await ctx.send("That command doesn't exist, sorry.")
             return
-        self.database.remove_item(sql.GuildCommand((ctx.guild.id, name, None)), True)
+        await self.bot.async_database.remove_item(sql.GuildCommand((ctx.guild.id, name, None)), True)
         await ctx.send(f"Command {name} successfully removed")
 
     @command.command(name="list", description="List existing commands")
     async def _c_list(self, ctx):
         """Lists commands in this guild"""
-        command_list = self.database.get_guild_commands(ctx.guild.id)
+        command_list = await self.bot.async_database.get_guild_commands(ctx.guild.id)
         if len(command_list) == 0:
             await ctx.send("This server has no custom commands")
             return
@@ -516,39 +520,39 @@ class AdminCommands(dutils.TalosCog):
         """Creates a new custom event. First word is identifier name, Second word is a period. Period is defined as """\
             """1h for once an hour, 10m for once every ten minutes, 7d for once every week. Minimum time period """\
             """is 10 minutes. One may user multiple specifiers, eg 1d7m"""
-        if self.database.get_guild_event(ctx.guild.id, name):
+        if await self.bot.async_database.get_guild_event(ctx.guild.id, name):
             await ctx.send("That event already exists. Maybe you meant to `edit` it instead?")
             return
         event = sql.GuildEvent((ctx.guild.id, name, period, 0, ctx.channel.id, text))
-        self.database.save_item(event)
+        await self.bot.async_database.save_item(event)
         await ctx.send(f"Event {name} created")
 
     @event.command(name="edit", description="Edit an existing event")
     async def _e_edit(self, ctx, name, *, text):
         """Edits an existing event, changing what text is displayed when the event runs."""
-        event = self.database.get_guild_event(ctx.guild.id, name)
+        event = await self.bot.async_database.get_guild_event(ctx.guild.id, name)
         if not event:
             await ctx.send("That event doesn't exist. Maybe you meant to `add` it instead?")
             return
         event.name = name
         event.text = text
-        self.database.save_item(event)
+        await self.bot.async_database.save_item(event)
         await ctx.send(f"Event {name} successfully edited")
 
     @event.command(name="remove", description="Remove an event")
     async def _e_remove(self, ctx, name):
         """Delete an existing event, so it will no longer occur."""
-        if self.database.get_guild_event(ctx.guild.id, name) is None:
+        if await self.bot.async_database.get_guild_event(ctx.guild.id, name) is None:
             await ctx.send("That event doesn't exist, sorry.")
             return
         event = sql.GuildEvent((ctx.guild.id, name, None, None, None, None))
-        self.database.remove_item(event, True)
+        await self.bot.async_database.remove_item(event, True)
         await ctx.send(f"Event {name} successfully removed")
 
     @event.command(name="list", description="List all events")
     async def _e_list(self, ctx):
         """Display a list of all events currently defined for this guild."""
-        event_list = self.database.get_guild_events(ctx.guild.id)
+        event_list = await self.bot.async_database.get_guild_events(ctx.guild.id)
         if len(event_list) == 0:
             await ctx.send("This server has no custom events")
             return
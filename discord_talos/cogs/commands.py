@@ -15,17 +15,20 @@ import spidertools.common as utils
 import spidertools.discord as dutils
 import html
 import os
+import functools
 import typing
-import psutil
 import subprocess as sp
 import datetime as dt
 import discord_talos.talossql as sql
+import discord_talos.throttle as throttle
 
 from collections import defaultdict
 
 
 # Dict to keep track of whatever the currently active PW is
 active_pw = defaultdict(lambda: None)
+# Admission queue shared by the NaNo commands, which each make several requests to the NaNo site
+nano_queue = throttle.AdmissionQueue(3, max_waiting=12, max_per_guild=4)
 
 log = logging.getLogger("talos.command")
 
@@ -171,15 +174,12 @@ class Commands(dutils.TalosCog):
             .format(x=("s" if time_delta.days == 1 else ""))
         return delta_string
 
-    def get_uptime_percent(self):
+    async def get_uptime_percent(self):
         """Gets the percentages of time Talos has been up over the past day, month, and week."""
         now = dt.datetime.utcnow().replace(microsecond=0)
-        day_total = 24 * 60
-        week_total = day_total * 7
-        month_total = day_total * 30
-        day_up = len(self.database.get_uptime(int((now - dt.timedelta(days=1)).timestamp()))) / day_total * 100
-        week_up = len(self.database.get_uptime(int((now - dt.timedelta(days=7)).timestamp()))) / week_total * 100
-        month_up = len(self.database.get_uptime(int((now - dt.timedelta(days=30)).timestamp()))) / month_total * 100
+        periods = (dt.timedelta(days=1), dt.timedelta(days=7), dt.timedelta(days=30))
+        uptimes = await self.bot.async_database.get_uptime(*(int((now - period).timestamp()) for period in periods))
+        day_up, week_up, month_up = (up / period.total_seconds() * 100 for up, period in zip(uptimes, periods))
         return day_up, week_up, month_up
 
     #
@@ -289,10 +289,11 @@ class Commands(dutils.TalosCog):
                                 inline=True)
 
                 uptime_str = "{}\n{:.0f}% Day, {:.0f}% Week, {:.0f}% Month".format(self.get_uptime_days(),
-                                                                                   *self.get_uptime_percent())
+                                                                                   *await self.get_uptime_percent())
                 embed.add_field(name="Uptime", value=uptime_str, inline=True)
                 stats_str = f"I'm in {len(self.bot.guilds)} Guilds,\nWith {len(self.bot.users)} Users.\n"
                 try:
+                    import psutil
                     process = psutil.Process()
                     cpu = await self.bot.loop.run_in_executor(None, process.cpu_percent, 0.5)
                     ram = utils.pretty_bytes(process.memory_info().rss)
@@ -300,8 +301,7 @@ class Commands(dutils.TalosCog):
                 except Exception:
                     pass
                 embed.add_field(name="Statistics", value=stats_str, inline=True)
-            for page in embed:
-                await ctx.send(embed=page)
+            await ctx.send_pages(embed)
             # await ctx.send(embed=embed.get_pages())
         else:
             out = f"Hello! I'm Talos, official PtP mod-bot. `{prefix}help` for command details.\
@@ -312,6 +312,7 @@ class Commands(dutils.TalosCog):
             await ctx.send(out)
 
     @commands.command(description="Compile LaTeX into a PNG")
+    @throttle.admission(throttle.AdmissionQueue(2, max_waiting=8, max_per_guild=4))
     async def latex(self, ctx, *, latex):
         """Allows the compilation of LaTeX expressions into a PNG. The expressions are automatically wrapped and """\
             """interpreted as math blocks., though if you include a $ on each end then you can escape into and out """\
@@ -344,7 +345,9 @@ class Commands(dutils.TalosCog):
                 file.write(doc)
 
             try:
-                sp.check_output(["pdflatex", "-interaction=nonstopmode", "-disable-installer", tex])
+                await self.bot.loop.run_in_executor(None, functools.partial(
+                    sp.check_output, ["pdflatex", "-interaction=nonstopmode", "-disable-installer", tex]
+                ))
             except sp.CalledProcessError as e:
                 latex_out = e.stdout.decode()
                 log.debug(latex_out)
@@ -368,8 +371,11 @@ class Commands(dutils.TalosCog):
                     gs = "gs"
 
                 try:
-                    sp.call([gs, "-sDEVICE=pngalpha", "-dNOPAUSE", "-dBATCH", "-r300", f"-sOutputFile={filename}.png",
-                            "-dGraphicsAlphaBits=4", "-dTextAlphaBits=4", f"{filename}.pdf"], stdout=sp.PIPE)
+                    await self.bot.loop.run_in_executor(None, functools.partial(
+                        sp.call, [gs, "-sDEVICE=pngalpha", "-dNOPAUSE", "-dBATCH", "-r300",
+                                  f"-sOutputFile={filename}.png", "-dGraphicsAlphaBits=4", "-dTextAlphaBits=4",
+                                  f"{filename}.pdf"], stdout=sp.PIPE
+                    ))
                 except sp.CalledProcessError:
                     await ctx.send("Error during pdf -> png conversion")
                 except FileNotFoundError:
@@ -390,6 +396,7 @@ class Commands(dutils.TalosCog):
             await ctx.send("Valid options are 'novel', 'profile', and 'info'.")
 
     @nanowrimo.command(name="information", aliases=["info"], description="Give general information about NaNoWriMo")
+    @throttle.admission(nano_queue)
     async def _information(self, ctx):
         """This command gives some general NaNo info, for example the current day and expected wordcount, or a """\
             """countdown if nano isn't happening. If you're wondering what NaNo is, go to https://nanowrimo.org for """\
@@ -431,6 +438,7 @@ class Commands(dutils.TalosCog):
             await ctx.send(out)
 
     @nanowrimo.command(name="novel", description="Fetch a user's nano novel.")
+    @throttle.admission(nano_queue)
     async def _novel(self, ctx, username, novel_name=None):
         """Fetches detailed info on a user's novel from the NaNo site. If no novel name is given, it grabs the most """\
             """recent."""
@@ -500,8 +508,7 @@ class Commands(dutils.TalosCog):
                 if novel_excerpt is not None:
                     embed.add_field(name="__Excerpt__", value=novel_excerpt)
                 embed.set_footer(text="")
-            for page in embed:
-                await ctx.send(embed=page)
+            await ctx.send_pages(embed)
         else:
             out = f"__{user.name}'s Novel ({novel.created_at.year})__\n"
             out += f"*Title*: {novel_title}\n"
@@ -513,6 +520,7 @@ class Commands(dutils.TalosCog):
             await ctx.send(out)
 
     @nanowrimo.command(name="profile", description="Fetches a user's profile info.")
+    @throttle.admission(nano_queue)
     async def _profile(self, ctx, username):
         """Fetches detailed info on a user's profile from the NaNo website."""
         if self.bot.nano_session is None or not self.bot.nano_session.logged_in():
@@ -564,8 +572,7 @@ class Commands(dutils.TalosCog):
                               f"**Words:** {challenges[0].current_count}"
                     )
                 embed.set_footer(text="")
-            for page in embed:
-                await ctx.send(embed=page)
+            await ctx.send_pages(embed)
         else:
             out = f"__**{username}**__\n"
             while len(author_bio) > 200:
@@ -661,8 +668,7 @@ class Commands(dutils.TalosCog):
                     for member in cur_pw.members:
                         member_list += f"{member.user.display_name} - {member.get_len()}\n"
                     embed.add_field(name="Times", value=member_list)
-                for page in embed:
-                    await ctx.send(embed=page)
+                await ctx.send_pages(embed)
             else:
                 out = "```"
                 out += f"{winner.display_name} won the PW!\n"
@@ -734,14 +740,14 @@ class Commands(dutils.TalosCog):
     async def quote(self, ctx, author=None, *, quote=None):
         """Quote the best lines from chat for posterity"""
         if author is None:
-            quote = self.database.get_random_quote(ctx.guild.id)
+            quote = await self.bot.async_database.get_random_quote(ctx.guild.id)
             if quote is None:
                 await ctx.send("There are no quotes available for this guild")
                 return
         else:
             try:
                 author = int(author)
-                quote = self.database.get_quote(ctx.guild.id, author)
+                quote = await self.bot.async_database.get_quote(ctx.guild.id, author)
                 if quote is None:
                     await ctx.send(f"No quote for ID {author}")
                     return
@@ -775,16 +781,16 @@ class Commands(dutils.TalosCog):
             if member is not None:
                 author = str(member)
         quote = sql.Quote([ctx.guild.id, None, author, quote])
-        self.database.save_item(quote)
+        await self.bot.async_database.save_item(quote)
         await ctx.send(f"Quote from {author} added!")
 
     @quote.command(name="remove", description="Remove a quote")
     @dutils.admin_check()
     async def _q_remove(self, ctx, num: int):
         """Remove the quote with a specific ID"""
-        quote = self.database.get_quote(ctx.guild.id, num)
+        quote = await self.bot.async_database.get_quote(ctx.guild.id, num)
         if quote is not None:
-            self.database.remove_items(sql.Quote, guild_id=ctx.guild.id, id=num)
+            await self.bot.async_database.remove_item(quote)
             await ctx.send(f"Removed quote {num}")
         else:
             await ctx.send(f"No quote for ID {num}")
@@ -797,7 +803,7 @@ class Commands(dutils.TalosCog):
             await ctx.send(f"Requested page must be greater than 0")
             return
 
-        num_quotes = self.database.get_count(sql.Quote, guild_id=ctx.guild.id)
+        num_quotes = await self.bot.async_database.get_count(sql.Quote, guild_id=ctx.guild.id)
         pages = round(num_quotes / 10 + .5)
         if page > pages:
             await ctx.send(f"Requested page doesn't exist, last page is {pages}")
@@ -805,7 +811,8 @@ class Commands(dutils.TalosCog):
 
         start = (page - 1) * 10
         count = 10
-        quotes = self.database.get_items(sql.Quote, limit=(start, count), order="id", guild_id=ctx.guild.id)
+        quotes = await self.bot.async_database.get_items(sql.Quote, limit=(start, count), order="id",
+                                                         guild_id=ctx.guild.id)
 
         if self.bot.should_embed(ctx):
             with dutils.PaginatedEmbed() as embed:
@@ -905,7 +912,7 @@ class Commands(dutils.TalosCog):
             """precision"""
         boot_string = self.bot.BOOT_TIME.strftime("%b %d, %H:%M:%S")
         out = f"I've been online since {boot_string}, a total of {self.get_uptime_days()}\n"
-        day_up, week_up, month_up = self.get_uptime_percent()
+        day_up, week_up, month_up = await self.get_uptime_percent()
         out += f"Past uptime: {day_up:02.2f}% of the past day, "
         out += f"{week_up:02.2f}% of the past week, "
         out += f"{month_up:02.2f}% of the past month"
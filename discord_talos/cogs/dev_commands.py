@@ -12,10 +12,10 @@ import re
 import io
 import spidertools.common as utils
 import spidertools.discord as dutils
+import discord_talos.log_handlers as log_handlers
 import asyncio
 
 from datetime import datetime
-from PIL import Image, ImageDraw
 
 # Configure Logging
 log = logging.getLogger("talos.dev")
@@ -80,12 +80,15 @@ class DevCommands(dutils.TalosCog, command_attrs=dict(hidden=True)):
             """logfiles."""
         t = logging.getLogger("talos")
         if ctx.channel.id in self.log_channels:
-            h = self.log_channels[ctx.channel.id]
-            h.stop()
+            h = self.log_channels.pop(ctx.channel.id)
             t.removeHandler(h)
+            target = h.target
+            h.close()
+            target.flush()
+            target.stop()
             await ctx.send("No longer logging here")
         else:
-            h = dutils.DiscordHandler(ctx)
+            h = log_handlers.BatchingHandler(dutils.DiscordHandler(ctx), capacity=10, combine=True, loop=self.bot.loop)
             h.setFormatter(logging.Formatter("`%(levelname)s:%(name)s:%(message)s`"))
             self.log_channels[ctx.channel.id] = h
             t.addHandler(h)
@@ -102,12 +105,14 @@ class DevCommands(dutils.TalosCog, command_attrs=dict(hidden=True)):
     async def verifysql(self, ctx):
         """Check connected SQL database schema, if it doesn't match the expected schema then alter it to fit."""
         await ctx.send("Verifying Talos Schema...")
-        results = self.bot.database.verify_schema()
+        results = await self.bot.async_database.verify_schema()
         schema = self.bot.database._schema
         tables = results["tables"]
         columns_add = results["columns_add"]
         columns_remove = results["columns_remove"]
-        if tables == 0 and columns_add == 0 and columns_remove == 0:
+        indexes_add = results["indexes_add"]
+        indexes_remove = results["indexes_remove"]
+        if tables == 0 and columns_add == 0 and columns_remove == 0 and indexes_add == 0 and indexes_remove == 0:
             await ctx.send(f"Talos Schema {schema} verified. Everything up-to-date")
         else:
             out = f"Talos Schema {schema} verified."
@@ -117,26 +122,64 @@ class DevCommands(dutils.TalosCog, command_attrs=dict(hidden=True)):
                 out += f"\n\t{columns_add} columns added"
             if columns_remove:
                 out += f"\n\t{columns_remove} columns removed"
+            if indexes_add:
+                out += f"\n\t{indexes_add} indexes added"
+            if indexes_remove:
+                out += f"\n\t{indexes_remove} indexes removed"
             await ctx.send(out)
 
+    @commands.group(description="Talos runtime statistics")
+    async def stats(self, ctx):
+        """Displays statistics about how Talos is running internally. Check the subcommands for what's available."""
+        if ctx.invoked_subcommand is None:
+            await ctx.send("Valid options are 'cache' and 'latency'.")
+
+    @stats.command(name="cache", description="Display database cache hit rates")
+    async def _s_cache(self, ctx):
+        """Displays the hits, misses, and current size of each of the caches in front of the Talos database."""
+        out = "```"
+        for name, cache in self.bot.database.caches.items():
+            out += f"{name}: {cache.hits} hits, {cache.misses} misses ({cache.hit_ratio():.1%}), "\
+                   f"{len(cache)}/{cache.maxsize} entries\n"
+        out += "```"
+        await ctx.send(out)
+
+    @stats.command(name="latency", description="Display command pipeline latencies")
+    async def _s_latency(self, ctx, command=None):
+        """Displays p50, p95, and p99 latencies for each stage of handling a command, across all commands or for """\
+            """just one. Percentiles are upper bounds, accurate to within 20%."""
+        stages = self.bot.latencies.get_stages(command)
+        if not stages:
+            await ctx.send("No latencies recorded" + (f" for command {command}" if command else ""))
+            return
+        out = "```\n"
+        out += f"{'Stage':<16}{'Count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}\n"
+        for name, histogram in sorted(stages.items()):
+            out += f"{name:<16}{histogram.count:>8}"
+            for percent in (50, 95, 99):
+                out += f"{histogram.percentile(percent) * 1000:>10.2f}"
+            out += "\n"
+        out += "```"
+        await ctx.send(out)
+
     @commands.command(description="Grant a user title. I knight thee...")
     async def grant_title(self, ctx, user: discord.User, *, title):
         """Give someone access to a title"""
-        profile = self.database.get_user(user.id)
+        profile = await self.bot.async_database.get_user(user.id)
         if not profile:
             raise dutils.NotRegistered(user)
         profile.add_title(title)
-        self.database.save_item(profile)
+        await self.bot.async_database.save_item(profile)
         await ctx.send(f"Title `{title}` granted to {user}")
 
     @commands.command(description="Remove a title from a user. Now go in disgrace.")
     async def revoke_title(self, ctx, user: discord.User, *, title):
         """Removes access to a specific title from a user"""
-        profile = self.database.get_user(user.id)
+        profile = await self.bot.async_database.get_user(user.id)
         if not profile:
             raise dutils.NotRegistered(user)
         profile.remove_title(title)
-        self.database.save_item(profile)
+        await self.bot.async_database.save_item(profile)
         await ctx.send(f"Title `{title}` revoked from {user}")
 
     @commands.command(description="Reload a Talos extension. Allows command updates without reboot.")
@@ -207,7 +250,7 @@ self.bot.loop.create_task(__(self, ctx))
     async def sql(self, ctx, *, statement):
         """Execute arbitrary SQL code, then print the result raw. All of it."""
         try:
-            await ctx.send(self.bot.database.raw_exec(statement))
+            await ctx.send(await self.bot.async_database.raw_exec(statement))
         except Exception as e:
             await ctx.send(f"Statement failed with {type(e).__name__}: {e}")
 
@@ -215,12 +258,13 @@ self.bot.loop.create_task(__(self, ctx))
     async def resetsql(self, ctx):
         """Closes and deletes the current TalosDatabase, then attempts to open a new one."""
         await ctx.send("Reconnecting to SQL Database...")
-        ctx.bot.database.reset_connection()
+        await ctx.bot.async_database.reset_connection()
         await ctx.send("SQL Database Reconnection complete")
 
     @commands.command(description="Image testing. Smile!")
     async def image(self, ctx, red: int = 0, green: int = 0, blue: int = 0):
         """Prints out a test image created on the spot. May eventually be useful for something."""
+        from PIL import Image, ImageDraw
         start = datetime.now()
         image = Image.new("RGB", (250, 250), (red, green, blue))
         draw = ImageDraw.Draw(image)
@@ -6,21 +6,21 @@
 
 import os
 import pathlib
-import httplib2
 import logging
 import random
+import asyncio
 import spidertools.common as utils
 import spidertools.command_lang as command_lang
 import spidertools.discord as dutils
 import datetime as dt
-
-from apiclient import discovery
-from oauth2client import client, tools, file
+import discord_talos.stats as stats
 
 # Google API values
 SCOPES = 'https://www.googleapis.com/auth/spreadsheets'
 CLIENT_SECRET_FILE = pathlib.Path(__file__).parent.parent / 'client_secret.dat'
 APPLICATION_NAME = 'TalosBot Prompt Reader'
+# Seconds cache changes are kept in the database, long enough for every cluster process to sync past them
+CACHE_CHANGE_AGE = 86400
 
 log = logging.getLogger("talos.events")
 runner = command_lang.CommandLang(interpreter=command_lang.ContextLessCL())
@@ -35,6 +35,7 @@ def get_credentials():
     Returns:
         Credentials, the obtained credential.
     """
+    from oauth2client import client, tools, file
     if not pathlib.Path(CLIENT_SECRET_FILE).is_file():
         raise FileNotFoundError("No client secret file")
     home_dir = os.path.expanduser('~')
@@ -54,8 +55,10 @@ def get_credentials():
 
 
 def create_service():
-    """Creates and returns a google API service"""
+    """Creates and returns a google API service. Google libraries are only imported here, as they're slow to load"""
     try:
+        import httplib2
+        from apiclient import discovery
         credentials = get_credentials()
         http = credentials.authorize(httplib2.Http())
         discovery_url = 'https://sheets.googleapis.com/$discovery/rest?version=v4'
@@ -65,6 +68,9 @@ def create_service():
     except FileNotFoundError:
         log.warning("Couldn't load client_secret.dat for google services")
         return None
+    except ImportError:
+        log.warning("Couldn't import google libraries for google services")
+        return None
 
 
 class EventLoops(dutils.TalosCog):
@@ -80,8 +86,7 @@ class EventLoops(dutils.TalosCog):
         self.setup_prompts()
 
     def setup_prompts(self):
-        """Sets up for the prompts event"""
-        self.service = create_service()
+        """Sets up for the prompts event. The google service is created the first time the prompt task runs"""
         now = dt.datetime.utcnow()
         time = now.replace(hour=self.bot.PROMPT_TIME, minute=0, second=0, microsecond=0)
         if time < now:
@@ -109,42 +114,100 @@ class EventLoops(dutils.TalosCog):
                 valueInputOption="RAW", body=body).execute()
         return result
 
+    async def get_prompt_channels(self):
+        """Get the prompts channel of every guild with prompts on. In a cluster, each process covers its own guilds"""
+        out = []
+        for guild in self.bot.guilds:
+            options = await self.bot.async_database.get_guild_options(guild.id)
+            if options.writing_prompts:
+                out.extend(self.bot.channel_index.get_all(guild, options.prompts_channel))
+        return out
+
     @dutils.eventloop("1m", description="Called once at the start of every minute", persist=True)
     async def minute_task(self):
-        """Called every minute, checks for guild-specific events and runs any that need to be"""
-        for guild in self.bot.guilds:
-            events = self.database.get_guild_events(guild.id)
-            for event in events:
-                period = int(event.period)
-                time = int(dt.datetime.now().timestamp())
-                current = int(time / period)
-                if current > event.last_active:
-                    channel = list(filter(lambda x: x.id == event.channel, guild.channels))[0]
-                    log.info("Kicking off event " + event.name)
-                    await channel.send(runner.exec(channel, event.text))
-                    event.last_active = current
-                    self.database.save_item(event)
+        """Called every minute, checks for guild-specific events and runs any that need to be. Fired events are """\
+            """saved together once every guild has been checked"""
+        fired = []
+        try:
+            for guild in self.bot.guilds:
+                events = await self.bot.async_database.get_guild_events(guild.id)
+                for event in events:
+                    period = int(event.period)
+                    time = int(dt.datetime.now().timestamp())
+                    current = int(time / period)
+                    if current > event.last_active:
+                        channel = guild.get_channel(event.channel)
+                        if channel is None:
+                            log.warning(f"Channel for event {event.name} no longer exists")
+                            continue
+                        log.info("Kicking off event " + event.name)
+                        await self.bot.outbound.send(channel, runner.exec(channel, event.text))
+                        event.last_active = current
+                        fired.append(event)
+        finally:
+            if fired:
+                await self.bot.async_database.save_items(fired)
 
     @dutils.eventloop("1h", description="Called once at the start of every hour", persist=True)
     async def hourly_task(self):
-        """Called every hour, and posts current guild amount to DBL if a key is provided and the amount changed"""
-        guild_count = len(self.bot.guilds)
+        """Called every hour, and posts current guild amount to DBL if a key is provided and the amount changed. """\
+            """Other cluster processes report their guild count for the primary to add up"""
+        if not self.bot.is_primary:
+            await self.bot.report_guild_count()
+            return
+        guild_count = await self.bot.fetch_guild_count()
         await self.bot.session.botlist_post_guilds(guild_count)
 
     @dutils.eventloop("1d", description="Called once at the start of every day", persist=True)
     async def daily_task(self):
-        """Called every day, and removes old uptimes from the database"""
-        self.database.remove_uptime(int((dt.datetime.now() - dt.timedelta(days=30)).timestamp()))
+        """Called every day, and trims uptime older than 30 days and cache changes older than a day from the """\
+            """database"""
+        if not self.bot.is_primary:
+            raise dutils.StopEventLoop("Not the primary cluster process, daily task quitting")
+        await self.bot.async_database.remove_uptime(int((dt.datetime.now() - dt.timedelta(days=30)).timestamp()))
+        await self.bot.async_database.remove_cache_changes(int(dt.datetime.now().timestamp()) - CACHE_CHANGE_AGE)
         await self.bot.session.server_post_commands(self.bot.commands_dict())
 
     @dutils.eventloop("1m", description="Called to add another uptime mark to the database")
     async def uptime_task(self):
-        """Called once a minute, to verify uptime. Adds a new row to the uptime table with the current timestamp"""
-        self.database.add_uptime(int(dt.datetime.now().replace(microsecond=0).timestamp()))
+        """Called once a minute, to verify uptime. Extends the current uptime interval to the current timestamp"""
+        if not self.bot.is_primary:
+            raise dutils.StopEventLoop("Not the primary cluster process, uptime task quitting")
+        await self.bot.async_database.add_uptime(int(dt.datetime.now().replace(microsecond=0).timestamp()))
+
+    @dutils.eventloop("1m", description="Called to write buffered command usage to the database")
+    async def invocation_task(self):
+        """Called once a minute, writes the command invocations counted since the last run to the database"""
+        await self.bot.async_database.flush_invocations()
+
+    @dutils.eventloop("1m", description="Called to drop data other cluster processes changed from the caches")
+    async def cache_task(self):
+        """Called once a minute in a cluster, drops cached options, commands and quotes that another process """\
+            """changed since the last run"""
+        if self.bot.cluster_id is None:
+            raise dutils.StopEventLoop("Not running in a cluster, cache task quitting")
+        await self.bot.sync_caches()
+
+    @dutils.eventloop("1m", description="Called to keep pooled database connections alive")
+    async def pool_task(self):
+        """Called once a minute, pings idle database connections so the server never drops them, and closes """\
+            """extra connections that haven't been used in a while"""
+        await self.bot.async_database.maintain()
+
+    @dutils.eventloop("1m", description="Called to publish metrics for the webserver")
+    async def metrics_task(self):
+        """Called once a minute, writes the current Talos metrics to the file the webserver serves them from"""
+        text = stats.render_metrics(self.bot)
+        path = stats.metrics_path(self.bot.cluster_id)
+        await self.bot.loop.run_in_executor(None, stats.write_metrics, text, path)
 
     @dutils.eventloop("1d", description="Runs the daily prompt task")
     async def prompt_task(self):
-        """Once a day, grabs a prompt from google sheets and posts it to the defined prompts chat, if enabled."""
+        """Once a day, grabs a prompt from google sheets and posts it to the defined prompts chat, if enabled. """\
+            """In a cluster every process posts to its own guilds. The prompt is picked by date, so each process """\
+            """picks the same one, and the primary marks it posted"""
+        if self.service is None:
+            self.service = create_service()
         if self.service is None:
             raise dutils.StopEventLoop("No google service, prompt task quitting")
         prompt_sheet_id = "1bL0mSDGK4ypn8wioQCBqkZH47HmYp6GnmJbXkIOg2fA"
@@ -152,12 +215,17 @@ class EventLoops(dutils.TalosCog):
         for item in values:
             if len(item) < 4:
                 item.extend("" for _ in range(4 - len(item)))
+        today = dt.date.today()
+        mark = f"POSTED {today.isoformat()}"
         possibilities = []
         values = list(values)
         for item in values:
+            if item[3] == mark:
+                possibilities = [item]
+                break
             if item[3] == "":
                 possibilities.append(item)
-        prompt = random.choice(possibilities)
+        prompt = random.Random(today.toordinal()).choice(possibilities)
 
         log.debug(prompt)
         out = f"__Daily Prompt {dt.date.today().strftime('%m/%d')}__\n\n"
@@ -168,18 +236,16 @@ class EventLoops(dutils.TalosCog):
             out += f"({original} by {prompt[2]})"
         else:
             out += f"({original} by Anonymous)"
-        for guild in self.bot.guilds:
-            options = self.database.get_guild_options(guild.id)
-            if not options.writing_prompts:
-                continue
-            for channel in guild.channels:
-                if channel.name == options.prompts_channel:
-                    try:
-                        await channel.send(out)
-                    except Exception as e:
-                        utils.log_error(log, logging.WARNING, e, "Error while attempting to send daily prompt")
-
-        prompt[3] = "POSTED"
+        channels = await self.get_prompt_channels()
+        results = await asyncio.gather(*(self.bot.outbound.send(channel, out) for channel in channels),
+                                       return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                utils.log_error(log, logging.WARNING, result, "Error while attempting to send daily prompt")
+
+        if not self.bot.is_primary:
+            return
+        prompt[3] = mark
         self.set_spreadsheet(prompt_sheet_id, [prompt],
                              f"Form Responses 1!B{values.index(prompt) + 1}:E{values.index(prompt) + 1}")
 
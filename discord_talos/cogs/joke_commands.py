@@ -13,6 +13,7 @@ import logging
 import random
 import spidertools.common as utils
 import spidertools.discord as dutils
+import discord_talos.throttle as throttle
 
 log = logging.getLogger("talos.joke")
 
@@ -42,6 +43,7 @@ class JokeCommands(dutils.TalosCog):
         await ctx.send(out)
 
     @commands.command(description="Feed your cat addiction")
+    @throttle.admission(throttle.AdmissionQueue(4, max_waiting=12, max_per_guild=4))
     async def catpic(self, ctx):
         """Returns a random cat picture. Sourced from The Cap API."""
         data = await self.bot.session.get_cat_pic()
@@ -76,6 +78,7 @@ class JokeCommands(dutils.TalosCog):
         await ctx.send(f"Hello there {ctx.author.name}")
 
     @commands.command(description="There's a relevant XKCD for everything")
+    @throttle.admission(throttle.AdmissionQueue(4, max_waiting=12, max_per_guild=4))
     async def xkcd(self, ctx, comic: int = 0):
         """Gets an XKCD comic with the given number, or the current one if one isn't specified, and displays it."""
         if comic < 0:
@@ -100,6 +103,7 @@ class JokeCommands(dutils.TalosCog):
             await ctx.send("**" + title + "**\n" + alt, file=img_data)
 
     @commands.command(description="SMBC: XKCD but philosophy and butt jokes")
+    @throttle.admission(throttle.AdmissionQueue(4, max_waiting=12, max_per_guild=4))
     async def smbc(self, ctx, comic: typing.Union[dutils.DateConverter["%Y-%m-%d"], int, str] = None):
         """Gets an SMBC from a given date, number, or id. Or, if not specified, it gets the most recent one. """\
             """Necessarily slightly slow to search by date due to technical limitations"""
@@ -140,6 +144,7 @@ class JokeCommands(dutils.TalosCog):
                            file=discord.File(data["img_data"], filename=data["filename"]))
 
     @commands.command(description="There's a trope for everything", aliases=["trope"])
+    @throttle.admission(throttle.AdmissionQueue(4, max_waiting=12, max_per_guild=4))
     async def tvtropes(self, ctx, trope):
         """Get a trope or article from the TVTropes database. To access a subwiki, just use a `/` between the name """\
             """of the subwiki and your trope. EG, SugarWiki/SweetExists will give the the "Sweet Exists" page on """\
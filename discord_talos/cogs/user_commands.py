@@ -61,7 +61,7 @@ class UserCommands(dutils.TalosCog):
                 # if unnamed_colour(role) and unused_role(ctx, role):
                 #     await role.delete()
 
-        options = self.bot.database.get_guild_options(ctx.guild.id)
+        options = await self.bot.async_database.get_guild_options(ctx.guild.id)
 
         # Attempt to find role. Break for cases where role won't be created
         colour_role = discord.utils.find(lambda x: x.name == f"<TALOS COLOR> {colour}", ctx.guild.roles)
@@ -140,8 +140,8 @@ class UserCommands(dutils.TalosCog):
     async def register(self, ctx):
         """Registers you as a user with Talos. This creates a profile and options for you, and allows Talos to """\
             """save info."""
-        if not self.database.get_user(ctx.author.id):
-            self.database.register_user(ctx.author.id)
+        if not await self.bot.async_database.get_user(ctx.author.id):
+            await self.bot.async_database.register_user(ctx.author.id)
             await ctx.send("Registered new user!")
         else:
             await ctx.send("You're already a registered user.")
@@ -150,9 +150,10 @@ class UserCommands(dutils.TalosCog):
     async def deregister(self, ctx):
         """Deregisters you from Talos. All collected data is wiped, no account info will be saved until """\
             """you re-register."""
-        user = self.database.get_user(ctx.author.id)
+        user = await self.bot.async_database.get_user(ctx.author.id)
         if user:
-            self.database.remove_item(user)
+            await self.bot.async_database.remove_item(user)
+            self.bot.prefixes.set_user(ctx.author.id, None)
             await ctx.send("Deregistered user")
         else:
             raise dutils.NotRegistered(ctx.author)
@@ -163,7 +164,7 @@ class UserCommands(dutils.TalosCog):
             """of a user to display instead."""
         if user is None:
             user = ctx.author
-        tal_user = self.database.get_user(user.id)
+        tal_user = await self.bot.async_database.get_user(user.id)
         if not tal_user:
             raise dutils.NotRegistered(user)
         fav_command = tal_user.get_favorite_command()
@@ -180,8 +181,7 @@ class UserCommands(dutils.TalosCog):
                 else:
                     value += f"Favorite Command: Unknown"
                 embed.add_field(name="Command Stats", value=value)
-            for page in embed:
-                await ctx.send(embed=page)
+            await ctx.send_pages(embed)
         else:
             out = "```md\n"
             out += f"{user.name}\n"
@@ -196,7 +196,7 @@ class UserCommands(dutils.TalosCog):
     async def user(self, ctx):
         """Options will show current user options, stats will display what Talos has saved about you, description """\
             """will set your user description, set will set user options, and remove will clear user options."""
-        profile = self.database.get_user(ctx.author.id)
+        profile = await self.bot.async_database.get_user(ctx.author.id)
         if not profile:
             raise dutils.NotRegistered(ctx.author)
         elif ctx.invoked_subcommand is None:
@@ -225,13 +225,13 @@ class UserCommands(dutils.TalosCog):
         if title:
             result = ctx.t_user.set_title(title)
             if result:
-                self.database.save_item(ctx.t_user)
+                await self.bot.async_database.save_item(ctx.t_user)
                 await ctx.send(f"Title successfully set to `{title}`")
             else:
                 await ctx.send("You do not have that title")
         else:
             ctx.t_user.clear_title()
-            self.database.save_item(ctx.t_user)
+            await self.bot.async_database.save_item(ctx.t_user)
             await ctx.send("Title successfully cleared")
 
     @user.command(name="options", description="List your current user options")
@@ -240,7 +240,7 @@ class UserCommands(dutils.TalosCog):
         rich_embeds: whether Talos will embed messages for you if guild options allow it
         prefix: what prefix Talos will use in PMs with you"""
         out = "```"
-        options = self.database.get_user_options(ctx.author.id)
+        options = await self.bot.async_database.get_user_options(ctx.author.id)
         for item in options.__slots__[1:]:
             out += f"{item}: {getattr(options, item)}\n"
         out += "```"
@@ -266,14 +266,14 @@ class UserCommands(dutils.TalosCog):
     async def _description(self, ctx, *, text):
         """Change what the user description on your profile is. Max size of 2048 characters."""
         ctx.t_user.profile.description = text
-        self.database.save_item(ctx.t_user.profile)
+        await self.bot.async_database.save_item(ctx.t_user.profile)
         await ctx.send("Description set")
 
     @user.command(name="set", description="Set your user options")
     async def _set(self, ctx, option, value):
         """Set user options for your account. See `^help user options` for available options."""
         try:
-            user_options = self.database.get_user_options(ctx.author.id)
+            user_options = await self.bot.async_database.get_user_options(ctx.author.id)
             cur_val = getattr(user_options, option)
             if isinstance(cur_val, (bool, int)):
                 if value.upper() == "ALLOW" or value.upper() == "TRUE":
@@ -286,7 +286,9 @@ class UserCommands(dutils.TalosCog):
             elif isinstance(cur_val, str):
                 value = utils.replace_escapes(value)
             setattr(user_options, option, value)
-            self.database.save_item(user_options)
+            await self.bot.async_database.save_item(user_options)
+            if option == "prefix":
+                self.bot.prefixes.set_user(ctx.author.id, value)
             await ctx.send(f"Option {option} set to `{value}` for {ctx.author.display_name}")
         except AttributeError:
             await ctx.send("I don't recognize that option.")
@@ -295,9 +297,11 @@ class UserCommands(dutils.TalosCog):
     async def _remove(self, ctx, option):
         """Reset a user option to default. See `^help user options` for available options."""
         try:
-            user_options = self.database.get_user_options(ctx.author.id)
+            user_options = await self.bot.async_database.get_user_options(ctx.author.id)
             setattr(user_options, option, None)
-            self.database.save_item(user_options)
+            await self.bot.async_database.save_item(user_options)
+            if option == "prefix":
+                self.bot.prefixes.set_user(ctx.author.id, None)
             await ctx.send(f"Option {option} set to default for {ctx.author.display_name}")
         except AttributeError:
             await ctx.send("I don't recognize that option.")
@@ -0,0 +1,186 @@
+"""
+    In-memory indexes for Talos. Holds lookup structures that let Talos route messages and events without going
+    back to the database or scanning guild data.
+
+    Author: CraftSpider
+"""
+
+import re
+
+
+class PrefixIndex:
+    """
+        Index of the command prefix for every guild and DM user. Guilds and users with no prefix set fall back to
+        the matching default.
+    """
+
+    __slots__ = ("guild_default", "user_default", "_guilds", "_users", "_patterns")
+
+    def __init__(self, default):
+        """
+            Initialize an empty prefix index
+        :param default: Prefix to use until defaults are loaded
+        """
+        self.guild_default = default
+        self.user_default = default
+        self._guilds = {}
+        self._users = {}
+        self._patterns = {}
+
+    def load(self, guild_options, user_options):
+        """
+            Fill the index from raw option rows, replacing anything already in it. Rows with an id of -1 set the
+            defaults.
+        :param guild_options: Iterable of GuildOptions rows
+        :param user_options: Iterable of UserOptions rows
+        """
+        self._guilds.clear()
+        self._users.clear()
+        for options in guild_options:
+            self.set_guild(options.id, options.prefix)
+        for options in user_options:
+            self.set_user(options.id, options.prefix)
+
+    def set_guild(self, guild_id, prefix):
+        """
+            Set the prefix of a guild. A prefix of None means the guild uses the default
+        :param guild_id: id of the guild, or -1 for the default
+        :param prefix: New prefix or None
+        """
+        if guild_id == -1:
+            if prefix is not None:
+                self.guild_default = prefix
+        elif prefix is None:
+            self._guilds.pop(guild_id, None)
+        else:
+            self._guilds[guild_id] = prefix
+
+    def set_user(self, user_id, prefix):
+        """
+            Set the DM prefix of a user. A prefix of None means the user uses the default
+        :param user_id: id of the user, or -1 for the default
+        :param prefix: New prefix or None
+        """
+        if user_id == -1:
+            if prefix is not None:
+                self.user_default = prefix
+        elif prefix is None:
+            self._users.pop(user_id, None)
+        else:
+            self._users[user_id] = prefix
+
+    def get(self, message):
+        """
+            Get the prefix that applies to a message
+        :param message: Discord message to get the prefix for
+        :return: Prefix string
+        """
+        if message.guild is None:
+            return self._users.get(message.author.id, self.user_default)
+        return self._guilds.get(message.guild.id, self.guild_default)
+
+    def matches(self, message, mention):
+        """
+            Check whether a message starts with its prefix or the bot mention. Uses one precompiled pattern per
+            prefix, so the check is a single regex match
+        :param message: Discord message to check
+        :param mention: Bot mention string that always works as a prefix
+        :return: Whether the message could be a command
+        """
+        key = (self.get(message), mention)
+        pattern = self._patterns.get(key)
+        if pattern is None:
+            pattern = re.compile("|".join(map(re.escape, key)))
+            self._patterns[key] = pattern
+        return pattern.match(message.content) is not None
+
+
+class ChannelIndex:
+    """
+        Index of the channels of every guild by name. A guild is indexed the first time one of its channels is looked
+        up, and kept current through channel create, update and delete events. Channels by id are already indexed by
+        discord.py, through Guild.get_channel.
+    """
+
+    __slots__ = ("_guilds",)
+
+    def __init__(self):
+        """
+            Initialize an empty channel index
+        """
+        self._guilds = {}
+
+    def _get_guild(self, guild):
+        """
+            Get the name index of a guild, building it if the guild isn't indexed yet
+        :param guild: Discord guild to get the index of
+        :return: Dict of channel name to list of channels with that name, in guild order
+        """
+        names = self._guilds.get(guild.id)
+        if names is None:
+            names = {}
+            for channel in guild.channels:
+                names.setdefault(channel.name, []).append(channel)
+            self._guilds[guild.id] = names
+        return names
+
+    def get(self, guild, name):
+        """
+            Get the first channel in a guild with a given name
+        :param guild: Discord guild to look in
+        :param name: Name of the channel
+        :return: Channel or None
+        """
+        channels = self._get_guild(guild).get(name)
+        return channels[0] if channels else None
+
+    def get_all(self, guild, name):
+        """
+            Get every channel in a guild with a given name
+        :param guild: Discord guild to look in
+        :param name: Name of the channels
+        :return: Tuple of channels, possibly empty
+        """
+        return tuple(self._get_guild(guild).get(name, ()))
+
+    def add(self, channel):
+        """
+            Add a newly created channel to the index
+        :param channel: Channel that was created
+        """
+        names = self._guilds.get(channel.guild.id)
+        if names is not None:
+            names.setdefault(channel.name, []).append(channel)
+
+    def remove(self, channel):
+        """
+            Remove a deleted channel from the index
+        :param channel: Channel that was deleted
+        """
+        names = self._guilds.get(channel.guild.id)
+        if names is None:
+            return
+        channels = names.get(channel.name, [])
+        for i, item in enumerate(channels):
+            if item.id == channel.id:
+                del channels[i]
+                break
+        if not channels:
+            names.pop(channel.name, None)
+
+    def update(self, before, after):
+        """
+            Update the index for a channel that changed. Only renames change the index
+        :param before: Channel before the change
+        :param after: Channel after the change
+        """
+        if before.name != after.name:
+            self.remove(before)
+            self.add(after)
+
+    def remove_guild(self, guild_id):
+        """
+            Drop the index of a guild, such as when Talos leaves it
+        :param guild_id: id of the guild
+        """
+        self._guilds.pop(guild_id, None)
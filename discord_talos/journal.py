@@ -0,0 +1,125 @@
+"""
+    Write-behind journal for Talos. Deferred database writes are appended to a local log before they're acknowledged,
+    and replayed into the database on the next start if Talos stopped before writing them.
+
+    Author: CraftSpider
+"""
+
+import os
+import json
+import logging
+import threading
+
+# Extension of journal segment files
+SEGMENT_SUFFIX = ".journal"
+
+log = logging.getLogger("talos.journal")
+
+
+class Journal:
+    """
+        Append-only journal split into numbered segments. New records go to the open segment. Sealing closes it, so
+        every record up to that point can be dropped once it's safely in the database, while new records go to a
+        fresh segment. Segments left over from a previous run start out sealed, ready to be replayed.
+    """
+
+    __slots__ = ("folder", "lock", "_segment", "_file", "_sealed")
+
+    def __init__(self, folder):
+        """
+            Open the journal in a folder, creating the folder if needed
+        :param folder: Path of the folder to keep segments in
+        """
+        self.folder = folder
+        self.lock = threading.Lock()
+        folder.mkdir(parents=True, exist_ok=True)
+        self._sealed = sorted(folder.glob("*" + SEGMENT_SUFFIX), key=self._segment_number)
+        self._segment = self._segment_number(self._sealed[-1]) + 1 if self._sealed else 0
+        self._file = None
+
+    @staticmethod
+    def _segment_number(path):
+        """
+            Get the number of a segment from its path
+        :param path: Path of the segment
+        :return: Segment number
+        """
+        return int(path.stem)
+
+    def _segment_path(self, number):
+        """
+            Get the path of a segment from its number
+        :param number: Segment number
+        :return: Path of the segment
+        """
+        return self.folder / f"{number:08d}{SEGMENT_SUFFIX}"
+
+    def append(self, op, *args):
+        """
+            Append a record to the open segment. The record is handed to the OS before this returns, so it survives
+            Talos crashing
+        :param op: Name of the deferred operation
+        :param args: JSON serializable arguments of the operation
+        """
+        line = json.dumps([op, *args]) + "\n"
+        with self.lock:
+            if self._file is None:
+                self._file = open(self._segment_path(self._segment), "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+
+    def seal(self):
+        """
+            Close the open segment, if it has any records, and start a new one for later records
+        :return: Mark to pass to discard once everything up to now is in the database. Marks are segment numbers,
+                 so a mark stays valid however many segments are discarded before it's used
+        """
+        with self.lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+                self._sealed.append(self._segment_path(self._segment))
+                self._segment += 1
+            return self._segment
+
+    def discard(self, mark):
+        """
+            Delete the segments sealed up to a mark, once their records are in the database
+        :param mark: Mark returned by seal
+        """
+        with self.lock:
+            done = [path for path in self._sealed if self._segment_number(path) < mark]
+            self._sealed = [path for path in self._sealed if self._segment_number(path) >= mark]
+        for path in done:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def replay(self):
+        """
+            Read back every record in the sealed segments, oldest first. A record cut off by a crash is skipped
+        :return: Generator of (op, args) tuples
+        """
+        with self.lock:
+            segments = list(self._sealed)
+        for path in segments:
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        op, *args = json.loads(line)
+                    except ValueError:
+                        log.warning(f"Skipping malformed journal record in {path.name}")
+                        continue
+                    yield op, args
+
+    def close(self):
+        """
+            Close the open segment. Its records stay on disk until they're discarded
+        """
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
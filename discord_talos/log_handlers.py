@@ -0,0 +1,134 @@
+"""
+    Logging handlers for Talos. Lets log calls hand their records off to a queue or a buffer, so the slow handlers
+    that write to disk, the network or Discord never run on the event loop.
+
+    Author: CraftSpider
+"""
+
+import queue
+import asyncio
+import logging
+import threading
+import logging.handlers
+
+
+class BatchingHandler(logging.handlers.MemoryHandler):
+    """
+        Handler that buffers records and passes them to a target handler in batches. A batch is sent when the buffer
+        is full, when a record at flushLevel or above arrives, or when the oldest buffered record is interval seconds
+        old. Batches can be combined into a single record, for targets where each record is costly, such as a Discord
+        message.
+    """
+
+    def __init__(self, target, capacity=50, interval=2.0, combine=False, loop=None, flushLevel=logging.ERROR):
+        """
+            Initialize the handler around its target
+        :param target: Handler to send batches to
+        :param capacity: Number of records to buffer before sending a batch
+        :param interval: Seconds to hold a record before sending a batch anyway
+        :param combine: Whether to join each batch into one record, formatted with this handler's formatter
+        :param loop: Event loop to send batches on, for targets that aren't thread safe. None sends them on the
+                     thread that flushes. A flush made on the loop itself sends right away
+        :param flushLevel: Level at which a record causes an immediate flush
+        """
+        super().__init__(capacity, flushLevel=flushLevel, target=target)
+        self.interval = interval
+        self.combine = combine
+        self.loop = loop
+        self._timer = None
+
+    def emit(self, record):
+        """
+            Buffer a record, starting the flush timer if this is the first record of a batch
+        :param record: LogRecord to buffer
+        """
+        super().emit(record)
+        if self.buffer and self._timer is None:
+            self._timer = threading.Timer(self.interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """
+            Send all buffered records to the target as one batch. From another thread, a batch for a loop is only
+            scheduled on it, from the loop itself it has been sent by the time this returns
+        """
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self.buffer or self.target is None:
+                return
+            records, self.buffer = self.buffer, []
+            target = self.target
+        if self.combine:
+            records = [self.combine_records(records)]
+        if self.loop is not None and not self._on_loop():
+            self.loop.call_soon_threadsafe(self._send, target, records)
+        else:
+            self._send(target, records)
+
+    def _on_loop(self):
+        """
+            Check whether this is being called from the event loop batches are sent on
+        :return: Whether the running loop of this thread is the handler's loop
+        """
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def combine_records(self, records):
+        """
+            Join a batch of records into a single record, with one formatted line per record and the highest level
+            of the batch
+        :param records: List of LogRecords to join
+        :return: Combined LogRecord
+        """
+        level = max(record.levelno for record in records)
+        return logging.makeLogRecord({
+            "name": records[-1].name,
+            "levelno": level,
+            "levelname": logging.getLevelName(level),
+            "msg": "\n".join(self.format(record) for record in records)
+        })
+
+    @staticmethod
+    def _send(target, records):
+        """
+            Pass a batch of records to a target handler
+        :param target: Handler to pass records to
+        :param records: List of LogRecords
+        """
+        for record in records:
+            target.handle(record)
+
+    def close(self):
+        """
+            Send any buffered records, then stop the flush timer
+        """
+        self.flush()
+        super().close()
+
+
+def start_queue_logging(loggers, handlers, level=logging.INFO):
+    """
+        Route loggers through a queue to a single listener thread that owns the real handlers. Log calls then only
+        put records on the queue. A handler that should only see some loggers should have a logging.Filter for them
+        attached, as every handler sees every record that passes its level
+    :param loggers: Loggers to route through the queue
+    :param handlers: Handlers the listener passes records to. None entries are skipped
+    :param level: Level to set the loggers to
+    :return: The started QueueListener, to be stopped on shutdown
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    for logger in loggers:
+        logger.handlers = [queue_handler]
+        logger.setLevel(level)
+        logger.propagate = False
+    listener = logging.handlers.QueueListener(
+        log_queue, *(handler for handler in handlers if handler is not None), respect_handler_level=True
+    )
+    listener.start()
+    return listener
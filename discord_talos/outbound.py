@@ -0,0 +1,250 @@
+"""
+    Outbound message queueing for Talos. Every send goes through a queue for its channel, which merges plain text
+    sends from the same origin that pile up, keeps pages of a message in order without a round trip between each,
+    and paces sends to stay under Discord's rate limits.
+
+    Author: CraftSpider
+"""
+
+import time
+import asyncio
+import logging
+import collections
+import discord
+
+# Longest message content Discord accepts
+MESSAGE_LIMIT = 2000
+# Messages a channel can be sent in each RATE_PERIOD before Discord starts returning 429s
+RATE_LIMIT = 5
+# Length of the channel rate limit window, in seconds
+RATE_PERIOD = 5.0
+# Times to retry a send that still got rate limited
+MAX_RETRIES = 3
+
+log = logging.getLogger("talos.outbound")
+
+
+class _Send:
+    """
+        One queued send, and the future its caller waits on
+    """
+
+    __slots__ = ("content", "kwargs", "merge_key", "future")
+
+    def __init__(self, content, kwargs, merge_key, future):
+        """
+            Initialize a queued send
+        :param content: Message content, or None
+        :param kwargs: Other keywords to pass to send
+        :param merge_key: Origin of the send, or None if it's never merged
+        :param future: Future resolved with the sent Message
+        """
+        self.content = content
+        self.kwargs = kwargs
+        self.merge_key = merge_key
+        self.future = future
+
+    @property
+    def mergeable(self):
+        """
+            Check whether this send is plain text with an origin, and so can be merged with neighbours of that origin
+        :return: Whether the send can be merged
+        """
+        return self.merge_key is not None and not self.kwargs and isinstance(self.content, str)
+
+
+class ChannelSender:
+    """
+        Send queue for a single channel. A worker task drains the queue while it has anything in it, and stops once
+        the channel has been quiet for a full rate limit window.
+    """
+
+    __slots__ = ("channel", "rate_limit", "rate_period", "on_idle", "_pending", "_sent", "_wakeup", "_task")
+
+    def __init__(self, channel, rate_limit=RATE_LIMIT, rate_period=RATE_PERIOD, on_idle=None):
+        """
+            Initialize an empty queue for a channel
+        :param channel: Messageable to send to
+        :param rate_limit: Messages to send in each rate period at most, or None to not pace sends
+        :param rate_period: Length of the rate limit window, in seconds
+        :param on_idle: Function called with this sender when its worker stops
+        """
+        self.channel = channel
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.on_idle = on_idle
+        self._pending = collections.deque()
+        self._sent = collections.deque(maxlen=rate_limit or 1)
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def submit(self, content=None, merge_key=None, **kwargs):
+        """
+            Queue a send, starting the worker if it isn't running
+        :param content: Message content
+        :param merge_key: Origin of the send, such as the id of the invoking message. Only sends with the same key
+                          are merged, and sends without one never are
+        :param kwargs: Other keywords to pass to send
+        :return: Future resolved with the sent Message. Merged sends all resolve to the same Message
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._pending.append(_Send(content, kwargs, merge_key, future))
+        self._wakeup.set()
+        if self._task is None:
+            self._task = loop.create_task(self._run())
+        return future
+
+    def _take(self):
+        """
+            Take the next batch off the queue. Consecutive plain text sends with the same merge key are merged up to
+            the message limit
+        :return: Tuple of content, keywords, and the list of sends in the batch
+        """
+        first = self._pending.popleft()
+        batch = [first]
+        if not first.mergeable:
+            return first.content, first.kwargs, batch
+        content = first.content
+        while self._pending and self._pending[0].mergeable and self._pending[0].merge_key == first.merge_key:
+            merged = content + "\n" + self._pending[0].content
+            if len(merged) > MESSAGE_LIMIT:
+                break
+            content = merged
+            batch.append(self._pending.popleft())
+        return content, {}, batch
+
+    async def _pace(self):
+        """
+            Wait until another message can be sent without going over the channel rate limit
+        """
+        if self.rate_limit is not None and len(self._sent) == self.rate_limit:
+            delay = self._sent[0] + self.rate_period - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def _deliver(self, content, kwargs):
+        """
+            Send a message, backing off and retrying if Discord rate limits it anyway
+        :param content: Message content
+        :param kwargs: Other keywords to pass to send
+        :return: Sent Message
+        """
+        retries = 0 if "file" in kwargs or "files" in kwargs else MAX_RETRIES
+        while True:
+            await self._pace()
+            self._sent.append(time.monotonic())
+            try:
+                return await self.channel.send(content, **kwargs)
+            except discord.HTTPException as e:
+                if e.status != 429 or retries <= 0:
+                    raise
+                retries -= 1
+                retry_after = float(e.response.headers.get("Retry-After", self.rate_period))
+                log.warning(f"Rate limited sending to channel {getattr(self.channel, 'id', None)}, "
+                            f"retrying in {retry_after} seconds")
+                await asyncio.sleep(retry_after)
+
+    async def _run(self):
+        """
+            Worker task. Sends batches until the queue has been empty for a full rate limit window. If the task is
+            cancelled, the batch being sent is cancelled along with everything still queued
+        """
+        batch = []
+        try:
+            while True:
+                if not self._pending:
+                    idle = 0
+                    if self.rate_limit is not None and self._sent:
+                        idle = self.rate_period - (time.monotonic() - self._sent[-1])
+                    if idle <= 0:
+                        return
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), idle)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                content, kwargs, batch = self._take()
+                try:
+                    message = await self._deliver(content, kwargs)
+                except Exception as e:
+                    for item in batch:
+                        if not item.future.done():
+                            item.future.set_exception(e)
+                else:
+                    for item in batch:
+                        if not item.future.done():
+                            item.future.set_result(message)
+        finally:
+            self._task = None
+            for item in batch:
+                if not item.future.done():
+                    item.future.cancel()
+            for item in self._pending:
+                item.future.cancel()
+            self._pending.clear()
+            if self.on_idle is not None:
+                self.on_idle(self)
+
+
+class Outbound:
+    """
+        Routes every send through the queue for its channel. Queues are created on demand and dropped once their
+        channel goes quiet.
+    """
+
+    __slots__ = ("rate_limit", "rate_period", "_senders")
+
+    def __init__(self, rate_limit=RATE_LIMIT, rate_period=RATE_PERIOD):
+        """
+            Initialize with no channel queues
+        :param rate_limit: Messages to send to a channel in each rate period at most, or None to not pace sends
+        :param rate_period: Length of the rate limit window, in seconds
+        """
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self._senders = {}
+
+    def _get_sender(self, channel):
+        """
+            Get the queue for a channel, creating it if needed
+        :param channel: Messageable to get the queue of
+        :return: ChannelSender for the channel
+        """
+        key = channel.id
+        sender = self._senders.get(key)
+        if sender is None:
+            sender = self._senders[key] = ChannelSender(channel, self.rate_limit, self.rate_period, self._remove)
+        return sender
+
+    def _remove(self, sender):
+        """
+            Drop the queue of a channel that went quiet
+        :param sender: ChannelSender whose worker stopped
+        """
+        if self._senders.get(sender.channel.id) is sender:
+            del self._senders[sender.channel.id]
+
+    async def send(self, channel, content=None, merge_key=None, **kwargs):
+        """
+            Send a message to a channel through its queue
+        :param channel: Messageable to send to
+        :param content: Message content
+        :param merge_key: Origin of the send. Queued plain text sends with the same key are merged into one message
+        :param kwargs: Other keywords to pass to send
+        :return: Sent Message
+        """
+        return await self._get_sender(channel).submit(content, merge_key, **kwargs)
+
+    async def send_all(self, channel, messages):
+        """
+            Queue several messages to a channel at once, such as the pages of an embed. They're sent in order, back
+            to back
+        :param channel: Messageable to send to
+        :param messages: Iterable of keyword dicts, one per message
+        :return: List of sent Messages
+        """
+        sender = self._get_sender(channel)
+        futures = [sender.submit(**message) for message in messages]
+        return list(await asyncio.gather(*futures))
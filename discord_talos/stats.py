@@ -0,0 +1,291 @@
+"""
+    Runtime statistics for Talos. Holds latency histograms for the stages of the command pipeline, and renders
+    everything Talos tracks as metrics in the Prometheus text format.
+
+    Author: CraftSpider
+"""
+
+import os
+import time
+import bisect
+import asyncio
+import inspect
+import functools
+import contextlib
+import contextvars
+import spidertools.common as utils
+
+# Smallest latency bucket boundary, in seconds
+BUCKET_START = 0.00001
+# Growth factor between bucket boundaries. Percentiles are accurate to within this factor
+BUCKET_FACTOR = 1.2
+# Number of bucket boundaries, enough to reach a bit over two minutes
+BUCKET_COUNT = 90
+# Folder the bot writes metrics files to, and the webserver reads them from
+METRICS_FOLDER = utils.log_folder
+# Quantiles reported for each latency summary
+METRICS_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """
+        Latency histogram with exponentially growing buckets. Recording is a binary search and an increment, and
+        memory use doesn't grow with the number of values recorded.
+    """
+
+    __slots__ = ("count", "total", "buckets")
+
+    BOUNDS = tuple(BUCKET_START * BUCKET_FACTOR ** i for i in range(BUCKET_COUNT))
+
+    def __init__(self):
+        """
+            Initialize an empty histogram
+        """
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(self.BOUNDS) + 1)
+
+    def record(self, value):
+        """
+            Add a value to the histogram
+        :param value: Latency in seconds
+        """
+        self.count += 1
+        self.total += value
+        self.buckets[bisect.bisect_left(self.BOUNDS, value)] += 1
+
+    def mean(self):
+        """
+            Get the mean of all recorded values
+        :return: Mean in seconds, or 0 if nothing was recorded
+        """
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        """
+            Get an upper bound on a percentile of the recorded values
+        :param percent: Percentile to get, from 0 to 100
+        :return: Bucket bound in seconds that the percentile falls under, or 0 if nothing was recorded
+        """
+        if not self.count:
+            return 0.0
+        rank = percent / 100 * self.count
+        seen = 0
+        for i, amount in enumerate(self.buckets):
+            seen += amount
+            if seen >= rank and amount:
+                return self.BOUNDS[i] if i < len(self.BOUNDS) else float("inf")
+        return float("inf")
+
+
+class LatencyTracker:
+    """
+        Tracks latency histograms for each stage of the command pipeline, both overall and for each command. Timings
+        taken while a command runs are filed under it automatically, through current_command.
+    """
+
+    __slots__ = ("stages", "commands")
+
+    current_command = contextvars.ContextVar("current_command", default=None)
+
+    def __init__(self):
+        """
+            Initialize a tracker with no timings
+        """
+        self.stages = {}
+        self.commands = {}
+
+    def record(self, stage, value, command=None):
+        """
+            Record a latency for a stage
+        :param stage: Name of the pipeline stage
+        :param value: Latency in seconds
+        :param command: Name of the command the timing belongs to, defaults to the command currently running
+        """
+        if command is None:
+            command = self.current_command.get()
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.record(value)
+        if command is not None:
+            stages = self.commands.setdefault(command, {})
+            histogram = stages.get(stage)
+            if histogram is None:
+                histogram = stages[stage] = Histogram()
+            histogram.record(value)
+
+    @contextlib.contextmanager
+    def timer(self, stage, command=None):
+        """
+            Time the body of a with block as a stage
+        :param stage: Name of the pipeline stage
+        :param command: Name of the command the timing belongs to, defaults to the command currently running
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, command)
+
+    def get_stages(self, command=None):
+        """
+            Get the stage histograms, overall or for one command
+        :param command: Name of the command to get stages of, or None for all commands together
+        :return: Dict of stage name to Histogram
+        """
+        if command is None:
+            return self.stages
+        return self.commands.get(command, {})
+
+    def clear(self):
+        """
+            Drop all recorded timings
+        """
+        self.stages.clear()
+        self.commands.clear()
+
+
+class TimedProxy:
+    """
+        Wraps an object so every coroutine method called on it is timed as a stage. Everything else passes through
+        unchanged.
+    """
+
+    __slots__ = ("wrapped", "latencies", "stage", "_methods")
+
+    def __init__(self, wrapped, latencies, stage):
+        """
+            Initialize the proxy
+        :param wrapped: Object to time the coroutine methods of
+        :param latencies: LatencyTracker to record timings to
+        :param stage: Stage to record timings under
+        """
+        self.wrapped = wrapped
+        self.latencies = latencies
+        self.stage = stage
+        self._methods = {}
+
+    def __getattr__(self, item):
+        """
+            Get an attribute of the wrapped object, timing it if it's a coroutine method
+        :param item: Name of the attribute
+        :return: Attribute value
+        """
+        value = getattr(self.wrapped, item)
+        if not inspect.iscoroutinefunction(value):
+            return value
+        timed = self._methods.get(item)
+        if timed is None:
+            async def timed(*args, **kwargs):
+                with self.latencies.timer(self.stage):
+                    return await getattr(self.wrapped, item)(*args, **kwargs)
+            functools.update_wrapper(timed, value)
+            self._methods[item] = timed
+        return timed
+
+
+def _format_labels(labels):
+    """
+        Format a dict of labels for a metric sample
+    :param labels: Dict of label name to value
+    :return: Label string, including braces, or an empty string if there are no labels
+    """
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_metric(name, kind, description, samples):
+    """
+        Format one metric family in the Prometheus text format
+    :param name: Name of the metric
+    :param kind: Metric type, such as gauge, counter or summary
+    :param description: Help text of the metric
+    :param samples: Iterable of (suffix, labels, value) tuples. Suffix is appended to the name, such as _count
+    :return: List of lines
+    """
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        lines.append(f"{name}{suffix}{_format_labels(labels)} {value}")
+    return lines
+
+
+def _summary_samples(histogram, labels):
+    """
+        Get the samples of a Prometheus summary for a histogram
+    :param histogram: Histogram to summarize
+    :param labels: Dict of labels to add to each sample
+    :return: List of (suffix, labels, value) tuples
+    """
+    samples = [("", dict(labels, quantile=q), histogram.percentile(q * 100)) for q in METRICS_QUANTILES]
+    samples.append(("_sum", labels, histogram.total))
+    samples.append(("_count", labels, histogram.count))
+    return samples
+
+
+def render_metrics(bot):
+    """
+        Render everything Talos tracks as metrics in the Prometheus text format. In a cluster, every sample is
+        labelled with the cluster id of the process
+    :param bot: Talos instance to read from
+    :return: Metrics text
+    """
+    base = {} if bot.cluster_id is None else {"cluster": bot.cluster_id}
+    lines = []
+    lines += format_metric("talos_guilds", "gauge", "Guilds Talos is in", [("", base, len(bot.guilds))])
+    lines += format_metric("talos_users", "gauge", "Users Talos can see", [("", base, len(bot.users))])
+    latency = bot.latency if bot.latency == bot.latency else 0.0  # NaN before the first heartbeat
+    lines += format_metric("talos_gateway_latency_seconds", "gauge", "Discord gateway heartbeat latency",
+                           [("", base, latency)])
+    lines += format_metric("talos_pending_tasks", "gauge", "Asyncio tasks not yet done",
+                           [("", base, len(asyncio.all_tasks(bot.loop)))])
+
+    invocations = []
+    for command, stages in bot.latencies.commands.items():
+        if "callback" in stages:
+            invocations.append(("", dict(base, command=command), stages["callback"].count))
+    lines += format_metric("talos_command_invocations_total", "counter", "Command callbacks run", invocations)
+
+    stage_samples = []
+    for stage, histogram in bot.latencies.stages.items():
+        stage_samples += _summary_samples(histogram, dict(base, stage=stage))
+    lines += format_metric("talos_stage_latency_seconds", "summary",
+                           "Latency of command pipeline stages. The database stage counts every query, the http "
+                           "stage every HTTP client request", stage_samples)
+
+    hits, misses, entries = [], [], []
+    for name, cache in bot.database.caches.items():
+        labels = dict(base, cache=name)
+        hits.append(("", labels, cache.hits))
+        misses.append(("", labels, cache.misses))
+        entries.append(("", labels, len(cache)))
+    lines += format_metric("talos_cache_hits_total", "counter", "Database cache hits", hits)
+    lines += format_metric("talos_cache_misses_total", "counter", "Database cache misses", misses)
+    lines += format_metric("talos_cache_entries", "gauge", "Entries held in database caches", entries)
+    return "\n".join(lines) + "\n"
+
+
+def metrics_path(cluster_id=None):
+    """
+        Get the path of the metrics file for a process
+    :param cluster_id: Cluster id of the process, or None when running alone
+    :return: Path of the metrics file
+    """
+    return METRICS_FOLDER / f"talos-{cluster_id or 0}.prom"
+
+
+def write_metrics(text, path):
+    """
+        Write a metrics file atomically, so a reader never sees a partial file
+    :param text: Metrics text to write
+    :param path: Path to write to
+    """
+    temp = path.with_suffix(".tmp")
+    with open(temp, "w") as file:
+        file.write(text)
+    os.replace(temp, path)
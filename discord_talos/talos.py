@@ -9,14 +9,23 @@ import discord
 import discord.ext.commands as commands
 import sys
 import logging
+import argparse
+import atexit
 import re
 import pathlib
-import mysql.connector
+import time
 import datetime as dt
 import spidertools.common as utils
 import spidertools.discord as dutils
 import spidertools.command_lang as command_lang
 import discord_talos.talossql as sql
+import discord_talos.talossqlite as talossqlite
+import discord_talos.indexes as indexes
+import discord_talos.log_handlers as log_handlers
+import discord_talos.stats as stats
+import discord_talos.throttle as throttle
+import discord_talos.outbound as outbound
+import discord_talos.journal as journal
 
 #
 #   Constants
@@ -24,6 +33,12 @@ import discord_talos.talossql as sql
 
 # Place your token in a file with this name, or change this to the name of a file with the token in it.
 TOKEN_FILE = pathlib.Path(__file__).parent / "token.json"
+# Number of database connections to run queries on at once, unless the sql config sets pool_size
+DATABASE_POOL_SIZE = 4
+# Folder holding the write-behind journal of each Talos process
+JOURNAL_FOLDER = pathlib.Path(__file__).parent / "journal"
+# Seconds a cluster process's guild count report is counted for. Every process reports once an hour
+CLUSTER_REPORT_AGE = 7200
 FILE_BASE = {
     "token": "", "botlist": "", "nano": ["user", "pass"], "btn": "", "cat": "",
     "sql": {
@@ -31,7 +46,8 @@ FILE_BASE = {
         "port": "",
         "username": "",
         "password": "",
-        "schema": ""
+        "schema": "",
+        "pool_size": 4
     },
     "webserver": ""
 }
@@ -53,6 +69,9 @@ _log_event_colors = {
     "silence": discord.Colour.dark_blue()
 }
 
+# Marks a lazy context attribute that hasn't been loaded yet
+_unloaded = object()
+
 # Initiate Logging
 log = logging.getLogger("talos")
 
@@ -73,6 +92,93 @@ class FakeMessage:
         self.author = None
 
 
+class TalosContext(commands.Context):
+    """
+        Talos command context. Guild and user options are loaded the first time they're read and kept for the life
+        of the context, so commands that never use them cost no database reads.
+    """
+
+    def __init__(self, **attrs):
+        """
+            Initialize the context, with options not yet loaded
+        :param attrs: Keywords to pass to Context
+        """
+        super().__init__(**attrs)
+        self._guild_options = _unloaded
+        self._user_options = _unloaded
+        self.stage_start = None
+        self.admission = None
+
+    @property
+    def guild_options(self):
+        """
+            Get the options of the guild this context is in, loading them on first use. None in DMs or if the
+            database is unavailable
+        :return: GuildOptions object or None
+        """
+        if self._guild_options is _unloaded:
+            self._guild_options = None
+            if self.guild is not None:
+                try:
+                    with self.bot.latencies.timer("options"):
+                        self._guild_options = self.bot.database.get_guild_options(self.guild.id)
+                except Exception:  # TODO: This and below, something that works on postgres and mysql
+                    log.warning("Error getting guild options from database")
+        return self._guild_options
+
+    @guild_options.setter
+    def guild_options(self, value):
+        """
+            Replace the guild options of this context
+        :param value: New GuildOptions object or None
+        """
+        self._guild_options = value
+
+    @property
+    def user_options(self):
+        """
+            Get the options of the user who invoked this context, loading them on first use. None if the database
+            is unavailable
+        :return: UserOptions object or None
+        """
+        if self._user_options is _unloaded:
+            self._user_options = None
+            try:
+                with self.bot.latencies.timer("options"):
+                    self._user_options = self.bot.database.get_user_options(self.author.id)
+            except Exception:
+                log.warning("Error getting user options from database")
+        return self._user_options
+
+    @user_options.setter
+    def user_options(self, value):
+        """
+            Replace the user options of this context
+        :param value: New UserOptions object or None
+        """
+        self._user_options = value
+
+    async def send(self, content=None, **kwargs):
+        """
+            Send a message to the context channel through its send queue, timing it as the send stage. Queued sends
+            of the same command invocation can be merged
+        :param content: Message content
+        :param kwargs: Keywords to pass to Messageable.send
+        :return: The sent Message
+        """
+        with self.bot.latencies.timer("send"):
+            return await self.bot.outbound.send(self.channel, content, merge_key=self.message.id, **kwargs)
+
+    async def send_pages(self, pages):
+        """
+            Send several embeds to the context channel, queued together so they go out back to back
+        :param pages: Iterable of Embeds, such as the pages of a PaginatedEmbed
+        :return: List of sent Messages
+        """
+        with self.bot.latencies.timer("send"):
+            return await self.bot.outbound.send_all(self.channel, ({"embed": page} for page in pages))
+
+
 class Talos(dutils.ExtendedBot):
     """
         Class for the Talos bot. Handles all sorts of things for inter-cog relations and bot wide data.
@@ -97,6 +203,7 @@ class Talos(dutils.ExtendedBot):
         """
             Initialize Talos object. Safe to pass nothing in.
         :param tokens: Dictionary of tokens for Talos to use
+        :param cluster_id: Index of this process in a cluster, or None when running alone
         :param kwargs: Keyword Args for Talos and all its parent classes
         """
         # Set default values to pass to super
@@ -105,20 +212,38 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
         if kwargs.get("help_command", None) is None:
             kwargs["help_command"] = dutils.TalosHelpCommand()
         super().__init__(talos_prefix, description=description, **kwargs)
+        self.before_invoke(self.before_command)
+        self.after_invoke(self.after_command)
 
         # Set talos specific things
         __tokens = kwargs.get("tokens", {})
+        self.cluster_id = kwargs.get("cluster_id")
         with open("discord_talos/schema.json", "r") as file:
             import json
             schema_def = json.load(file)
 
-        self.database = sql.TalosDatabase(**__tokens.get("sql"), schemadef=schema_def)
-        self.session = utils.TalosHTTPClient(tokens=__tokens, timeout=60, loop=self.loop)
+        sql_config = dict(__tokens.get("sql", {}))
+        pool_size = sql_config.pop("pool_size", DATABASE_POOL_SIZE)
+        if "sqlite" in sql_config:
+            self.database = talossqlite.SqliteTalosDatabase(sql_config["sqlite"], schemadef=schema_def)
+        else:
+            self.database = sql.TalosDatabase(**sql_config, schemadef=schema_def)
+        self.database.journal = journal.Journal(JOURNAL_FOLDER / f"talos-{self.cluster_id or 0}")
+        self.database.record_changes = self.cluster_id is not None
+        self.latencies = stats.LatencyTracker()
+        self.async_database = sql.AsyncTalosDatabase(self.database, latencies=self.latencies, pool_size=pool_size)
+        self.prefixes = indexes.PrefixIndex(self.DEFAULT_PREFIX)
+        self.last_sync = None
+        self.channel_index = indexes.ChannelIndex()
+        self.outbound = outbound.Outbound()
+        self.session = stats.TimedProxy(
+            utils.TalosHTTPClient(tokens=__tokens, timeout=60, loop=self.loop), self.latencies, "http"
+        )
         if "nano" in __tokens:
-            self.nano_session = utils.nano.NanoClient(
+            self.nano_session = stats.TimedProxy(utils.nano.NanoClient(
                 username=__tokens["nano"][0],
                 password=__tokens["nano"][1]
-            )
+            ), self.latencies, "http")
         else:
             self.nano_session = None
 
@@ -133,6 +258,58 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
         else:
             super().__setattr__(key, value)
 
+    @property
+    def is_primary(self):
+        """
+            Whether this is the process that runs bot-wide tasks. True unless this is a secondary cluster process
+        :return: Whether this process is primary
+        """
+        return not self.cluster_id
+
+    async def report_guild_count(self):
+        """
+            Report the number of guilds this cluster process holds to the database, for the primary to add up
+        """
+        if self.cluster_id is not None:
+            await self.async_database.set_guild_count(self.cluster_id, len(self.guilds))
+
+    async def fetch_guild_count(self):
+        """
+            Get the number of guilds Talos is in. In a cluster, other processes hold some of the guilds, so the counts
+            every process reported to the database are added up instead.
+        :return: Number of guilds
+        """
+        if self.cluster_id is None:
+            return len(self.guilds)
+        await self.report_guild_count()
+        return await self.async_database.get_guild_count(int(time.time()) - CLUSTER_REPORT_AGE)
+
+    async def sync_caches(self):
+        """
+            Drop cached data that another cluster process changed since the last sync, and bring the prefix index
+            in line with any changed options
+        """
+        if not self.database.is_connected():
+            return
+        now = int(time.time())
+        changes = await self.async_database.sync_caches(self.last_sync or now)
+        self.last_sync = now
+        reload = False
+        for name, key in changes:
+            if name not in (sql.GuildOptions.TABLE_NAME, sql.UserOptions.TABLE_NAME):
+                continue
+            if key == -1:
+                reload = True
+            elif name == sql.GuildOptions.TABLE_NAME:
+                options = await self.async_database.get_item(sql.GuildOptions, guild_id=key)
+                self.prefixes.set_guild(key, options.prefix if options is not None else None)
+            else:
+                options = await self.async_database.get_item(sql.UserOptions, user_id=key)
+                self.prefixes.set_user(key, options.prefix if options is not None else None)
+        if reload:
+            self.prefixes.load(await self.async_database.get_all_guild_options(),
+                               await self.async_database.get_all_user_options())
+
     def should_embed(self, ctx):
         """
             Determines whether Talos is allowed to use RichEmbeds in a given context.
@@ -140,9 +317,9 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
         :return: Whether Talos should embed message
         """
         if self.database.is_connected():
-            if not ctx.user_options.rich_embeds:
+            if ctx.user_options is not None and not ctx.user_options.rich_embeds:
                 return False
-            if ctx.guild is not None:
+            if ctx.guild is not None and ctx.guild_options is not None:
                 return ctx.guild_options.rich_embeds and\
                        ctx.channel.permissions_for(ctx.me).embed_links
         return ctx.channel.permissions_for(ctx.me).embed_links
@@ -154,15 +331,23 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
         :return: Timezone object for the context
         """
         if self.database.is_connected():
-            if ctx.guild is not None:
+            if ctx.guild is not None and ctx.guild_options is not None:
                 timezone = ctx.guild_options.timezone
                 return dt.timezone(dt.timedelta(hours=utils.tz_map[timezone.upper()]), timezone.upper())
         return dt.timezone(dt.timedelta(), "UTC")
 
     async def init(self):
         """
-            Initialize Talos async sessions
+            Initialize Talos async sessions and in-memory indexes
         """
+        replayed = await self.async_database.replay_journal()
+        if replayed:
+            log.info(f"Replayed {replayed} journaled invocations from the last run")
+        if self.database.is_connected():
+            self.last_sync = int(time.time())
+            await self.async_database.load_defaults()
+            self.prefixes.load(await self.async_database.get_all_guild_options(),
+                               await self.async_database.get_all_user_options())
         try:
             await self.nano_session.init()
         except utils.nano.InvalidLogin:
@@ -183,7 +368,8 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
             Saves Talos data, then logs out the bot cleanly and safely
         """
         log.debug("Logging out Talos")
-        self.database.commit()
+        await self.async_database.flush_invocations()
+        await self.async_database.commit()
         await super().logout()
 
     async def close(self):
@@ -192,36 +378,25 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
         """
         log.debug("Closing Talos")
         await self.session.close()
+        self.async_database.close()
+        self.database.journal.close()
         await super().close()
 
-    async def get_context(self, message, *, cls=commands.Context):
+    async def get_context(self, message, *, cls=TalosContext):
         """
-            Create a new context from an incoming message, setting up attributes and etc
+            Create a new context from an incoming message, setting up attributes and etc. Options are loaded
+            lazily by the context, the first time they're used
         :param message: Message to generate context from
         :param cls: Class to use for the context
         :return: new Context object
         """
         ctx = await super().get_context(message, cls=cls)
 
-        if ctx.guild is not None:
-            try:
-                ctx.guild_options = self.database.get_guild_options(ctx.guild.id)
-            except Exception:  # TODO: This and below, something that works on postgres and mysql
-                ctx.guild_options = None
-                log.warning("Error getting guild options from database")
-        else:
-            ctx.guild_options = None
-
-        try:
-            ctx.user_options = self.database.get_user_options(ctx.author.id)
-        except Exception:
-            ctx.user_options = None
-            log.warning("Error getting user options from database")
-
         # Check for custom command
         if ctx.command is None and message.guild is not None:
             try:
-                command = self.database.get_item(sql.GuildCommand, guild_id=ctx.guild.id, name=ctx.invoked_with)
+                with self.latencies.timer("custom_command"):
+                    command = await self.async_database.get_guild_command(ctx.guild.id, ctx.invoked_with)
                 if command is not None:
                     ctx.command = custom_creator(ctx.invoked_with, command.text)
             except Exception:  # TODO: Better error for both mysql and postgres
@@ -231,15 +406,65 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
 
     async def process_commands(self, message):
         """
-            Processes incoming messages from Discord, generates a ctx and invokes it.
+            Processes incoming messages from Discord, generates a ctx and invokes it. Messages that don't start
+            with a prefix or mention are dropped before any context is built.
         :param message: Message to process
         """
         if message.author.bot and not (message.author.id in (339119069066297355, 376161594570178562)):
             return
+        if not self.prefixes.matches(message, self.user.mention + " "):
+            return
 
         ctx = await self.get_context(message)
         await self.invoke(ctx)
 
+    async def invoke(self, ctx):
+        """
+            Invoke the command of a context. Timings taken while it runs are filed under the command
+        :param ctx: Context to invoke
+        """
+        if ctx.command is None:
+            return await super().invoke(ctx)
+        token = self.latencies.current_command.set(str(ctx.command))
+        ctx.stage_start = time.perf_counter()
+        try:
+            await super().invoke(ctx)
+        finally:
+            self.latencies.current_command.reset(token)
+
+    async def before_command(self, ctx):
+        """
+            Called before every command callback, once checks and argument conversion pass. Waits for a slot if the
+            command is behind an admission queue
+        :param ctx: Context of the command
+        """
+        now = time.perf_counter()
+        if getattr(ctx, "stage_start", None) is not None:
+            self.latencies.record("checks", now - ctx.stage_start)
+        ctx.stage_start = now
+
+        queue = throttle.get_queue(ctx.command)
+        if queue is not None:
+            async def notify(position):
+                await ctx.send(f"Queued, position {position}. Your command will run as soon as a slot frees up.")
+            await queue.acquire(ctx.author.id, throttle.fairness_key(ctx), notify)
+            ctx.admission = queue
+            now = time.perf_counter()
+            self.latencies.record("queue", now - ctx.stage_start)
+            ctx.stage_start = now
+
+    async def after_command(self, ctx):
+        """
+            Called after every command callback, even if it raised. Frees the admission slot the command held
+        :param ctx: Context of the command
+        """
+        if getattr(ctx, "stage_start", None) is not None:
+            self.latencies.record("callback", time.perf_counter() - ctx.stage_start)
+            ctx.stage_start = None
+        if getattr(ctx, "admission", None) is not None:
+            ctx.admission.release(ctx.author.id)
+            ctx.admission = None
+
     async def mod_log(self, ctx, event, user, message):
         """
             Logs a message to a guild's mod log, if Talos is set up to do so
@@ -251,9 +476,8 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
         options = ctx.guild_options
         if not options.mod_log:
             return False
-        try:
-            logchan = next(filter(lambda x: x.name == options.log_channel, ctx.guild.channels))
-        except StopIteration:
+        logchan = self.channel_index.get(ctx.guild, options.log_channel)
+        if logchan is None:
             await ctx.send("Invalid log channel, please set the `log_channel` option to a valid channel name")
             return
         if self.should_embed(ctx):
@@ -263,14 +487,13 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
                 embed.add_field(name="User", value=str(user), inline=True)
                 embed.add_field(name="Madmin", value=str(ctx.author), inline=True)
                 embed.add_field(name="Reason", value=message)
-            for page in embed.pages:
-                await logchan.send(embed=page)
+            await self.outbound.send_all(logchan, ({"embed": page} for page in embed.pages))
         else:
             out = f"{event.capitalize()}"
             out += f"User: {str(user)}"
             out += f"Madmin: {str(ctx.author)}"
             out += f"Reason: {message}"
-            await logchan.send(out)
+            await self.outbound.send(logchan, out)
 
     async def on_ready(self):
         """
@@ -281,8 +504,11 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
         log.info(f"| {self.user.name}")
         log.info(f"| {self.user.id}")
         await self.change_presence(activity=discord.Game(name="Taking over the World", type=0))
-        guild_count = len(self.guilds)
-        await self.session.botlist_post_guilds(guild_count)
+        if self.is_primary:
+            guild_count = await self.fetch_guild_count()
+            await self.session.botlist_post_guilds(guild_count)
+        else:
+            await self.report_guild_count()
 
     async def on_guild_join(self, guild):
         """
@@ -299,7 +525,31 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
         """
         log.debug("OnGuildRemove Event")
         log.info(f"Left Guild {guild.name}, {dt.datetime.now() - self.BOOT_TIME} after boot")
-        self.database.clean_guild(guild.id)
+        await self.async_database.clean_guild(guild.id)
+        self.prefixes.set_guild(guild.id, None)
+        self.channel_index.remove_guild(guild.id)
+
+    async def on_guild_channel_create(self, channel):
+        """
+            Called upon a channel being created in a guild
+        :param channel: Channel that was created
+        """
+        self.channel_index.add(channel)
+
+    async def on_guild_channel_delete(self, channel):
+        """
+            Called upon a channel being deleted from a guild
+        :param channel: Channel that was deleted
+        """
+        self.channel_index.remove(channel)
+
+    async def on_guild_channel_update(self, before, after):
+        """
+            Called upon a guild channel being changed
+        :param before: Channel before the change
+        :param after: Channel after the change
+        """
+        self.channel_index.update(before, after)
 
     async def on_member_ban(self, guild, user):
         """
@@ -307,23 +557,25 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
         :param guild: Guild the user was banned from
         :param user: User who was banned
         """
-        options = self.database.get_guild_options(guild.id)
+        options = await self.async_database.get_guild_options(guild.id)
         if not options.mod_log:
             return
-        channel = list(filter(lambda x: x.name == options.log_channel, guild.channels))
-        if channel:
-            channel = channel[0]
-            ctx = commands.Context(message=FakeMessage(guild, channel))
+        channel = self.channel_index.get(guild, options.log_channel)
+        if channel is not None:
+            ctx = TalosContext(message=FakeMessage(guild, channel), bot=self)
+            ctx.guild_options = options
+            ctx.user_options = None
             await self.mod_log(ctx, "ban", user, "User banned for unknown reason")
 
     async def on_command(self, ctx):
         """
-            Called when any command is executed. Handles command tracking for users.
+            Called when any command is executed. Handles command tracking for users. Invocations are only counted in
+            memory here, and written out in batches by the event loops and on logout.
         :param ctx: commands.Context object
         """
-        user = self.database.get_user(ctx.author.id)
-        if user:
-            self.database.user_invoked_command(user, str(ctx.command))
+        with self.latencies.timer("on_command"):
+            if self.database.is_connected():
+                self.database.record_invocation(ctx.author.id, str(ctx.command))
 
     async def on_command_error(self, ctx, exception):
         """
@@ -354,6 +606,8 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
             await ctx.send(f"User {exception} isn't registered, command could not be executed.")
         elif isinstance(exception, dutils.CustomCommandError):
             await ctx.send(f"Malformed CommandLang syntax: {exception}")
+        elif isinstance(exception, throttle.AdmissionRefused):
+            await ctx.send(exception)
         else:
             timestamp = int(dt.datetime.now().timestamp())
             try:
@@ -370,6 +624,13 @@ money, please support me on [Patreon](https://www.patreon.com/CraftSpider)'''
             utils.log_error(log, logging.ERROR, exception, message)
 
 
+class AutoShardedTalos(Talos, commands.AutoShardedBot):
+    """
+        Talos running several shards in one process. Pass shard_ids and shard_count to run a fixed range of shards,
+        or neither to let Discord decide how many shards to use.
+    """
+
+
 runner = command_lang.CommandLang(interpreter=command_lang.DiscordCL())
 
 
@@ -395,31 +656,23 @@ def custom_creator(name, text):
 
 def talos_prefix(bot, message):
     """
-        Return the Talos prefix, given Talos class object and a message
+        Return the Talos prefix, given Talos class object and a message. Prefixes are read from the in-memory
+        prefix index, so this never touches the database.
     :param bot: Talos object to find prefix for
     :param message: Discord message object for context
     :return: List of valid prefixes for given bot and message
     """
-    mention = bot.user.mention + " "
-    if isinstance(message.channel, discord.abc.PrivateChannel):
-        try:
-            return [bot.database.get_user_options(message.author.id).prefix, mention]
-        except Exception as e:
-            log.warning("talos_prefix error: " + str(e))
-            return [bot.DEFAULT_PREFIX, mention]
-    else:
-        try:
-            return [bot.database.get_guild_options(message.guild.id).prefix, mention]
-        except Exception as e:
-            log.warning("talos_prefix error: " + str(e))
-            return [bot.DEFAULT_PREFIX, mention]
+    with bot.latencies.timer("prefix"):
+        return [bot.prefixes.get(message), bot.user.mention + " "]
 
 
 def configure_logging():
     """
         Configure the loggers for Talos. Sets up the Talos loggers
         and discord.py loggers separately, so they can be easily configured
-        independently.
+        independently. Both log through a queue, and the real handlers run on
+        a listener thread, so logging never blocks the event loop.
+    :return: The logging QueueListener, which is stopped at exit
     """
     fh = logging.FileHandler(utils.log_folder / "dtalos.log")
     dfh = logging.FileHandler(utils.log_folder / "dpy.log")
@@ -438,8 +691,20 @@ def configure_logging():
 
     dlog = logging.getLogger("discord")
 
-    utils.configure_logger(log, handlers=[fh, sh, gh], formatter=ff, level=logging.INFO, propagate=False)
-    utils.configure_logger(dlog, handlers=[dfh, sh], formatter=ff, level=logging.INFO, propagate=False)
+    for handler in (fh, sh, gh):
+        if handler is not None:
+            handler.setFormatter(ff)
+    dfh.setFormatter(ff)
+    fh.addFilter(logging.Filter(log.name))
+    dfh.addFilter(logging.Filter(dlog.name))
+    if gh is not None:
+        gh = log_handlers.BatchingHandler(gh, capacity=50, interval=5.0)
+        gh.setLevel(logging.WARNING)
+        gh.addFilter(logging.Filter(log.name))
+
+    listener = log_handlers.start_queue_logging([log, dlog], [fh, dfh, sh, gh], level=logging.INFO)
+    atexit.register(listener.stop)
+    return listener
 
 
 def load_token_file(filename):
@@ -471,12 +736,29 @@ def make_token_file(filename):
         json.dump(FILE_BASE, file)
 
 
+def parse_args(args=None):
+    """
+        Parse the Talos command line flags
+    :param args: List of arguments to parse, defaults to sys.argv
+    :return: argparse Namespace of the flags
+    """
+    parser = argparse.ArgumentParser(prog="runner.py discord", description="Run Talos for Discord")
+    parser.add_argument("--auto-shard", action="store_true",
+                        help="Run every shard in this process, letting Discord choose the shard count")
+    parser.add_argument("--shard-count", type=int, help="Total number of shards across all processes")
+    parser.add_argument("--shard-ids", type=lambda x: [int(i) for i in x.split(",")],
+                        help="Comma separated shard ids this process should run")
+    parser.add_argument("--cluster-id", type=int, help="Index of this process in a cluster")
+    return parser.parse_args(args)
+
+
 def main():
     """
         Run Talos as main process. Say hello to our new robot overlord.
     :return: Exit status code
     """
     configure_logging()
+    args = parse_args()
 
     # Load Talos tokens
     tokens = load_token_file(TOKEN_FILE)
@@ -501,7 +783,11 @@ def main():
     # Create and run Talos
     intents = discord.Intents.default()
     intents.members = True
-    talos = Talos(tokens=tokens, intents=intents)
+    if args.auto_shard or args.shard_ids is not None:
+        talos = AutoShardedTalos(tokens=tokens, intents=intents, shard_ids=args.shard_ids,
+                                 shard_count=args.shard_count, cluster_id=args.cluster_id)
+    else:
+        talos = Talos(tokens=tokens, intents=intents, cluster_id=args.cluster_id)
 
     try:
         talos.run(bot_token)
@@ -3,6 +3,49 @@ from spidertools.common.data import Row, MultiRow
 import spidertools.common as common
 import spidertools.discord as dutils
 
+import time
+import random
+import asyncio
+import logging
+import functools
+import threading
+
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Maximum number of merged option rows kept in memory, per option type
+OPTIONS_CACHE_SIZE = 4096
+# Maximum number of generated SELECT statements kept in memory
+STATEMENT_CACHE_SIZE = 256
+# Seconds a pooled connection can sit idle before it's pinged before use
+POOL_PING_INTERVAL = 60
+# Seconds a cloned pooled connection can sit idle before it's dropped
+POOL_IDLE_TIMEOUT = 600
+# Seconds of uptime each uptime mark stands for, the period of the uptime task
+UPTIME_PERIOD = 60
+# Longest gap between two uptime marks that still counts as continuous uptime
+UPTIME_GAP = 90
+# Most rows written or removed by a single bulk statement
+BULK_CHUNK_SIZE = 500
+# Columns only ever added to, by flush_invocations. Saving a row never overwrites them, so a row read before a flush,
+# or holding counts still buffered in memory, can't undo or repeat it
+COUNTER_COLUMNS = {
+    "user_profiles": ("commands_invoked",),
+    "invoked_commands": ("times_invoked",)
+}
+# Cached quote ids tried by get_random_quote before it picks in SQL instead, for when the picks keep turning out to
+# be deleted quotes
+QUOTE_PICK_TRIES = 5
+# Prefix of the index names managed through schema.json. Other indexes, such as the ones MySQL makes for foreign
+# keys, are left alone
+INDEX_PREFIX = "idx_"
+# Seconds before the last cache sync that changes are still looked for, so a change committed while a sync ran isn't
+# missed
+CACHE_SYNC_SLACK = 5
+
+log = logging.getLogger("talos.sql")
+
 
 class TalosAdmin(Row):
     """
@@ -264,12 +307,780 @@ class Quote(Row):
     TABLE_NAME = "quotes"
 
 
+class ClusterGuilds(Row):
+    """
+        Cluster Guild Counts Table
+    """
+
+    __slots__ = ("id", "guild_count", "updated_at")
+
+    TABLE_NAME = "cluster_guilds"
+
+
+def synchronized(func):
+    """
+        Decorator for TalosDatabase methods. Holds the database lock for the whole call, so queries run from the
+        async executor and synchronous callers on the event loop never share the connection at the same time
+    :param func: Method to wrap
+    :return: Wrapped method
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return func(self, *args, **kwargs)
+    return wrapper
+
+
+def to_sql_value(value):
+    """
+        Convert a Row value to one the database connector accepts. Values of other types, such as EventPeriod, are
+        stored as their string form
+    :param value: Value from a Row
+    :return: Value to pass to the connector
+    """
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    return str(value)
+
+
+class LRUCache:
+    """
+        Bounded least-recently-used cache. Counts hits and misses, so how well it is doing can be checked at runtime.
+        Safe to share between threads. Every write bumps the version, so a value read from the database can be put
+        only if nothing was written while it was being read.
+    """
+
+    __slots__ = ("maxsize", "hits", "misses", "version", "_data", "_lock")
+
+    def __init__(self, maxsize):
+        """
+            Initialize an empty cache
+        :param maxsize: Number of entries to hold before the least recently used one is evicted
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.version = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """
+            Get the number of entries currently in the cache
+        :return: Number of cached entries
+        """
+        return len(self._data)
+
+    def __contains__(self, key):
+        """
+            Check whether a key is cached, without counting it as a hit or miss
+        :param key: Key to check for
+        :return: Whether the key is cached
+        """
+        return key in self._data
+
+    def get(self, key, default=None):
+        """
+            Get a value from the cache, marking it as recently used
+        :param key: Key to look up
+        :param default: Value to return if the key isn't cached
+        :return: Cached value or default
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        """
+            Add or replace a value in the cache, evicting the oldest entry if the cache is full
+        :param key: Key to store under
+        :param value: Value to store
+        :param version: Version the cache had when the value was read, or None for a write. A read value is only
+                        put if the cache hasn't been written since
+        :return: Whether the value was put
+        """
+        with self._lock:
+            if version is not None and version != self.version:
+                return False
+            if version is None:
+                self.version += 1
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def update(self, key, func):
+        """
+            Change a cached value in place while holding the cache's lock, for values shared between threads. Counts
+            as a write
+        :param key: Key of the value to change
+        :param func: Function called with the cached value
+        :return: Whether the key was cached
+        """
+        with self._lock:
+            if key not in self._data:
+                return False
+            func(self._data[key])
+            self.version += 1
+            self._data.move_to_end(key)
+            return True
+
+    def invalidate(self, key):
+        """
+            Remove a key from the cache, if it's present
+        :param key: Key to remove
+        """
+        with self._lock:
+            self.version += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+            Remove every entry from the cache. Hit and miss counts are kept
+        """
+        with self._lock:
+            self.version += 1
+            self._data.clear()
+
+    def hit_ratio(self):
+        """
+            Get the fraction of lookups that were hits
+        :return: Ratio between 0 and 1
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class QuoteIndex:
+    """
+        The quote ids of a guild, with the quotes themselves loaded as they're asked for. Ids are kept in a list as
+        well, so a random one can be picked without looking at the rest. Safe to share between threads.
+    """
+
+    __slots__ = ("ids", "quotes", "lock")
+
+    def __init__(self, ids):
+        """
+            Initialize the index with a guild's quote ids, no quotes loaded yet
+        :param ids: Iterable of quote ids
+        """
+        self.ids = list(ids)
+        self.quotes = dict.fromkeys(self.ids)
+        self.lock = threading.Lock()
+
+    def __contains__(self, qid):
+        """
+            Check whether a quote id is in the index, whether or not the quote itself is loaded
+        :param qid: id of the quote
+        :return: Whether the guild has a quote with that id
+        """
+        return qid in self.quotes
+
+    def get(self, qid):
+        """
+            Get a loaded quote
+        :param qid: id of the quote
+        :return: Quote, or None if it isn't loaded or isn't in the index
+        """
+        return self.quotes.get(qid)
+
+    def add(self, quote):
+        """
+            Add or replace a quote in the index
+        :param quote: Quote to add, with its id set
+        """
+        with self.lock:
+            if quote.id not in self.quotes:
+                self.ids.append(quote.id)
+            self.quotes[quote.id] = quote
+
+    def discard(self, qid):
+        """
+            Remove a quote from the index, if it's there
+        :param qid: id of the quote to remove
+        """
+        with self.lock:
+            if self.quotes.pop(qid, False) is not False:
+                self.ids.remove(qid)
+
+    def choice(self):
+        """
+            Pick a random quote id
+        :return: Quote id, or None if the guild has no quotes
+        """
+        with self.lock:
+            return random.choice(self.ids) if self.ids else None
+
+
 class TalosDatabase(common.GenericDatabase):
     """
         A talos-specific variant of the generic database that provides methods to get Talos data objects,
         as well as add and remove uptimes.
     """
 
+    def __init__(self, *args, **kwargs):
+        """
+            Initialize the database, along with the in-memory caches that sit in front of it
+        :param args: Arguments to pass to GenericDatabase
+        :param kwargs: Keywords to pass to GenericDatabase
+        """
+        self.lock = threading.RLock()
+        self.caches = {
+            "guild_options": LRUCache(OPTIONS_CACHE_SIZE),
+            "user_options": LRUCache(OPTIONS_CACHE_SIZE),
+            "guild_commands": LRUCache(OPTIONS_CACHE_SIZE),
+            "quotes": LRUCache(OPTIONS_CACHE_SIZE),
+            "statements": LRUCache(STATEMENT_CACHE_SIZE)
+        }
+        self.defaults = {}
+        self.invocations = Counter()
+        self.invocation_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.journal = None
+        self.record_changes = False
+        super().__init__(*args, **kwargs)
+
+    @synchronized
+    def reset_connection(self):
+        """
+            Reset the database connection. Cached data is dropped, as it may not match the new connection
+        """
+        super().reset_connection()
+        self.clear_caches()
+
+    def clone(self):
+        """
+            Open another connection to the same database. The clone shares this database's caches, default
+            snapshots, buffered invocations, journal and flush lock, so it can run queries in parallel on another
+            thread
+        :return: New TalosDatabase
+        """
+        other = type(self)(*self._connection_args())
+        other.caches = self.caches
+        other.defaults = self.defaults
+        other.invocations = self.invocations
+        other.invocation_lock = self.invocation_lock
+        other.flush_lock = self.flush_lock
+        other.journal = self.journal
+        other.record_changes = self.record_changes
+        return other
+
+    def _connection_args(self):
+        """
+            Get the arguments to open another connection to the same database with
+        :return: Tuple of arguments for the constructor
+        """
+        return self._host, self._port, self._username, self._password, self._schema, self._schemadef
+
+    @synchronized
+    def ping(self):
+        """
+            Check the connection with a trivial query, reconnecting if it was lost. Cached data is kept, as the new
+            connection is to the same database
+        :return: Whether the database is connected afterwards
+        """
+        try:
+            self.execute("SELECT 1")
+            self._accessor._cursor.fetchall()
+            return True
+        except Exception:
+            log.info("Database connection lost, reconnecting")
+            super().reset_connection()
+            return self.is_connected()
+
+    @synchronized
+    def clear_caches(self):
+        """
+            Drop everything held in the in-memory caches, including the default option snapshots
+        """
+        for cache in self.caches.values():
+            cache.clear()
+        self.defaults.clear()
+
+    @synchronized
+    def save_item(self, item):
+        """
+            Save a Row or MultiRow to the database, writing any changed options through to the cache. A MultiRow, or
+            a Row with counter columns, is saved with save_items, so each of its tables takes one statement
+        :param item: Row to save
+        """
+        if isinstance(item, MultiRow) or item.TABLE_NAME in COUNTER_COLUMNS:
+            return self.save_items([item])
+        result = super().save_item(item)
+        self._record_changes([self._update_caches(item)])
+        return result
+
+    @synchronized
+    def save_items(self, items):
+        """
+            Save many Rows and MultiRows to the database at once. Rows are grouped by table and written with one
+            multi-row upsert per table, then anything the MultiRows removed is removed in bulk. Counter columns of
+            existing rows are left as they are
+        :param items: Iterable of Rows and MultiRows to save
+        """
+        rows, removed = self._expand_items(items)
+        for cls, group in self._group_rows(rows).items():
+            tabledef = self._schemadef["tables"][cls.TABLE_NAME]
+            columns = [column["name"] for column in tabledef["columns"]]
+            fixed = (*tabledef.get("primary", ()), *COUNTER_COLUMNS.get(cls.TABLE_NAME, ()))
+            updates = [column for column in columns if column not in fixed] or columns[:1]
+            values = f"({', '.join(['%s'] * len(columns))})"
+            for start in range(0, len(group), BULK_CHUNK_SIZE):
+                chunk = group[start:start + BULK_CHUNK_SIZE]
+                query = f"INSERT INTO {self._schema}.{cls.TABLE_NAME} ({', '.join(columns)}) " \
+                        f"VALUES {', '.join([values] * len(chunk))} " \
+                        f"ON DUPLICATE KEY UPDATE {', '.join(f'{column} = VALUES({column})' for column in updates)}"
+                self.execute(query, [to_sql_value(value) for row in chunk for value in row.to_row()])
+        changes = [self._update_caches(row) for row in rows]
+        if removed:
+            changes.extend(self._remove_rows(removed))
+        self._record_changes(changes)
+
+    @staticmethod
+    def _expand_items(items):
+        """
+            Flatten Rows and MultiRows into the Rows they hold, in order. The invoked commands of a TalosUser are
+            left out, as invocation counts are only written by flush_invocations
+        :param items: Iterable of Rows and MultiRows
+        :return: Tuple of the list of Rows, and the list of Rows the MultiRows removed
+        """
+        rows = []
+        removed = []
+        for item in items:
+            if isinstance(item, MultiRow):
+                for name in item.__slots__:
+                    value = getattr(item, name, None)
+                    rows.extend(row for row in (value if isinstance(value, list) else [value])
+                                if isinstance(row, Row) and not isinstance(row, InvokedCommand))
+                removed.extend(item.removed_items())
+            else:
+                rows.append(item)
+        return rows, removed
+
+    @staticmethod
+    def _group_rows(rows):
+        """
+            Group Rows by their type, keeping the order types were first seen in, so parent tables come first
+        :param rows: Iterable of Rows
+        :return: Dict of Row class to list of Rows
+        """
+        groups = {}
+        for row in rows:
+            groups.setdefault(type(row), []).append(row)
+        return groups
+
+    def _remove_rows(self, rows):
+        """
+            Remove Rows by primary key, with one DELETE per table. The cache changes aren't recorded, so the caller
+            can record them along with its own
+        :param rows: List of Rows to remove
+        :return: List of (cache name, key) pairs the removal changed
+        """
+        for cls, group in self._group_rows(rows).items():
+            tabledef = self._schemadef["tables"][cls.TABLE_NAME]
+            columns = [column["name"] for column in tabledef["columns"]]
+            primary = tabledef.get("primary") or columns
+            positions = [columns.index(column) for column in primary]
+            key = f"({', '.join(['%s'] * len(primary))})"
+            for start in range(0, len(group), BULK_CHUNK_SIZE):
+                chunk = group[start:start + BULK_CHUNK_SIZE]
+                query = f"DELETE FROM {self._schema}.{cls.TABLE_NAME} " \
+                        f"WHERE ({', '.join(primary)}) IN ({', '.join([key] * len(chunk))})"
+                self.execute(query, [to_sql_value(row.to_row()[i]) for row in chunk for i in positions])
+        return [self._update_caches(row, removed=True) for row in rows]
+
+    @synchronized
+    def remove_item(self, item, general=False):
+        """
+            Remove a Row or MultiRow from the database, dropping any cached copies of it
+        :param item: Row to remove
+        :param general: Whether to remove all rows matching the non-null values of the item
+        """
+        result = super().remove_item(item, general)
+        self._record_changes([self._update_caches(item, removed=True)])
+        return result
+
+    @synchronized
+    def get_item(self, *args, **kwargs):
+        """
+            Get a single Row from the database. Lookups by plain column values use a cached statement
+        :param args: Arguments to pass to GenericDatabase
+        :param kwargs: Keywords to pass to GenericDatabase
+        :return: Row or default
+        """
+        default = kwargs.pop("default", None)
+        rows = self._select(args, kwargs, single=True)
+        if rows is None:
+            return super().get_item(*args, default=default, **kwargs)
+        return rows[0] if rows else default
+
+    @synchronized
+    def get_items(self, *args, **kwargs):
+        """
+            Get a list of Rows from the database. Lookups by plain column values use a cached statement
+        :param args: Arguments to pass to GenericDatabase
+        :param kwargs: Keywords to pass to GenericDatabase
+        :return: List of Rows
+        """
+        rows = self._select(args, kwargs, single=False)
+        if rows is None:
+            return super().get_items(*args, **kwargs)
+        return rows
+
+    def _select(self, args, kwargs, single):
+        """
+            Run a SELECT for a get_item or get_items call through the statement cache. Statements are keyed by
+            table, filter columns, order and the shape of the limit, so repeated lookups skip building the query
+            and send the same text, which the connection can reuse its parsed statement for. Filters on NULL and
+            other calls the cache can't express are left to GenericDatabase
+        :param args: Positional arguments of the call, just the Row class
+        :param kwargs: Keywords of the call, order, limit and column filters
+        :param single: Whether only the first row is needed
+        :return: List of Rows, or None if the call should go through GenericDatabase
+        """
+        if len(args) != 1 or not isinstance(args[0], type) or not issubclass(args[0], Row):
+            return None
+        if not self.is_connected():
+            return None
+        cls = args[0]
+        order = kwargs.get("order")
+        limit = kwargs.get("limit")
+        filters = {key: value for key, value in kwargs.items() if key not in ("order", "limit")}
+        if any(value is None for value in filters.values()):
+            return None
+        if limit is None:
+            limit = (1,) if single else ()
+        elif isinstance(limit, int):
+            limit = (limit,)
+        else:
+            limit = tuple(limit)
+
+        columns = tuple(filters)
+        key = (cls.TABLE_NAME, columns, order, len(limit))
+        statements = self.caches["statements"]
+        query = statements.get(key)
+        if query is None:
+            query = f"SELECT * FROM {self._schema}.{cls.TABLE_NAME}"
+            if columns:
+                query += " WHERE " + " AND ".join(f"{column} = %s" for column in columns)
+            if order is not None:
+                query += f" ORDER BY {order}"
+            if limit:
+                query += " LIMIT " + ", ".join(["%s"] * len(limit))
+            statements.put(key, query)
+        self.execute(query, [*filters.values(), *limit])
+        return [cls(row) for row in self._accessor._cursor.fetchall()]
+
+    @synchronized
+    def get_count(self, *args, **kwargs):
+        """
+            Count the rows of a table matching some filters
+        :param args: Arguments to pass to GenericDatabase
+        :param kwargs: Keywords to pass to GenericDatabase
+        :return: Number of matching rows
+        """
+        return super().get_count(*args, **kwargs)
+
+    @synchronized
+    def remove_items(self, *args, **kwargs):
+        """
+            Remove all rows of a table matching some filters. Any cache over that table is dropped. Given a list of
+            Rows and MultiRows instead, removes each of them by primary key, with one DELETE per table
+        :param args: Arguments to pass to GenericDatabase, or just the list of items to remove
+        :param kwargs: Keywords to pass to GenericDatabase
+        """
+        if len(args) == 1 and not kwargs and not isinstance(args[0], type):
+            self._record_changes(self._remove_rows(self._expand_items(args[0])[0]))
+            return None
+        result = super().remove_items(*args, **kwargs)
+        name = getattr(args[0], "TABLE_NAME", None) if args else None
+        cache = self.caches.get(name)
+        if cache is not None:
+            cache.clear()
+            self._record_changes([(name, -1)])
+        return result
+
+    @synchronized
+    def execute(self, *args, **kwargs):
+        """
+            Execute a statement on the database connection
+        :param args: Arguments to pass to GenericDatabase
+        :param kwargs: Keywords to pass to GenericDatabase
+        """
+        return super().execute(*args, **kwargs)
+
+    @synchronized
+    def raw_exec(self, *args, **kwargs):
+        """
+            Execute a raw statement and return the result
+        :param args: Arguments to pass to GenericDatabase
+        :param kwargs: Keywords to pass to GenericDatabase
+        :return: Result of the statement
+        """
+        return super().raw_exec(*args, **kwargs)
+
+    @synchronized
+    def commit(self):
+        """
+            Commit the current transaction
+        :return: Whether the commit happened
+        """
+        return super().commit()
+
+    @synchronized
+    def verify_schema(self):
+        """
+            Check the database schema against the schema definition, and alter it to match. Secondary indexes
+            are diffed by name and columns, an index whose columns changed is dropped and created again. Uptime
+            left in the old per-minute table is moved into uptime intervals
+        :return: Dict of changes made
+        """
+        results = super().verify_schema()
+        self._migrate_uptime()
+        results["indexes_add"] = 0
+        results["indexes_remove"] = 0
+        for table, tabledef in self._schemadef["tables"].items():
+            wanted = {name: tuple(columns) for name, columns in tabledef.get("indexes", {}).items()}
+            existing = self._get_indexes(table)
+            for name, columns in existing.items():
+                if wanted.get(name) != columns:
+                    self._drop_index(table, name)
+                    results["indexes_remove"] += 1
+            for name, columns in wanted.items():
+                if existing.get(name) != columns:
+                    self._create_index(table, name, columns)
+                    results["indexes_add"] += 1
+        return results
+
+    def _has_table(self, table):
+        """
+            Check whether a table exists in the schema
+        :param table: Name of the table
+        :return: Whether the table exists
+        """
+        self.execute("SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+                     [self._schema, table])
+        return self._accessor._cursor.fetchone()[0] > 0
+
+    def _migrate_uptime(self):
+        """
+            Compress the marks of the old per-minute uptime table into uptime intervals, then drop it. Marks are
+            joined the same way add_uptime joins them. Does nothing once the old table is gone
+        :return: Number of intervals written
+        """
+        if not self._has_table("uptime"):
+            return 0
+        self.execute(f"SELECT time FROM {self._schema}.uptime ORDER BY time")
+        intervals = []
+        for mark, in self._accessor._cursor.fetchall():
+            if intervals and intervals[-1][1] >= mark - UPTIME_GAP:
+                intervals[-1][1] = mark
+            else:
+                intervals.append([mark - UPTIME_PERIOD, mark])
+        for start in range(0, len(intervals), BULK_CHUNK_SIZE):
+            chunk = intervals[start:start + BULK_CHUNK_SIZE]
+            query = f"INSERT INTO {self._schema}.uptime_intervals (start_time, end_time) " \
+                    f"VALUES {', '.join(['(%s, %s)'] * len(chunk))} " \
+                    f"ON DUPLICATE KEY UPDATE end_time = GREATEST(end_time, VALUES(end_time))"
+            self.execute(query, [value for interval in chunk for value in interval])
+        self.execute(f"DROP TABLE {self._schema}.uptime")
+        log.info(f"Moved old uptime into {len(intervals)} uptime intervals")
+        return len(intervals)
+
+    def _get_indexes(self, table):
+        """
+            Get the schema managed indexes currently on a table
+        :param table: Name of the table
+        :return: Dict of index name to tuple of column names
+        """
+        self.execute("SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS "
+                     "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY INDEX_NAME, SEQ_IN_INDEX",
+                     [self._schema, table])
+        indexes = {}
+        for name, column in self._accessor._cursor.fetchall():
+            if name.startswith(INDEX_PREFIX):
+                indexes[name] = indexes.get(name, ()) + (column,)
+        return indexes
+
+    def _create_index(self, table, name, columns):
+        """
+            Create an index on a table
+        :param table: Name of the table
+        :param name: Name of the index
+        :param columns: Sequence of column names to index
+        """
+        self.execute(f"CREATE INDEX {name} ON {self._schema}.{table} ({', '.join(columns)})")
+
+    def _drop_index(self, table, name):
+        """
+            Drop an index from a table
+        :param table: Name of the table
+        :param name: Name of the index
+        """
+        self.execute(f"DROP INDEX {name} ON {self._schema}.{table}")
+
+    def _update_caches(self, item, removed=False):
+        """
+            Bring the caches in line with an item that was just written to or removed from the database
+        :param item: Row or MultiRow that was written
+        :param removed: Whether the item was removed rather than saved
+        :return: (cache name, key) pair the write changed, for _record_changes, or None if no cache covers it
+        """
+        if isinstance(item, TalosUser):
+            item = item.options
+        if isinstance(item, GuildCommand):
+            self._update_command_cache(item, removed)
+            return item.TABLE_NAME, item.id
+        if isinstance(item, Quote):
+            self._update_quote_cache(item, removed)
+            return item.TABLE_NAME, item.guild_id
+        if isinstance(item, (GuildOptions, UserOptions)):
+            cache = self.caches[item.TABLE_NAME]
+        else:
+            return None
+
+        if item.id == -1:
+            self.defaults.pop(item.TABLE_NAME, None)
+            if not removed and self.is_connected():
+                self.defaults[item.TABLE_NAME] = tuple(item.to_row())
+            cache.clear()
+        elif removed or not self.is_connected():
+            cache.invalidate(item.id)
+        else:
+            cache.put(item.id, self._fill_defaults(item, self._get_defaults(type(item))))
+        return item.TABLE_NAME, item.id
+
+    def _record_changes(self, changes):
+        """
+            Note that cached entries were written, so other processes sharing the database drop their copies on
+            their next sync_caches. Only done when record_changes is set, as a process running alone has no one to
+            tell. All the changes are written with one statement
+        :param changes: Iterable of (cache name, key) pairs, a key of -1 meaning the whole cache. None is skipped
+        """
+        if not self.record_changes or not self.is_connected():
+            return
+        changes = list(dict.fromkeys(change for change in changes if change is not None))
+        now = int(time.time())
+        for start in range(0, len(changes), BULK_CHUNK_SIZE):
+            chunk = changes[start:start + BULK_CHUNK_SIZE]
+            query = f"INSERT INTO {self._schema}.cache_changes (cache_name, cache_key, changed_at) " \
+                    f"VALUES {', '.join(['(%s, %s, %s)'] * len(chunk))} " \
+                    f"ON DUPLICATE KEY UPDATE changed_at = VALUES(changed_at)"
+            self.execute(query, [value for name, key in chunk for value in (name, key, now)])
+
+    @synchronized
+    def sync_caches(self, since):
+        """
+            Drop every cached entry another process changed since a time. An entry changed by this process is
+            dropped too, and read again on its next use
+        :param since: Timestamp of the last sync
+        :return: List of (cache name, key) pairs that changed, a key of -1 meaning the whole cache
+        """
+        query = f"SELECT cache_name, cache_key FROM {self._schema}.cache_changes WHERE changed_at >= %s"
+        self.execute(query, [since - CACHE_SYNC_SLACK])
+        changes = [(name, int(key)) for name, key in self._accessor._cursor.fetchall()]
+        for name, key in changes:
+            cache = self.caches.get(name)
+            if cache is None:
+                continue
+            if key == -1:
+                cache.clear()
+                self.defaults.pop(name, None)
+            else:
+                cache.invalidate(key)
+        return changes
+
+    @synchronized
+    def remove_cache_changes(self, end):
+        """
+            Remove the cache changes noted before a time, once every process has synced past them
+        :param end: Timestamp to remove changes before
+        """
+        query = f"DELETE FROM {self._schema}.cache_changes WHERE changed_at < %s"
+        self.execute(query, [end])
+
+    def _update_command_cache(self, command, removed):
+        """
+            Bring the guild command cache in line with a command that was just written or removed
+        :param command: GuildCommand that was written
+        :param removed: Whether the command was removed rather than saved
+        """
+        cache = self.caches["guild_commands"]
+        if command.id not in cache:
+            return
+        if command.name is None or not self.is_connected():
+            cache.invalidate(command.id)
+            return
+        name = command.name.casefold()
+        if removed:
+            cache.update(command.id, lambda commands: commands.pop(name, None))
+        else:
+            cache.update(command.id, lambda commands: commands.__setitem__(name, command.text))
+
+    def _update_quote_cache(self, quote, removed):
+        """
+            Bring the quote cache in line with a quote that was just written or removed. A new quote gets its id
+            from the database, so the guild is dropped from the cache to be loaded again
+        :param quote: Quote that was written
+        :param removed: Whether the quote was removed rather than saved
+        """
+        cache = self.caches["quotes"]
+        quotes = cache.get(quote.guild_id) if quote.guild_id in cache else None
+        if quotes is None:
+            return
+        if quote.id is None or not self.is_connected():
+            cache.invalidate(quote.guild_id)
+        elif removed:
+            quotes.discard(quote.id)
+            cache.put(quote.guild_id, quotes)
+        else:
+            quotes.add(Quote(quote.to_row()))
+            cache.put(quote.guild_id, quotes)
+
+    @staticmethod
+    def _fill_defaults(options, defaults):
+        """
+            Build a copy of an options row with every unset value taken from the default snapshot
+        :param options: Options row to fill in
+        :param defaults: Tuple snapshot of the default row
+        :return: New filled options row
+        """
+        return type(options)([default if value is None else value
+                              for value, default in zip(options.to_row(), defaults)])
+
+    def _get_defaults(self, cls):
+        """
+            Get the default row of an options table as an immutable snapshot. The row is read once and kept until
+            it's written again. While the database is unavailable, the schema defaults are used and not kept.
+        :param cls: GuildOptions or UserOptions
+        :return: Tuple of the default values
+        """
+        defaults = self.defaults.get(cls.TABLE_NAME)
+        if defaults is None:
+            default = cls(self._schemadef["tables"][cls.TABLE_NAME]["defaults"][0])
+            id_name = "guild_id" if cls is GuildOptions else "user_id"
+            defaults = tuple(self.get_item(cls, default=default, **{id_name: -1}).to_row())
+            if self.is_connected():
+                self.defaults[cls.TABLE_NAME] = defaults
+        return defaults
+
+    @synchronized
+    def load_defaults(self):
+        """
+            Read the default guild and user option rows into their snapshots, replacing any already loaded
+        """
+        self.defaults.clear()
+        self._get_defaults(GuildOptions)
+        self._get_defaults(UserOptions)
+
+    @synchronized
     def clean_guild(self, guild_id):
         """
             Remove all entries belonging to a specific guild from the database.
@@ -277,34 +1088,43 @@ class TalosDatabase(common.GenericDatabase):
         """
         for item in ["guild_options", "admins", "perm_rules", "guild_commands"]:
             self.execute(f"DELETE FROM {self._schema}.{item} WHERE guild_id = %s", [guild_id])
+        self.caches["guild_options"].invalidate(guild_id)
+        self.caches["guild_commands"].invalidate(guild_id)
+        self._record_changes([("guild_options", guild_id), ("guild_commands", guild_id)])
 
     # Guild option methods
 
+    @synchronized
     def get_guild_defaults(self):
         """
             Get all default guild option values
         :return: List of guild option default values
         """
-        default = GuildOptions(self._schemadef["tables"]["guild_options"]["defaults"][0])
-        return self.get_item(GuildOptions, default=default, guild_id=-1)
+        return GuildOptions(self._get_defaults(GuildOptions))
 
+    @synchronized
     def get_guild_options(self, guild_id):
         """
-            Get all options for a guild. If option isn't set, returns the default for that option
+            Get all options for a guild. If option isn't set, returns the default for that option.
+            Merged options are cached, the returned object is a copy and safe to modify.
         :param guild_id: id of the guild to get options of
         :return: list of the guild's options
         """
-        result = self.get_item(GuildOptions, guild_id=guild_id)
-        guild_defaults = self.get_guild_defaults()
+        cache = self.caches["guild_options"]
+        result = cache.get(guild_id)
         if result is None:
-            guild_defaults.id = guild_id
-            return guild_defaults
-        else:
-            for item in result.__slots__:
-                if getattr(result, item) is None:
-                    setattr(result, item, getattr(guild_defaults, item))
-        return result
-
+            version = cache.version
+            defaults = self._get_defaults(GuildOptions)
+            result = self.get_item(GuildOptions, guild_id=guild_id)
+            if result is None:
+                result = GuildOptions((guild_id,) + defaults[1:])
+            else:
+                result = self._fill_defaults(result, defaults)
+            if self.is_connected():
+                cache.put(guild_id, result, version)
+        return GuildOptions(result.to_row())
+
+    @synchronized
     def get_all_guild_options(self):
         """
             Get all options for all guilds.
@@ -314,31 +1134,37 @@ class TalosDatabase(common.GenericDatabase):
 
     # User option methods
 
+    @synchronized
     def get_user_defaults(self):
         """
             Get all default user option values
         :return: List of user option default values
         """
-        default = UserOptions(self._schemadef["tables"]["user_options"]["defaults"][0])
-        return self.get_item(UserOptions, default=default, user_id=-1)
+        return UserOptions(self._get_defaults(UserOptions))
 
+    @synchronized
     def get_user_options(self, user_id):
         """
-            Get all options for a user. If option isn't set, returns the default for that option
+            Get all options for a user. If option isn't set, returns the default for that option.
+            Merged options are cached, the returned object is a copy and safe to modify.
         :param user_id: id of the user to get options of
         :return: list of the user's options
         """
-        result = self.get_item(UserOptions, user_id=user_id)
-        user_defaults = self.get_user_defaults()
+        cache = self.caches["user_options"]
+        result = cache.get(user_id)
         if result is None:
-            user_defaults.id = user_id
-            return user_defaults
-        else:
-            for item in result.__slots__:
-                if getattr(result, item) is None:
-                    setattr(result, item, getattr(user_defaults, item))
-        return result
-
+            version = cache.version
+            defaults = self._get_defaults(UserOptions)
+            result = self.get_item(UserOptions, user_id=user_id)
+            if result is None:
+                result = UserOptions((user_id,) + defaults[1:])
+            else:
+                result = self._fill_defaults(result, defaults)
+            if self.is_connected():
+                cache.put(user_id, result, version)
+        return UserOptions(result.to_row())
+
+    @synchronized
     def get_all_user_options(self):
         """
             Get all options for all users.
@@ -348,6 +1174,7 @@ class TalosDatabase(common.GenericDatabase):
 
     # User profile methods
 
+    @synchronized
     def register_user(self, user_id):
         """
             Register a user with Talos. Creates values in user_profiles and user_options
@@ -358,28 +1185,178 @@ class TalosDatabase(common.GenericDatabase):
         profile = UserProfile((user_id, None, 0, None))
         self.save_item(profile)
 
+    @synchronized
     def get_user(self, user_id):
         """
-            Return everything about a registered user
+            Return everything about a registered user, read in a single query. Invocations still buffered in memory
+            are added to the counts, so they're current without flushing first
         :param user_id: id of the user to get profile of
         :return: TalosUser object containing the User Data or None
         """
-        user_data = dict()
-        user_data["profile"] = self.get_item(UserProfile, user_id=user_id)
-        if user_data.get("profile") is None:
+        if not self.is_connected():
             return None
-
-        user_data["invoked"] = self.get_items(InvokedCommand, order="times_invoked DESC", user_id=user_id)
-        user_data["titles"] = self.get_items(UserTitle, user_id=user_id)
-        user_data["options"] = self.get_user_options(user_id)
+        cache = self.caches["user_options"]
+        options = cache.get(user_id)
+        version = cache.version
+        defaults = self.defaults.get(UserOptions.TABLE_NAME)
+
+        # Every table is read in one UNION ALL, padded to the same columns. Each column only ever holds one type, so
+        # MySQL doesn't convert the values
+        parts = [
+            f"SELECT 'profile', user_id, description, commands_invoked, title FROM {self._schema}.user_profiles "
+            f"WHERE user_id = %s",
+            f"SELECT 'invoked', user_id, command_name, times_invoked, NULL FROM {self._schema}.invoked_commands "
+            f"WHERE user_id = %s",
+            f"SELECT 'titles', user_id, title, NULL, NULL FROM {self._schema}.user_titles WHERE user_id = %s"
+        ]
+        args = [user_id, user_id, user_id]
+        if options is None:
+            ids = [user_id] if defaults is not None else [user_id, -1]
+            parts.append(f"SELECT 'options', user_id, prefix, rich_embeds, NULL FROM {self._schema}.user_options "
+                         f"WHERE user_id IN ({', '.join(['%s'] * len(ids))})")
+            args.extend(ids)
+        self.execute(" UNION ALL ".join(parts), args)
+
+        user_data = {"profile": None, "invoked": [], "titles": []}
+        option_rows = {}
+        for kind, row_id, text, number, title in self._accessor._cursor.fetchall():
+            if kind == "profile":
+                user_data["profile"] = UserProfile((row_id, text, number, title))
+            elif kind == "invoked":
+                user_data["invoked"].append(InvokedCommand((row_id, text, number)))
+            elif kind == "titles":
+                user_data["titles"].append(UserTitle((row_id, text)))
+            else:
+                option_rows[row_id] = UserOptions((row_id, number, text))
+        if user_data["profile"] is None:
+            return None
+        with self.invocation_lock:
+            pending = {command: count for (invoker, command), count in self.invocations.items() if invoker == user_id}
+        if pending:
+            user_data["profile"].commands_invoked += sum(pending.values())
+            for invoked in user_data["invoked"]:
+                invoked.times_invoked += pending.pop(invoked.command_name, 0)
+            user_data["invoked"].extend(InvokedCommand((user_id, command, count)) for command, count in pending.items())
+        user_data["invoked"].sort(key=lambda invoked: invoked.times_invoked, reverse=True)
+
+        if options is None:
+            if defaults is None:
+                default = option_rows.get(-1)
+                if default is None:
+                    default = UserOptions(self._schemadef["tables"][UserOptions.TABLE_NAME]["defaults"][0])
+                defaults = self.defaults[UserOptions.TABLE_NAME] = tuple(default.to_row())
+            options = option_rows.get(user_id)
+            if options is None:
+                options = UserOptions((user_id,) + defaults[1:])
+            else:
+                options = self._fill_defaults(options, defaults)
+            cache.put(user_id, options, version)
+        user_data["options"] = UserOptions(options.to_row())
 
         return TalosUser(user_data)
 
+    def record_invocation(self, user_id, command):
+        """
+            Count a command invocation in memory. Nothing is written until the next flush_invocations, so this never
+            waits on the database. If there is a journal, the invocation is recorded there first, so a crash doesn't
+            lose it
+        :param user_id: id of the user who invoked the command
+        :param command: name of the command that was invoked
+        """
+        with self.invocation_lock:
+            if self.journal is not None:
+                self.journal.append("invocation", user_id, command)
+            self.invocations[(user_id, command)] += 1
+
+    @synchronized
+    def replay_journal(self):
+        """
+            Load the invocations left in the journal by a previous run, then write them out. If the database is
+            unavailable they stay buffered, and their segments are kept until a later flush writes them. Should only
+            be called once, on startup
+        :return: Number of invocations replayed
+        """
+        if self.journal is None:
+            return 0
+        replayed = Counter()
+        for op, args in self.journal.replay():
+            if op == "invocation":
+                replayed[tuple(args)] += 1
+            else:
+                log.warning(f"Unknown journal operation {op}")
+        with self.invocation_lock:
+            self.invocations.update(replayed)
+        self.flush_invocations()
+        return sum(replayed.values())
+
+    @synchronized
+    def flush_invocations(self):
+        """
+            Write all buffered invocations to the database, as one multi-row upsert into invoked_commands and one
+            into user_profiles. Invocations by unregistered users are dropped. If the database is unavailable, the
+            invocations stay buffered for the next flush. Flushes run one at a time across every clone, so a flush
+            never discards journal segments holding invocations another flush put back
+        :return: Number of invocations written
+        """
+        with self.flush_lock:
+            return self._flush_invocations()
+
+    def _flush_invocations(self):
+        """
+            Write all buffered invocations to the database. Must be called with the flush lock held
+        :return: Number of invocations written
+        """
+        with self.invocation_lock:
+            pending = Counter(self.invocations)
+            self.invocations.clear()
+            mark = self.journal.seal() if self.journal is not None else 0
+        if not pending:
+            if self.journal is not None:
+                self.journal.discard(mark)
+            return 0
+        if not self.is_connected():
+            with self.invocation_lock:
+                self.invocations.update(pending)
+            return 0
+        try:
+            user_ids = list({user_id for user_id, _ in pending})
+            query = f"SELECT user_id FROM {self._schema}.user_profiles " \
+                    f"WHERE user_id IN ({', '.join(['%s'] * len(user_ids))})"
+            self.execute(query, user_ids)
+            registered = {row[0] for row in self._accessor._cursor.fetchall()}
+
+            commands = [(user_id, command, count) for (user_id, command), count in pending.items()
+                        if user_id in registered]
+            if not commands:
+                if self.journal is not None:
+                    self.journal.discard(mark)
+                return 0
+            totals = Counter()
+            for user_id, _, count in commands:
+                totals[user_id] += count
+
+            query = f"INSERT INTO {self._schema}.invoked_commands (user_id, command_name, times_invoked) " \
+                    f"VALUES {', '.join(['(%s, %s, %s)'] * len(commands))} " \
+                    f"ON DUPLICATE KEY UPDATE times_invoked = times_invoked + VALUES(times_invoked)"
+            self.execute(query, [value for row in commands for value in row])
+            query = f"INSERT INTO {self._schema}.user_profiles (user_id, commands_invoked) " \
+                    f"VALUES {', '.join(['(%s, %s)'] * len(totals))} " \
+                    f"ON DUPLICATE KEY UPDATE commands_invoked = commands_invoked + VALUES(commands_invoked)"
+            self.execute(query, [value for row in totals.items() for value in row])
+        except Exception:
+            with self.invocation_lock:
+                self.invocations.update(pending)
+            raise
+        if self.journal is not None:
+            self.journal.discard(mark)
+        return sum(totals.values())
+
+    @synchronized
     def user_invoked_command(self, user, command):
         """
             Called when a registered user invokes a command. Insert or increment the times that command has been invoked
-            in invoked_commands table for that user.
-        :param user_id: id of the user who invoked the command
+            in invoked_commands table for that user. Writes immediately, prefer record_invocation in hot paths.
+        :param user: TalosUser who invoked the command
         :param command: name of the command that was invoked
         """
 
@@ -393,6 +1370,7 @@ class TalosDatabase(common.GenericDatabase):
 
     # Admin methods
 
+    @synchronized
     def get_all_admins(self):
         """
             Get all admins in all servers
@@ -400,6 +1378,7 @@ class TalosDatabase(common.GenericDatabase):
         """
         return self.get_items(TalosAdmin)
 
+    @synchronized
     def get_admins(self, guild_id):
         """
             Get the list of admin for a specific guild
@@ -410,6 +1389,7 @@ class TalosDatabase(common.GenericDatabase):
 
     # Perms methods
 
+    @synchronized
     def get_perm_rule(self, guild_id, command, perm_type, target):
         """
             Get permission rule for a specific context
@@ -422,6 +1402,7 @@ class TalosDatabase(common.GenericDatabase):
         return self.get_item(PermissionRule, guild_id=guild_id, command=command, perm_type=perm_type,
                              target=target)
 
+    @synchronized
     def get_perm_rules(self, guild_id=-1, command=None, perm_type=None, target=None):
         """
             Get a list of permissions rules for a variably specific context
@@ -440,6 +1421,7 @@ class TalosDatabase(common.GenericDatabase):
             args["target"] = target
         return self.get_items(PermissionRule, guild_id=guild_id, **args)
 
+    @synchronized
     def get_all_perm_rules(self):
         """
             Get all permission rules in the database
@@ -449,15 +1431,52 @@ class TalosDatabase(common.GenericDatabase):
 
     # Custom guild commands
 
+    @synchronized
     def get_guild_command(self, guild_id, name):
         """
-            Get the text for a custom guild command
+            Get the text for a custom guild command. The names of a guild's commands are cached after the first
+            lookup, so names that aren't commands are answered from memory. Command text is cached on first use.
+            Names are compared casefolded, as MySQL compares them case-insensitively
         :param guild_id: id of the guild
         :param name: name of the command
         :return: text of the command or None
         """
-        return self.get_item(GuildCommand, guild_id=guild_id, name=name)
-
+        commands = self._get_command_cache(guild_id)
+        if commands is None:
+            return self.get_item(GuildCommand, guild_id=guild_id, name=name)
+        key = name.casefold()
+        if key not in commands:
+            return None
+        text = commands.get(key)
+        if text is None:
+            command = self.get_item(GuildCommand, guild_id=guild_id, name=name)
+            cache = self.caches["guild_commands"]
+            if command is None:
+                cache.update(guild_id, lambda cached: cached.pop(key, None))
+                return None
+            text = command.text
+            cache.update(guild_id, lambda cached: cached.__setitem__(key, text))
+        return GuildCommand((guild_id, name, text))
+
+    def _get_command_cache(self, guild_id):
+        """
+            Get the cached commands of a guild, loading their names if the guild isn't cached yet
+        :param guild_id: id of the guild
+        :return: Dict of casefolded command name to text, None for text not yet loaded. None if the database is
+                 unavailable
+        """
+        cache = self.caches["guild_commands"]
+        commands = cache.get(guild_id)
+        if commands is None:
+            if not self.is_connected():
+                return None
+            version = cache.version
+            self.execute(f"SELECT name FROM {self._schema}.guild_commands WHERE guild_id = %s", [guild_id])
+            commands = dict.fromkeys(row[0].casefold() for row in self._accessor._cursor.fetchall())
+            cache.put(guild_id, commands, version)
+        return commands
+
+    @synchronized
     def get_guild_commands(self, guild_id):
         """
             Get a list of all commands for a guild, both names and internal text
@@ -468,6 +1487,7 @@ class TalosDatabase(common.GenericDatabase):
 
     # Custom guild events
 
+    @synchronized
     def get_guild_event(self, guild_id, name):
         """
             Get the text and period for a custom guild event
@@ -477,6 +1497,7 @@ class TalosDatabase(common.GenericDatabase):
         """
         return self.get_item(GuildEvent, guild_id=guild_id, name=name)
 
+    @synchronized
     def get_guild_events(self, guild_id):
         """
             Get all the events for a guild
@@ -487,6 +1508,7 @@ class TalosDatabase(common.GenericDatabase):
 
     # Quote methods
 
+    @synchronized
     def get_quote(self, guild_id, qid):
         """
             Get a specified quote from the quote table
@@ -494,41 +1516,293 @@ class TalosDatabase(common.GenericDatabase):
         :param qid: ID of the quote
         :return: Quote object, assuming quote exists
         """
-        return self.get_item(Quote, guild_id=guild_id, id=qid)
+        quotes = self._get_quote_cache(guild_id)
+        if quotes is None:
+            return self.get_item(Quote, guild_id=guild_id, id=qid)
+        return self._get_indexed_quote(quotes, guild_id, qid)
 
+    def _get_indexed_quote(self, quotes, guild_id, qid):
+        """
+            Get a quote through a guild's quote index, reading it in if only its id is known. A quote that turns
+            out to be deleted is dropped from that same index, even if the cache has replaced it since
+        :param quotes: QuoteIndex of the guild
+        :param guild_id: Guild the quote is from
+        :param qid: ID of the quote
+        :return: Copy of the quote, or None if it doesn't exist
+        """
+        if qid not in quotes:
+            return None
+        quote = quotes.get(qid)
+        if quote is None:
+            quote = self.get_item(Quote, guild_id=guild_id, id=qid)
+            if quote is None:
+                quotes.discard(qid)
+                return None
+            quotes.add(quote)
+        return Quote(quote.to_row())
+
+    @synchronized
     def get_random_quote(self, guild_id):
         """
-            Get a random quote from the quote table
+            Get a random quote from the quote table. The id is picked from the guild's cached quote ids, so only
+            the picked quote is read. If a few picks in a row turn out to be deleted, the pick is made in SQL
         :param guild_id: Guild the quote should be from
         :return: Quote object
         """
+        quotes = self._get_quote_cache(guild_id)
+        if quotes is None:
+            return self.get_item(Quote, order="RAND()", guild_id=guild_id)
+        for _ in range(QUOTE_PICK_TRIES):
+            qid = quotes.choice()
+            if qid is None:
+                return None
+            quote = self._get_indexed_quote(quotes, guild_id, qid)
+            if quote is not None:
+                return quote
         return self.get_item(Quote, order="RAND()", guild_id=guild_id)
 
+    def _get_quote_cache(self, guild_id):
+        """
+            Get the cached quotes of a guild, loading their ids if the guild isn't cached yet
+        :param guild_id: id of the guild
+        :return: QuoteIndex of the guild. None if the database is unavailable
+        """
+        cache = self.caches["quotes"]
+        quotes = cache.get(guild_id)
+        if quotes is None:
+            if not self.is_connected():
+                return None
+            version = cache.version
+            self.execute(f"SELECT id FROM {self._schema}.quotes WHERE guild_id = %s", [guild_id])
+            quotes = QuoteIndex(row[0] for row in self._accessor._cursor.fetchall())
+            cache.put(guild_id, quotes, version)
+        return quotes
+
     # Uptime methods
 
+    @synchronized
     def add_uptime(self, uptime):
         """
-            Add an uptime value to the list
-        :param uptime: value of the uptime check to add
+            Mark Talos as up at a time. The latest uptime interval is extended to the mark if it ended recently
+            enough, otherwise a new interval is started
+        :param uptime: Timestamp of the uptime mark
         """
-        query = f"INSERT INTO {self._schema}.uptime VALUES (%s)"
-        self.execute(query, [uptime])
+        query = f"UPDATE {self._schema}.uptime_intervals SET end_time = %s WHERE end_time >= %s AND end_time < %s"
+        self.execute(query, [uptime, uptime - UPTIME_GAP, uptime])
+        if self._accessor._cursor.rowcount == 0:
+            query = f"INSERT INTO {self._schema}.uptime_intervals VALUES (%s, %s)"
+            self.execute(query, [uptime - UPTIME_PERIOD, uptime])
 
-    def get_uptime(self, start):
+    @synchronized
+    def get_uptime(self, *starts):
         """
-            Get all uptimes greater than a specified value
-        :param start: Value to start at for uptime collection
-        :return: List of all uptimes
+            Get how long Talos has been up since each of several times, summed over the uptime intervals in a
+            single query
+        :param starts: Timestamps to count uptime from
+        :return: List of seconds of uptime since each start
         """
-        query = f"SELECT time FROM {self._schema}.uptime WHERE time >= %s"
-        self.execute(query, [start])
-        result = self._accessor._cursor.fetchall()
-        return result
+        sums = ", ".join(["SUM(CASE WHEN end_time > %s THEN end_time - GREATEST(start_time, %s) ELSE 0 END)"]
+                         * len(starts))
+        query = f"SELECT {sums} FROM {self._schema}.uptime_intervals WHERE end_time > %s"
+        self.execute(query, [start for start in starts for _ in range(2)] + [min(starts)])
+        result = self._accessor._cursor.fetchone()
+        return [int(value or 0) for value in result]
 
+    @synchronized
     def remove_uptime(self, end):
         """
-            Remove all uptimes less than a specified value
-        :param end: Value to end at for uptime removal
+            Remove uptime from before a time. Intervals that end before it are deleted, and one that spans it is
+            trimmed to start at it
+        :param end: Timestamp to remove uptime before
         """
-        query = f"DELETE FROM {self._schema}.uptime WHERE time < %s"
+        query = f"DELETE FROM {self._schema}.uptime_intervals WHERE end_time <= %s"
         self.execute(query, [end])
+        query = f"UPDATE {self._schema}.uptime_intervals SET start_time = %s WHERE start_time < %s"
+        self.execute(query, [end, end])
+
+    # Cluster methods
+
+    @synchronized
+    def set_guild_count(self, cluster_id, guild_count):
+        """
+            Report the number of guilds a cluster process holds
+        :param cluster_id: Index of the process in the cluster
+        :param guild_count: Number of guilds the process holds
+        """
+        self.save_item(ClusterGuilds([cluster_id, guild_count, int(time.time())]))
+
+    @synchronized
+    def get_guild_count(self, since):
+        """
+            Get the number of guilds held by every cluster process that reported since a time. Processes that
+            stopped reporting, such as ones that were shut down, aren't counted
+        :param since: Timestamp of the oldest report to count
+        :return: Total number of guilds
+        """
+        self.execute(f"SELECT SUM(guild_count) FROM {self._schema}.cluster_guilds WHERE updated_at >= %s", [since])
+        result = self._accessor._cursor.fetchone()
+        return int(result[0] or 0)
+
+
+class AsyncTalosDatabase:
+    """
+        Awaitable front for a pool of TalosDatabase connections. Every method of the wrapped database is available as
+        a coroutine that runs on a worker thread with a connection of its own, so a slow query never blocks the event
+        loop and concurrent commands never share a cursor. The pool holds only clones of the wrapped database, made as
+        needed up to one per worker thread, so it never shares the connection the event loop uses directly.
+    """
+
+    __slots__ = ("database", "latencies", "ping_interval", "idle_timeout", "_executor", "_methods", "_idle",
+                 "_clones", "_pool_lock")
+
+    def __init__(self, database, latencies=None, pool_size=1, ping_interval=POOL_PING_INTERVAL,
+                 idle_timeout=POOL_IDLE_TIMEOUT):
+        """
+            Initialize the wrapper and its worker threads
+        :param database: TalosDatabase to run queries on, and to clone more connections from
+        :param latencies: LatencyTracker to time calls under the database stage, or None to not time them
+        :param pool_size: Number of queries that can run at once, each on its own connection
+        :param ping_interval: Seconds a connection can sit idle before it's checked before use
+        :param idle_timeout: Seconds a cloned connection can sit idle before it's dropped from the pool
+        """
+        self.database = database
+        self.latencies = latencies
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="talos-db")
+        self._methods = {}
+        self._idle = []
+        self._clones = set()
+        self._pool_lock = threading.Lock()
+
+    def __getattr__(self, item):
+        """
+            Get an awaitable version of a method on the wrapped database
+        :param item: Name of the method
+        :return: Coroutine function running the method on a pooled connection
+        """
+        method = getattr(self.database, item)
+        if item.startswith("_") or not callable(method):
+            raise AttributeError(f"'{type(self).__name__}' only wraps public database methods, not '{item}'")
+        wrapped = self._methods.get(item)
+        if wrapped is None:
+            async def wrapped(*args, **kwargs):
+                return await self._submit(self._call, item, args, kwargs)
+            functools.update_wrapper(wrapped, method)
+            self._methods[item] = wrapped
+        return wrapped
+
+    def _checkout(self):
+        """
+            Take the most recently used idle connection out of the pool, or clone a new one if none are idle.
+            A connection that sat idle too long is pinged first, reconnecting it if the server dropped it
+        :return: TalosDatabase to run a query on
+        """
+        with self._pool_lock:
+            if not self._idle:
+                connection = None
+            else:
+                connection, last_used = self._idle.pop()
+        if connection is None:
+            connection = self.database.clone()
+            with self._pool_lock:
+                self._clones.add(connection)
+        elif time.monotonic() - last_used > self.ping_interval:
+            connection.ping()
+        return connection
+
+    def _checkin(self, connection):
+        """
+            Return a connection to the pool. Clones from before a reset are dropped instead
+        :param connection: TalosDatabase that was checked out
+        """
+        with self._pool_lock:
+            if connection in self._clones:
+                self._idle.append((connection, time.monotonic()))
+
+    def _call(self, item, args, kwargs):
+        """
+            Run a database method on a pooled connection
+        :param item: Name of the method
+        :param args: Arguments to call it with
+        :param kwargs: Keywords to call it with
+        :return: Result of the call
+        """
+        connection = self._checkout()
+        try:
+            return getattr(connection, item)(*args, **kwargs)
+        finally:
+            self._checkin(connection)
+
+    async def _submit(self, func, *args):
+        """
+            Run a callable on a worker thread, timing it as the database stage
+        :param func: Callable to run
+        :param args: Arguments to call it with
+        :return: Result of the call
+        """
+        loop = asyncio.get_event_loop()
+        if self.latencies is None:
+            return await loop.run_in_executor(self._executor, func, *args)
+        with self.latencies.timer("database"):
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def run(self, func, *args, **kwargs):
+        """
+            Run any blocking callable on a database worker thread
+        :param func: Callable to run
+        :param args: Arguments to call it with
+        :param kwargs: Keywords to call it with
+        :return: Result of the call
+        """
+        return await self._submit(functools.partial(func, *args, **kwargs))
+
+    def _maintain(self):
+        """
+            Drop clones idle past the idle timeout, and ping the others idle past the ping interval
+        """
+        now = time.monotonic()
+        stale = []
+        with self._pool_lock:
+            keep = []
+            for connection, last_used in self._idle:
+                if now - last_used > self.idle_timeout:
+                    self._clones.discard(connection)
+                elif now - last_used > self.ping_interval:
+                    stale.append(connection)
+                else:
+                    keep.append((connection, last_used))
+            self._idle = keep
+        for connection in stale:
+            connection.ping()
+            self._checkin(connection)
+
+    async def maintain(self):
+        """
+            Keep the pool healthy. Should be called regularly, so idle connections are never dropped by the server
+        """
+        await asyncio.get_event_loop().run_in_executor(self._executor, self._maintain)
+
+    def _reset(self):
+        """
+            Drop every cloned connection, then reset the wrapped database
+        """
+        with self._pool_lock:
+            self._clones.clear()
+            self._idle = []
+        self.database.reset_connection()
+
+    async def reset_connection(self):
+        """
+            Reset the whole pool. Clones are reopened as needed, from the reset connection
+        """
+        await self._submit(self._reset)
+
+    def close(self):
+        """
+            Wait for any pending queries to finish, then stop the worker threads and drop the pooled connections
+        """
+        self._executor.shutdown(wait=True)
+        with self._pool_lock:
+            self._clones.clear()
+            self._idle = []
@@ -0,0 +1,445 @@
+"""
+    SQLite backend for the Talos database. Stores everything in a local file in WAL mode, for single node
+    deployments and test runs that shouldn't need a MySQL server.
+
+    Author: CraftSpider
+"""
+
+from spidertools.common.data import Row, MultiRow
+import spidertools.common as common
+
+import re
+import pathlib
+import sqlite3
+import logging
+import functools
+import discord_talos.talossql as sql
+
+# Pattern of the MySQL `VALUES(column)` reference used in upserts
+_values_pattern = re.compile(r"VALUES\((\w+)\)")
+# Pattern of the MySQL random function
+_rand_pattern = re.compile(r"\bRAND\(\)", re.IGNORECASE)
+# Pattern of the MySQL scalar min and max functions
+_extreme_pattern = re.compile(r"\b(GREATEST|LEAST)\(", re.IGNORECASE)
+# Pattern of a schema trigger that fills in a column before insert
+_trigger_pattern = re.compile(r"^SET NEW\.(\w+) = (.+);$", re.IGNORECASE)
+# Pattern of a text column type, compared without case as MySQL's default collation does
+_text_pattern = re.compile(r"^(var)?char\b|^(tiny|medium|long)?text$", re.IGNORECASE)
+
+# Maximum number of translated queries kept in memory
+TRANSLATION_CACHE_SIZE = 256
+
+log = logging.getLogger("talos.sqlite")
+
+
+@functools.lru_cache(maxsize=TRANSLATION_CACHE_SIZE)
+def translate_query(query):
+    """
+        Translate a query written for MySQL into SQLite. Covers what Talos uses, %s placeholders, ON DUPLICATE KEY
+        upserts, RAND(), GREATEST() and LEAST()
+    :param query: MySQL query text
+    :return: SQLite query text
+    """
+    query = query.replace("%s", "?")
+    head, sep, tail = query.partition(" ON DUPLICATE KEY UPDATE ")
+    if sep:
+        query = head + " ON CONFLICT DO UPDATE SET " + _values_pattern.sub(r"excluded.\1", tail)
+    query = _extreme_pattern.sub(lambda match: "MAX(" if match.group(1).upper() == "GREATEST" else "MIN(", query)
+    return _rand_pattern.sub("RANDOM()", query)
+
+
+def _literal(value):
+    """
+        Format a schema default as an SQL literal
+    :param value: Default value from the schema
+    :return: SQL literal text
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class SqliteAccessor:
+    """
+        Holds the SQLite connection and the cursor of the last query, laid out like the GenericDatabase accessors
+    """
+
+    __slots__ = ("_connection", "_cursor")
+
+    def __init__(self, path):
+        """
+            Open a database file, switching it to WAL mode. The connection keeps as many compiled statements as
+            TalosDatabase keeps generated ones, so cached lookups are only prepared once
+        :param path: Path of the database file
+        """
+        self._connection = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None,
+                                           cached_statements=sql.STATEMENT_CACHE_SIZE)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._cursor = self._connection.cursor()
+
+    def execute(self, query, args):
+        """
+            Run a query on the connection
+        :param query: SQLite query text
+        :param args: Values for the placeholders
+        """
+        self._cursor.execute(query, args)
+
+    def close(self):
+        """
+            Close the connection
+        """
+        self._connection.close()
+
+
+class SqliteDatabase(common.GenericDatabase):
+    """
+        GenericDatabase that stores its tables in a local SQLite file. Queries written for MySQL are translated as
+        they're run, and the tables are created from the same schema definition.
+    """
+
+    def __init__(self, path, schemadef):
+        """
+            Open the database file, creating it if it doesn't exist
+        :param path: Path of the database file
+        :param schemadef: Schema definition, as loaded from schema.json
+        """
+        self._path = pathlib.Path(path)
+        self._schema = "main"
+        self._schemadef = schemadef
+        self._accessor = None
+        self._connect()
+
+    def _connect(self):
+        """
+            Open a new connection to the database file, closing the old one
+        """
+        if self._accessor is not None:
+            self._accessor.close()
+        self._accessor = SqliteAccessor(self._path)
+
+    def reset_connection(self):
+        """
+            Reopen the connection to the database file
+        """
+        self._connect()
+
+    def is_connected(self):
+        """
+            Check whether the database is open
+        :return: Whether there is an open connection
+        """
+        return self._accessor is not None
+
+    def execute(self, query, args=()):
+        """
+            Run a query, translating it from MySQL first
+        :param query: Query text
+        :param args: Values for the %s placeholders
+        """
+        self._accessor.execute(translate_query(query), list(args or ()))
+
+    def commit(self):
+        """
+            Commit the current transaction. Queries run in autocommit mode, so this only matters after an explicit
+            BEGIN
+        :return: Whether there was a connection to commit
+        """
+        if self._accessor is None:
+            return False
+        if self._accessor._connection.in_transaction:
+            self._accessor._connection.commit()
+        return True
+
+    def raw_exec(self, statement):
+        """
+            Run a statement as written and return its results
+        :param statement: SQL statement
+        :return: List of result rows
+        """
+        self._accessor.execute(statement, [])
+        return self._accessor._cursor.fetchall()
+
+    def verify_schema(self):
+        """
+            Create any missing tables, columns, default rows and triggers from the schema definition, and drop columns
+            the schema no longer has. Columns filled in by an insert trigger can't be NOT NULL, as SQLite triggers run
+            after the constraint is checked. Text columns are NOCASE, so keys such as command names match without
+            case like they do on MySQL
+        :return: Dict of the number of tables created, and columns added and removed
+        """
+        results = {"tables": 0, "columns_add": 0, "columns_remove": 0}
+        tables = self._schemadef["tables"]
+        existing_tables = {row[0] for row in self.raw_exec(f"SELECT name FROM {self._schema}.sqlite_master "
+                                                           f"WHERE type = 'table'")}
+        filled = {}
+        triggers = []
+        for name, trigger in self._schemadef.get("triggers", {}).items():
+            match = _trigger_pattern.match(trigger["text"].strip())
+            if trigger["cause"].lower() != "before insert" or match is None:
+                log.warning(f"Trigger {name} can't be translated to SQLite, skipping it")
+                continue
+            column, expression = match.groups()
+            filled.setdefault(trigger["table"], set()).add(column)
+            triggers.append(
+                f"CREATE TRIGGER IF NOT EXISTS {self._schema}.{name} AFTER INSERT ON {trigger['table']} "
+                f"FOR EACH ROW WHEN NEW.{column} IS NULL BEGIN "
+                f"UPDATE {trigger['table']} SET {column} = {expression} WHERE rowid = NEW.rowid; END"
+            )
+
+        for name, table in tables.items():
+            definitions = []
+            for column in table["columns"]:
+                definition = f"{column['name']} {self._column_type(column)}"
+                if column.get("not_null") and column["name"] not in filled.get(name, ()):
+                    definition += " NOT NULL"
+                if "default" in column:
+                    definition += f" DEFAULT {_literal(column['default'])}"
+                definitions.append(definition)
+            if table.get("primary"):
+                definitions.append(f"PRIMARY KEY ({', '.join(table['primary'])})")
+            for foreign in table.get("foreign", ()):
+                definitions.append(f"FOREIGN KEY ({foreign['local_name']}) REFERENCES {foreign['remote_table']} "
+                                   f"({foreign['local_name']}) ON DELETE {foreign.get('on_delete', 'no action')}")
+            if name not in existing_tables:
+                self.raw_exec(f"CREATE TABLE {self._schema}.{name} ({', '.join(definitions)})")
+                results["tables"] += 1
+
+            existing = [row[1] for row in self.raw_exec(f"PRAGMA {self._schema}.table_info({name})")]
+            wanted = self._columns(name)
+            for column in table["columns"]:
+                if column["name"] not in existing:
+                    default = f" DEFAULT {_literal(column['default'])}" if "default" in column else ""
+                    self.raw_exec(f"ALTER TABLE {self._schema}.{name} ADD COLUMN "
+                                  f"{column['name']} {self._column_type(column)}{default}")
+                    results["columns_add"] += 1
+            for column in existing:
+                if column not in wanted:
+                    self.raw_exec(f"ALTER TABLE {self._schema}.{name} DROP COLUMN {column}")
+                    results["columns_remove"] += 1
+
+            for row in table.get("defaults", ()):
+                self.execute(f"INSERT OR IGNORE INTO {self._schema}.{name} VALUES ({', '.join(['%s'] * len(row))})",
+                             row)
+
+        for trigger in triggers:
+            self.raw_exec(trigger)
+        return results
+
+    @staticmethod
+    def _column_type(column):
+        """
+            Get the SQLite type of a schema column, with a case-insensitive collation for text
+        :param column: Column definition from the schema
+        :return: Type and collation of the column
+        """
+        if _text_pattern.match(column["type"]):
+            return f"{column['type']} COLLATE NOCASE"
+        return column["type"]
+
+    def _columns(self, table):
+        """
+            Get the column names of a table, in order
+        :param table: Name of the table
+        :return: List of column names
+        """
+        return [column["name"] for column in self._schemadef["tables"][table]["columns"]]
+
+    @staticmethod
+    def _where(filters):
+        """
+            Build a WHERE clause matching column values. None matches NULL
+        :param filters: Dict of column name to value
+        :return: Tuple of the clause, empty if there are no filters, and its values
+        """
+        if not filters:
+            return "", []
+        conditions = []
+        values = []
+        for column, value in filters.items():
+            if value is None:
+                conditions.append(f"{column} IS NULL")
+            else:
+                conditions.append(f"{column} = %s")
+                values.append(value)
+        return " WHERE " + " AND ".join(conditions), values
+
+    def get_items(self, cls, limit=None, order=None, **filters):
+        """
+            Get a list of Rows from a table
+        :param cls: Row class of the table
+        :param limit: Number of rows, or a tuple of offset and number of rows
+        :param order: ORDER BY expression
+        :param filters: Column values the rows must have
+        :return: List of Rows
+        """
+        where, values = self._where(filters)
+        query = f"SELECT * FROM {self._schema}.{cls.TABLE_NAME}{where}"
+        if order is not None:
+            query += f" ORDER BY {order}"
+        if limit is not None:
+            limit = (limit,) if isinstance(limit, int) else tuple(limit)
+            query += " LIMIT " + ", ".join(["%s"] * len(limit))
+            values.extend(limit)
+        self.execute(query, values)
+        return [cls(row) for row in self._accessor._cursor.fetchall()]
+
+    def get_item(self, cls, default=None, order=None, **filters):
+        """
+            Get a single Row from a table
+        :param cls: Row class of the table
+        :param default: Value to return if no row matches
+        :param order: ORDER BY expression
+        :param filters: Column values the row must have
+        :return: Row or default
+        """
+        rows = self.get_items(cls, limit=1, order=order, **filters)
+        return rows[0] if rows else default
+
+    def get_count(self, cls, **filters):
+        """
+            Count the rows of a table matching some filters
+        :param cls: Row class of the table
+        :param filters: Column values the rows must have
+        :return: Number of matching rows
+        """
+        where, values = self._where(filters)
+        self.execute(f"SELECT COUNT(*) FROM {self._schema}.{cls.TABLE_NAME}{where}", values)
+        return self._accessor._cursor.fetchone()[0]
+
+    def save_item(self, item):
+        """
+            Insert a Row, or update the row with the same primary key. A MultiRow saves every Row it holds, and
+            removes the Rows it had removed
+        :param item: Row or MultiRow to save
+        """
+        if isinstance(item, MultiRow):
+            for name in item.__slots__:
+                value = getattr(item, name)
+                rows = value if isinstance(value, (list, tuple)) else [value]
+                for row in rows:
+                    if isinstance(row, Row):
+                        self.save_item(row)
+            for row in item.removed_items():
+                self.remove_item(row)
+            return
+
+        table = item.TABLE_NAME
+        columns = self._columns(table)
+        primary = self._schemadef["tables"][table].get("primary", [])
+        query = f"INSERT INTO {self._schema}.{table} ({', '.join(columns)}) " \
+                f"VALUES ({', '.join(['%s'] * len(columns))})"
+        updates = [f"{column} = excluded.{column}" for column in columns if column not in primary]
+        if primary and updates:
+            query += f" ON CONFLICT ({', '.join(primary)}) DO UPDATE SET {', '.join(updates)}"
+        elif primary:
+            query += " ON CONFLICT DO NOTHING"
+        self.execute(query, [sql.to_sql_value(value) for value in item.to_row()])
+
+    def remove_item(self, item, general=False):
+        """
+            Delete a Row by its primary key. A MultiRow removes every Row it holds
+        :param item: Row or MultiRow to remove
+        :param general: Whether to remove all rows matching the non-null values of the item instead
+        """
+        if isinstance(item, MultiRow):
+            for name in item.__slots__:
+                value = getattr(item, name)
+                rows = value if isinstance(value, (list, tuple)) else [value]
+                for row in rows:
+                    if isinstance(row, Row):
+                        self.remove_item(row, general)
+            return
+
+        table = item.TABLE_NAME
+        values = dict(zip(self._columns(table), map(sql.to_sql_value, item.to_row())))
+        if general:
+            filters = {column: value for column, value in values.items() if value is not None}
+        else:
+            primary = self._schemadef["tables"][table].get("primary") or list(values)
+            filters = {column: values[column] for column in primary}
+        self._delete(table, filters)
+
+    def remove_items(self, cls, **filters):
+        """
+            Delete all rows of a table matching some filters
+        :param cls: Row class of the table
+        :param filters: Column values the rows must have
+        """
+        self._delete(cls.TABLE_NAME, filters)
+
+    def _delete(self, table, filters):
+        """
+            Delete the rows of a table matching some filters
+        :param table: Name of the table
+        :param filters: Dict of column name to value the rows must have
+        """
+        where, values = self._where(filters)
+        self.execute(f"DELETE FROM {self._schema}.{table}{where}", values)
+
+    def close(self):
+        """
+            Close the connection to the database file
+        """
+        if self._accessor is not None:
+            self._accessor.close()
+            self._accessor = None
+
+
+class SqliteTalosDatabase(sql.TalosDatabase, SqliteDatabase):
+    """
+        TalosDatabase stored in a local SQLite file. Everything TalosDatabase adds on top of GenericDatabase, caches,
+        buffered invocations and the journal, works the same as with MySQL.
+    """
+
+    def _has_table(self, table):
+        """
+            Check whether a table exists in the database file
+        :param table: Name of the table
+        :return: Whether the table exists
+        """
+        self.execute(f"SELECT COUNT(*) FROM {self._schema}.sqlite_master WHERE type = 'table' AND name = %s", [table])
+        return self._accessor._cursor.fetchone()[0] > 0
+
+    def _get_indexes(self, table):
+        """
+            Get the schema managed indexes currently on a table
+        :param table: Name of the table
+        :return: Dict of index name to tuple of column names
+        """
+        names = self.raw_exec(f"SELECT name FROM {self._schema}.sqlite_master "
+                              f"WHERE type = 'index' AND tbl_name = '{table}'")
+        return {
+            name: tuple(row[2] for row in sorted(self.raw_exec(f"PRAGMA {self._schema}.index_info({name})")))
+            for name, in names if name.startswith(sql.INDEX_PREFIX)
+        }
+
+    def _create_index(self, table, name, columns):
+        """
+            Create an index on a table
+        :param table: Name of the table
+        :param name: Name of the index
+        :param columns: Sequence of column names to index
+        """
+        self.raw_exec(f"CREATE INDEX {self._schema}.{name} ON {table} ({', '.join(columns)})")
+
+    def _drop_index(self, table, name):
+        """
+            Drop an index from a table
+        :param table: Name of the table
+        :param name: Name of the index
+        """
+        self.raw_exec(f"DROP INDEX {self._schema}.{name}")
+
+    def _connection_args(self):
+        """
+            Get the arguments to open another connection to the same database file with
+        :return: Tuple of arguments for the constructor
+        """
+        return self._path, self._schemadef
@@ -0,0 +1,185 @@
+"""
+    Admission control for Talos. Limits how many copies of an expensive command run at once, and queues the rest
+    fairly, so a burst of requests can't saturate the CPU or the outbound connections.
+
+    Author: CraftSpider
+"""
+
+import asyncio
+import collections
+import discord.ext.commands as commands
+
+
+class AdmissionRefused(commands.CommandError):
+    """
+        Raised when a command can't run or be queued, because its queue is full or the user already has a request in
+        it. The message is safe to show to the user.
+    """
+
+
+class AdmissionQueue:
+    """
+        Concurrency limit with a bounded wait queue. Waiting requests are grouped by guild, and guilds take turns
+        getting a slot, so one busy guild can't starve the others. Each user can only have a few requests running or
+        waiting at once.
+    """
+
+    __slots__ = ("limit", "max_waiting", "max_per_user", "max_per_guild", "active", "_users", "_waiters")
+
+    def __init__(self, limit, max_waiting=10, max_per_user=1, max_per_guild=None):
+        """
+            Initialize an empty queue
+        :param limit: Number of requests that can run at once
+        :param max_waiting: Number of requests that can wait for a slot across all guilds
+        :param max_per_user: Number of requests a user can have running or waiting at once
+        :param max_per_guild: Number of requests that can wait from one guild, or None for no limit besides
+                              max_waiting
+        """
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.max_per_user = max_per_user
+        self.max_per_guild = max_per_guild
+        self.active = 0
+        self._users = collections.Counter()
+        self._waiters = collections.OrderedDict()
+
+    @property
+    def waiting(self):
+        """
+            Get the number of requests waiting for a slot
+        :return: Number of waiting requests
+        """
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def position(self, key, index):
+        """
+            Get the place in line of a waiting request. Guilds take turns in the order they're queued, so a request
+            is behind one request from each guild for every request ahead of it in its own guild
+        :param key: Fairness key the request is waiting under
+        :param index: Index of the request among the requests waiting under its key
+        :return: Position in line, starting at 1 for the next request to run
+        """
+        ahead = index
+        before = True
+        for other, waiters in self._waiters.items():
+            if other == key:
+                before = False
+            else:
+                ahead += min(len(waiters), index + 1 if before else index)
+        return ahead + 1
+
+    async def acquire(self, user_id, key, notify=None):
+        """
+            Wait for a slot to run in. Every successful acquire must be paired with a release
+        :param user_id: id of the user making the request
+        :param key: Fairness key of the request, usually the guild it was made in
+        :param notify: Coroutine function called with the position in line if the request has to wait
+        """
+        if self._users[user_id] >= self.max_per_user:
+            raise AdmissionRefused("You already have a request for this command running or waiting, please wait for "
+                                   "it to finish")
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._users[user_id] += 1
+            return
+        if self.waiting >= self.max_waiting:
+            raise AdmissionRefused("Too many requests are waiting for this command, please try again later")
+        waiters = self._waiters.get(key, ())
+        if self.max_per_guild is not None and len(waiters) >= self.max_per_guild:
+            raise AdmissionRefused("Too many requests from here are waiting for this command, please try again later")
+
+        future = asyncio.get_running_loop().create_future()
+        waiters = self._waiters.setdefault(key, collections.deque())
+        waiters.append(future)
+        self._users[user_id] += 1
+        try:
+            if notify is not None:
+                await notify(self.position(key, len(waiters) - 1))
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # The slot was handed over after we stopped waiting, pass it on
+                self.release(user_id)
+            else:
+                future.cancel()
+                self._remove(key, future)
+                self._forget(user_id)
+            raise
+
+    def release(self, user_id):
+        """
+            Give up a slot, handing it straight to the next waiting request if there is one
+        :param user_id: id of the user whose request finished
+        """
+        self._forget(user_id)
+        while self._waiters:
+            key, waiters = next(iter(self._waiters.items()))
+            future = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(key)
+            else:
+                del self._waiters[key]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def _remove(self, key, future):
+        """
+            Take a request out of line without giving it a slot
+        :param key: Fairness key the request is waiting under
+        :param future: Future of the request
+        """
+        waiters = self._waiters.get(key)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(future)
+        except ValueError:
+            pass
+        if not waiters:
+            del self._waiters[key]
+
+    def _forget(self, user_id):
+        """
+            Drop one request from the count for a user
+        :param user_id: id of the user
+        """
+        self._users[user_id] -= 1
+        if self._users[user_id] <= 0:
+            del self._users[user_id]
+
+
+def admission(queue):
+    """
+        Decorator to put a command behind an admission queue. Several commands can share one queue, to share a limit
+    :param queue: AdmissionQueue to put the command behind
+    :return: Decorator for a command or command callback
+    """
+    def decorator(func):
+        if isinstance(func, commands.Command):
+            func.callback.__talos_admission__ = queue
+        else:
+            func.__talos_admission__ = queue
+        return func
+    return decorator
+
+
+def get_queue(command):
+    """
+        Get the admission queue of a command
+    :param command: Command to get the queue of
+    :return: AdmissionQueue or None if the command isn't limited
+    """
+    return getattr(command.callback, "__talos_admission__", None)
+
+
+def fairness_key(ctx):
+    """
+        Get the key requests from a context take turns under. Each guild gets a turn, and each DM user gets their own
+    :param ctx: Context of the command
+    :return: Hashable fairness key
+    """
+    if ctx.guild is None:
+        return "user", ctx.author.id
+    return "guild", ctx.guild.id
@@ -5,21 +5,72 @@ import os
 import pathlib
 import importlib
 import builtins
+import subprocess
 
 
 name_folder = {
     "discord": "discord_talos",
+    "cluster": "discord_talos.cluster",
     "server": "website",
     "twitch": "twitch_talos"
 }
 
+# Bot class of each program that loads extensions on startup, as (module, class name)
+name_bot = {
+    "discord": ("discord_talos.talos", "Talos")
+}
+
+# Number of modules to show in the import time report
+IMPORT_REPORT_SIZE = 30
+
+
+def import_times(module, bot=None):
+    # Import the module in a fresh interpreter, so nothing is already cached, and parse its -X importtime output.
+    # The bot's startup extensions are imported after it, as they're loaded before the bot connects. They go through
+    # __import__, as importlib.import_module skips the import time report
+    code = f"import {module}"
+    if bot is not None:
+        bot_module, bot_class = bot
+        code += f"\nimport {bot_module}\nbot = {bot_module}.{bot_class}\n" \
+                f"for name in bot.startup_extensions:\n    __import__(f'{{bot.extension_dir}}.{{name}}')"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        try:
+            times.append((name.strip(), int(own), int(cumulative)))
+        except ValueError:  # The header line
+            continue
+    times.sort(key=lambda x: x[2], reverse=True)
+    return result.returncode, times
+
+
+def report_import_times(module, bot=None):
+    code, times = import_times(module, bot)
+    if code != 0:
+        print(f"Importing {module} failed, times are for the modules imported before the error")
+    if not times:
+        return 1
+    print(f"{'Module':<50} {'Self (ms)':>10} {'Total (ms)':>11}")
+    for name, own, cumulative in times[:IMPORT_REPORT_SIZE]:
+        print(f"{name:<50} {own / 1000:>10.1f} {cumulative / 1000:>11.1f}")
+    return code
+
 
 def main():
     loc = pathlib.Path(sys.argv[0]).parent
     args = sys.argv[1:]
 
+    import_report = len(args) > 0 and args[0] == "--import-time"
+    if import_report:
+        del sys.argv[1]
+        args = args[1:]
+
     if len(args) == 0:
-        print("Usage: runner.py <talos program> [program flags...]")
+        print("Usage: runner.py [--import-time] <talos program> [program flags...]")
         return 0
     item = args[0]
     if item not in name_folder:
@@ -35,6 +86,8 @@ def main():
 
     # Load and execute desired program
     module = name_folder[item]
+    if import_report:
+        return report_import_times(module, name_bot.get(item))
     talos = importlib.import_module(module)
     return talos.main()
 
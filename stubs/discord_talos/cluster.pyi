@@ -0,0 +1,40 @@
+"""
+    Stub file for the Talos cluster launcher
+
+    author: CraftSpider
+"""
+from typing import List, Optional
+import logging
+import subprocess
+import types
+
+RESTART_DELAY: int = ...
+POLL_INTERVAL: int = ...
+
+log: logging.Logger = ...
+
+def _interrupt(signum: int, frame: Optional[types.FrameType]) -> None: ...
+
+def shard_ranges(shard_count: int, processes: int) -> List[List[int]]: ...
+
+class ClusterProcess:
+
+    __slots__ = ("cluster_id", "shard_ids", "shard_count", "process", "restart_at")
+
+    cluster_id: int
+    shard_ids: List[int]
+    shard_count: int
+    process: Optional[subprocess.Popen]
+    restart_at: Optional[float]
+
+    def __init__(self, cluster_id: int, shard_ids: List[int], shard_count: int) -> None: ...
+
+    def args(self) -> List[str]: ...
+
+    def start(self) -> None: ...
+
+    def poll(self) -> None: ...
+
+    def stop(self) -> None: ...
+
+def main() -> int: ...
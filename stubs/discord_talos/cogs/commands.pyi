@@ -10,9 +10,11 @@ import discord.ext.commands as commands
 import datetime as dt
 import spidertools.common as utils
 import spidertools.discord as dutils
+import discord_talos.throttle as throttle
 from discord_talos.talos import Talos
 
 active_pw: Dict[int, utils.PW] = ...
+nano_queue: throttle.AdmissionQueue = ...
 log: logging.Logger = ...
 
 def sort_mem(member: utils.PWMember) -> dt.timedelta: ...
@@ -46,7 +48,7 @@ class Commands(dutils.TalosCog):
 
     def get_uptime_days(self) -> str: ...
 
-    def get_uptime_percent(self) -> Tuple[float, float, float]: ...
+    async def get_uptime_percent(self) -> Tuple[float, float, float]: ...
 
     async def information(self, ctx: commands.Context) -> None: ...
 
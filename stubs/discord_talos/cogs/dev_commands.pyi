@@ -4,7 +4,7 @@
     author: CraftSpider
 """
 
-from typing import Dict
+from typing import Dict, Optional
 from discord_talos.talos import Talos
 import logging
 import spidertools.discord as dutils
@@ -37,6 +37,13 @@ class DevCommands(dutils.TalosCog):
 
     async def verifysql(self, ctx: commands.Context) -> None: ...
 
+    @commands.group()
+    async def stats(self, ctx: commands.Context) -> None: ...
+
+    async def _s_cache(self, ctx: commands.Context) -> None: ...
+
+    async def _s_latency(self, ctx: commands.Context, command: Optional[str] = ...) -> None: ...
+
     async def grant_title(self, ctx: commands.Context, user: discord.User, *, title: str) -> None: ...
 
     async def revoke_title(self, ctx: commands.Context, user: discord.User, *, title: str) -> None: ...
@@ -8,6 +8,7 @@ from typing import List, Dict, Union, Tuple, Any
 from discord_talos.talos import Talos
 import spidertools.command_lang as command_lang
 import spidertools.discord as dutils
+import discord
 import logging
 import argparse
 import googleapiclient.discovery
@@ -17,6 +18,7 @@ import datetime as dt
 SCOPES: str = ...
 CLIENT_SECRET_FILE: str = ...
 APPLICATION_NAME: str = ...
+CACHE_CHANGE_AGE: int = ...
 log: logging.Logger = ...
 runner: command_lang.CommandLang()
 
@@ -44,6 +46,8 @@ class EventLoops(dutils.TalosCog):
 
     def set_spreadsheet(self, sheet_id: str, values: List[List[str]], sheet_range: str = ...) -> Dict[str, Union[str, int]]: ...
 
+    async def get_prompt_channels(self) -> List[discord.TextChannel]: ...
+
     async def minute_task(self) -> None: ...
 
     async def hourly_task(self) -> None: ...
@@ -52,6 +56,14 @@ class EventLoops(dutils.TalosCog):
 
     async def uptime_task(self) -> None: ...
 
+    async def invocation_task(self) -> None: ...
+
+    async def cache_task(self) -> None: ...
+
+    async def pool_task(self) -> None: ...
+
+    async def metrics_task(self) -> None: ...
+
     async def prompt_task(self) -> None: ...
 
 def setup(bot: Talos) -> None: ...
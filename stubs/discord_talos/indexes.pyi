@@ -0,0 +1,52 @@
+"""
+    Stub file for Talos in-memory indexes
+
+    author: CraftSpider
+"""
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+import discord
+import discord_talos.talossql as sql
+
+class PrefixIndex:
+
+    __slots__ = ("guild_default", "user_default", "_guilds", "_users", "_patterns")
+
+    guild_default: str
+    user_default: str
+    _guilds: Dict[int, str]
+    _users: Dict[int, str]
+    _patterns: Dict[Tuple[str, str], Pattern]
+
+    def __init__(self, default: str) -> None: ...
+
+    def load(self, guild_options: Iterable[sql.GuildOptions], user_options: Iterable[sql.UserOptions]) -> None: ...
+
+    def set_guild(self, guild_id: int, prefix: Optional[str]) -> None: ...
+
+    def set_user(self, user_id: int, prefix: Optional[str]) -> None: ...
+
+    def get(self, message: discord.Message) -> str: ...
+
+    def matches(self, message: discord.Message, mention: str) -> bool: ...
+
+class ChannelIndex:
+
+    __slots__ = ("_guilds",)
+
+    _guilds: Dict[int, Dict[str, List[discord.abc.GuildChannel]]]
+
+    def __init__(self) -> None: ...
+
+    def _get_guild(self, guild: discord.Guild) -> Dict[str, List[discord.abc.GuildChannel]]: ...
+
+    def get(self, guild: discord.Guild, name: str) -> Optional[discord.abc.GuildChannel]: ...
+
+    def get_all(self, guild: discord.Guild, name: str) -> Tuple[discord.abc.GuildChannel, ...]: ...
+
+    def add(self, channel: discord.abc.GuildChannel) -> None: ...
+
+    def remove(self, channel: discord.abc.GuildChannel) -> None: ...
+
+    def update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None: ...
+
+    def remove_guild(self, guild_id: int) -> None: ...
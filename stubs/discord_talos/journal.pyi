@@ -0,0 +1,40 @@
+"""
+    Stub file for the Talos write-behind journal
+
+    author: CraftSpider
+"""
+from typing import Any, Iterator, List, Optional, TextIO, Tuple
+import logging
+import pathlib
+import threading
+
+SEGMENT_SUFFIX: str = ...
+
+log: logging.Logger = ...
+
+class Journal:
+
+    __slots__ = ("folder", "lock", "_segment", "_file", "_sealed")
+
+    folder: pathlib.Path
+    lock: threading.Lock
+    _segment: int
+    _file: Optional[TextIO]
+    _sealed: List[pathlib.Path]
+
+    def __init__(self, folder: pathlib.Path) -> None: ...
+
+    @staticmethod
+    def _segment_number(path: pathlib.Path) -> int: ...
+
+    def _segment_path(self, number: int) -> pathlib.Path: ...
+
+    def append(self, op: str, *args: Any) -> None: ...
+
+    def seal(self) -> int: ...
+
+    def discard(self, mark: int) -> None: ...
+
+    def replay(self) -> Iterator[Tuple[str, List[Any]]]: ...
+
+    def close(self) -> None: ...
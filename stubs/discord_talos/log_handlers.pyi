@@ -0,0 +1,36 @@
+"""
+    Stub file for Talos logging handlers
+
+    author: CraftSpider
+"""
+from typing import Iterable, List, Optional
+import asyncio
+import logging
+import logging.handlers
+import threading
+
+class BatchingHandler(logging.handlers.MemoryHandler):
+
+    interval: float
+    combine: bool
+    loop: Optional[asyncio.AbstractEventLoop]
+    _timer: Optional[threading.Timer]
+
+    def __init__(self, target: logging.Handler, capacity: int = ..., interval: float = ..., combine: bool = ...,
+                 loop: Optional[asyncio.AbstractEventLoop] = ..., flushLevel: int = ...) -> None: ...
+
+    def emit(self, record: logging.LogRecord) -> None: ...
+
+    def flush(self) -> None: ...
+
+    def _on_loop(self) -> bool: ...
+
+    def combine_records(self, records: List[logging.LogRecord]) -> logging.LogRecord: ...
+
+    @staticmethod
+    def _send(target: logging.Handler, records: List[logging.LogRecord]) -> None: ...
+
+    def close(self) -> None: ...
+
+def start_queue_logging(loggers: Iterable[logging.Logger], handlers: Iterable[Optional[logging.Handler]],
+                        level: int = ...) -> logging.handlers.QueueListener: ...
@@ -0,0 +1,79 @@
+"""
+    Stub file for Talos outbound message queueing
+
+    author: CraftSpider
+"""
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import discord
+import discord.abc
+
+MESSAGE_LIMIT: int = ...
+RATE_LIMIT: int = ...
+RATE_PERIOD: float = ...
+MAX_RETRIES: int = ...
+
+log: logging.Logger = ...
+
+class _Send:
+
+    __slots__ = ("content", "kwargs", "merge_key", "future")
+
+    content: Optional[Any]
+    kwargs: Dict[str, Any]
+    merge_key: Optional[Hashable]
+    future: asyncio.Future
+
+    def __init__(self, content: Optional[Any], kwargs: Dict[str, Any], merge_key: Optional[Hashable],
+                 future: asyncio.Future) -> None: ...
+
+    @property
+    def mergeable(self) -> bool: ...
+
+class ChannelSender:
+
+    __slots__ = ("channel", "rate_limit", "rate_period", "on_idle", "_pending", "_sent", "_wakeup", "_task")
+
+    channel: discord.abc.Messageable
+    rate_limit: Optional[int]
+    rate_period: float
+    on_idle: Optional[Callable[[ChannelSender], Any]]
+    _pending: Deque[_Send]
+    _sent: Deque[float]
+    _wakeup: asyncio.Event
+    _task: Optional[asyncio.Task]
+
+    def __init__(self, channel: discord.abc.Messageable, rate_limit: Optional[int] = ..., rate_period: float = ...,
+                 on_idle: Optional[Callable[[ChannelSender], Any]] = ...) -> None: ...
+
+    def submit(self, content: Optional[Any] = ..., merge_key: Optional[Hashable] = ...,
+               **kwargs: Any) -> asyncio.Future: ...
+
+    def _take(self) -> Tuple[Optional[Any], Dict[str, Any], List[_Send]]: ...
+
+    async def _pace(self) -> None: ...
+
+    async def _deliver(self, content: Optional[Any], kwargs: Dict[str, Any]) -> discord.Message: ...
+
+    async def _run(self) -> None: ...
+
+class Outbound:
+
+    __slots__ = ("rate_limit", "rate_period", "_senders")
+
+    rate_limit: Optional[int]
+    rate_period: float
+    _senders: Dict[int, ChannelSender]
+
+    def __init__(self, rate_limit: Optional[int] = ..., rate_period: float = ...) -> None: ...
+
+    def _get_sender(self, channel: discord.abc.Messageable) -> ChannelSender: ...
+
+    def _remove(self, sender: ChannelSender) -> None: ...
+
+    async def send(self, channel: discord.abc.Messageable, content: Optional[Any] = ...,
+                   merge_key: Optional[Hashable] = ..., **kwargs: Any) -> discord.Message: ...
+
+    async def send_all(self, channel: discord.abc.Messageable,
+                       messages: Iterable[Dict[str, Any]]) -> List[discord.Message]: ...
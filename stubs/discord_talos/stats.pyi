@@ -0,0 +1,77 @@
+"""
+    Stub file for Talos runtime statistics
+
+    author: CraftSpider
+"""
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Optional, Tuple, Union
+import pathlib
+import contextvars
+from discord_talos.talos import Talos
+
+BUCKET_START: float = ...
+BUCKET_FACTOR: float = ...
+BUCKET_COUNT: int = ...
+METRICS_FOLDER: pathlib.Path = ...
+METRICS_QUANTILES: Tuple[float, ...] = ...
+
+class Histogram:
+
+    __slots__ = ("count", "total", "buckets")
+
+    BOUNDS: Tuple[float, ...] = ...
+
+    count: int
+    total: float
+    buckets: List[int]
+
+    def __init__(self) -> None: ...
+
+    def record(self, value: float) -> None: ...
+
+    def mean(self) -> float: ...
+
+    def percentile(self, percent: float) -> float: ...
+
+class LatencyTracker:
+
+    __slots__ = ("stages", "commands")
+
+    current_command: contextvars.ContextVar[Optional[str]] = ...
+
+    stages: Dict[str, Histogram]
+    commands: Dict[str, Dict[str, Histogram]]
+
+    def __init__(self) -> None: ...
+
+    def record(self, stage: str, value: float, command: Optional[str] = ...) -> None: ...
+
+    def timer(self, stage: str, command: Optional[str] = ...) -> ContextManager[None]: ...
+
+    def get_stages(self, command: Optional[str] = ...) -> Dict[str, Histogram]: ...
+
+    def clear(self) -> None: ...
+
+class TimedProxy:
+
+    __slots__ = ("wrapped", "latencies", "stage", "_methods")
+
+    wrapped: Any
+    latencies: LatencyTracker
+    stage: str
+    _methods: Dict[str, Callable[..., Any]]
+
+    def __init__(self, wrapped: Any, latencies: LatencyTracker, stage: str) -> None: ...
+
+    def __getattr__(self, item: str) -> Any: ...
+
+def _format_labels(labels: Dict[str, Any]) -> str: ...
+
+def format_metric(name: str, kind: str, description: str, samples: Iterable[Tuple[str, Dict[str, Any], Union[int, float]]]) -> List[str]: ...
+
+def _summary_samples(histogram: Histogram, labels: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any], Union[int, float]]]: ...
+
+def render_metrics(bot: Talos) -> str: ...
+
+def metrics_path(cluster_id: Optional[int] = ...) -> pathlib.Path: ...
+
+def write_metrics(text: str, path: pathlib.Path) -> None: ...
@@ -3,8 +3,11 @@
 
     author: CraftSpider
 """
-from typing import List, Tuple, Union, Any, Dict, Pattern, TypeVar, Type
+from typing import List, Tuple, Union, Any, Dict, Iterable, Pattern, TypeVar, Type, Optional
 import logging
+import logging.handlers
+import argparse
+import pathlib
 import discord
 import discord.ext.commands as commands
 import datetime
@@ -12,14 +15,24 @@ import spidertools.common as utils
 import spidertools.command_lang as cl
 import spidertools.discord as dutils
 import discord_talos.talossql as sql
+import discord_talos.talossqlite as talossqlite
+import discord_talos.indexes as indexes
+import discord_talos.stats as stats
+import discord_talos.throttle as throttle
+import discord_talos.outbound as outbound
+import discord_talos.journal as journal
 
 _Ctx = TypeVar("_Ctx", bound=commands.Context)
 
 TOKEN_FILE: str = ...
+DATABASE_POOL_SIZE: int = ...
+JOURNAL_FOLDER: pathlib.Path = ...
+CLUSTER_REPORT_AGE: int = ...
 FILE_BASE: Dict[str, Any] = ...
 _mentions_transforms: Dict[str, str] = ...
 _mention_pattern: Pattern = ...
 _log_event_colors: Dict[str, discord.Colour] = ...
+_unloaded: object = ...
 log: logging.Logger = ...
 
 class FakeMessage:
@@ -32,6 +45,32 @@ class FakeMessage:
 
     def __init__(self, guild: discord.Guild, channel: discord.TextChannel) -> None: ...
 
+class TalosContext(commands.Context):
+
+    bot: Talos
+    _guild_options: Optional[sql.GuildOptions]
+    _user_options: Optional[sql.UserOptions]
+    stage_start: Optional[float]
+    admission: Optional[throttle.AdmissionQueue]
+
+    def __init__(self, **attrs: Any) -> None: ...
+
+    @property
+    def guild_options(self) -> Optional[sql.GuildOptions]: ...
+
+    @guild_options.setter
+    def guild_options(self, value: Optional[sql.GuildOptions]) -> None: ...
+
+    @property
+    def user_options(self) -> Optional[sql.UserOptions]: ...
+
+    @user_options.setter
+    def user_options(self, value: Optional[sql.UserOptions]) -> None: ...
+
+    async def send(self, content: Optional[Any] = ..., **kwargs: Any) -> discord.Message: ...
+
+    async def send_pages(self, pages: Iterable[discord.Embed]) -> List[discord.Message]: ...
+
 class Talos(dutils.ExtendedBot):
 
     VERSION: str = ...
@@ -42,13 +81,29 @@ class Talos(dutils.ExtendedBot):
     startup_extensions: Tuple[str, ...] = ...
     DEVS: Tuple[int, int, int] = ...
     database: sql.TalosDatabase
+    async_database: sql.AsyncTalosDatabase
+    latencies: stats.LatencyTracker
+    prefixes: indexes.PrefixIndex
+    channel_index: indexes.ChannelIndex
+    outbound: outbound.Outbound
     session: utils.TalosHTTPClient
+    cluster_id: Optional[int]
+    last_sync: Optional[int]
 
     # noinspection PyMissingConstructor
     def __init__(self, **kwargs: Any) -> None: ...
 
     def __setattr__(self, key: str, value: Any) -> None: ...
 
+    @property
+    def is_primary(self) -> bool: ...
+
+    async def report_guild_count(self) -> None: ...
+
+    async def fetch_guild_count(self) -> int: ...
+
+    async def sync_caches(self) -> None: ...
+
     def should_embed(self, ctx: commands.Context) -> bool: ...
 
     def get_timezone(self, ctx: commands.Context) -> datetime.timezone: ...
@@ -65,6 +120,12 @@ class Talos(dutils.ExtendedBot):
 
     async def process_commands(self, message: discord.Message) -> None: ...
 
+    async def invoke(self, ctx: commands.Context) -> None: ...
+
+    async def before_command(self, ctx: commands.Context) -> None: ...
+
+    async def after_command(self, ctx: commands.Context) -> None: ...
+
     async def mod_log(self, ctx: commands.Context, event: str, user: Union[discord.User, discord.Member], message: str) -> bool: ...
 
     async def on_ready(self) -> None: ...
@@ -73,22 +134,32 @@ class Talos(dutils.ExtendedBot):
 
     async def on_guild_remove(self, guild: discord.Guild) -> None: ...
 
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None: ...
+
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None: ...
+
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None: ...
+
     async def on_member_ban(self, guild: discord.Guild, user: discord.User) -> None: ...
 
     async def on_command(self, ctx: commands.Context) -> None: ...
 
     async def on_command_error(self, ctx: commands.Context, exception: commands.CommandError) -> None: ...
 
+class AutoShardedTalos(Talos, commands.AutoShardedBot): ...
+
 runner: cl.CommandLang = ...
 
 def custom_creator(name: str, text: str) -> commands.Command: ...
 
 def talos_prefix(bot: Talos, message: discord.Message) -> Union[List[str], str]: ...
 
-def configure_logging() -> None: ...
+def configure_logging() -> logging.handlers.QueueListener: ...
 
 def load_token_file(filename: str) -> Dict[str, Union[str, List[str]]]: ...
 
 def make_token_file(filename: str) -> None: ...
 
+def parse_args(args: Optional[List[str]] = ...) -> argparse.Namespace: ...
+
 def main() -> None: ...
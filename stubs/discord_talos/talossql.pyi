@@ -1,13 +1,35 @@
 
-from typing import List, Optional, Any, Tuple, Sequence, Union
+from typing import List, Iterable, Optional, Any, Tuple, Sequence, Union, Dict, Hashable, Callable, Awaitable, Type, TypeVar, Counter, Set
+from concurrent.futures import ThreadPoolExecutor
 from spidertools.common.data import Row, MultiRow
 import discord.ext.commands as commands
 import spidertools.common as common
 import spidertools.discord as dutils
 import datetime as dt
+import logging
+import threading
+import discord_talos.stats as stats
+import discord_talos.journal as journal
 
 
 SqlRow = Sequence[Union[str, int]]
+_T = TypeVar("_T")
+_F = TypeVar("_F", bound=Callable[..., Any])
+_O = TypeVar("_O", "GuildOptions", "UserOptions")
+
+OPTIONS_CACHE_SIZE: int = ...
+STATEMENT_CACHE_SIZE: int = ...
+POOL_PING_INTERVAL: float = ...
+POOL_IDLE_TIMEOUT: float = ...
+UPTIME_PERIOD: int = ...
+UPTIME_GAP: int = ...
+BULK_CHUNK_SIZE: int = ...
+COUNTER_COLUMNS: Dict[str, Tuple[str, ...]] = ...
+QUOTE_PICK_TRIES: int = ...
+INDEX_PREFIX: str = ...
+CACHE_SYNC_SLACK: int = ...
+
+log: logging.Logger = ...
 
 
 class TalosAdmin(Row):
@@ -161,8 +183,152 @@ class Quote(Row):
     quote: str
     TABLE_NAME: str = ...
 
+class ClusterGuilds(Row):
+
+    __slots__ = ("id", "guild_count", "updated_at")
+
+    id: int
+    guild_count: int
+    updated_at: int
+    TABLE_NAME: str = ...
+
+def synchronized(func: _F) -> _F: ...
+
+def to_sql_value(value: Any) -> Union[None, int, float, str, bytes]: ...
+
+class LRUCache:
+
+    __slots__ = ("maxsize", "hits", "misses", "version", "_data", "_lock")
+
+    maxsize: int
+    hits: int
+    misses: int
+    version: int
+    _data: Dict[Hashable, Any]
+    _lock: threading.Lock
+
+    def __init__(self, maxsize: int) -> None: ...
+
+    def __len__(self) -> int: ...
+
+    def __contains__(self, key: Hashable) -> bool: ...
+
+    def get(self, key: Hashable, default: Any = ...) -> Any: ...
+
+    def put(self, key: Hashable, value: Any, version: Optional[int] = ...) -> bool: ...
+
+    def update(self, key: Hashable, func: Callable[[Any], Any]) -> bool: ...
+
+    def invalidate(self, key: Hashable) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def hit_ratio(self) -> float: ...
+
+class QuoteIndex:
+
+    __slots__ = ("ids", "quotes", "lock")
+
+    ids: List[int]
+    quotes: Dict[int, Optional[Quote]]
+    lock: threading.Lock
+
+    def __init__(self, ids: Iterable[int]) -> None: ...
+
+    def __contains__(self, qid: int) -> bool: ...
+
+    def get(self, qid: int) -> Optional[Quote]: ...
+
+    def add(self, quote: Quote) -> None: ...
+
+    def discard(self, qid: int) -> None: ...
+
+    def choice(self) -> Optional[int]: ...
+
 class TalosDatabase(common.GenericDatabase):
 
+    lock: threading.RLock
+    caches: Dict[str, LRUCache]
+    defaults: Dict[str, Tuple[Any, ...]]
+    invocations: Counter[Tuple[int, str]]
+    invocation_lock: threading.Lock
+    flush_lock: threading.Lock
+    journal: Optional[journal.Journal]
+    record_changes: bool
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None: ...
+
+    def reset_connection(self) -> None: ...
+
+    def clear_caches(self) -> None: ...
+
+    def clone(self) -> TalosDatabase: ...
+
+    def _connection_args(self) -> Tuple[Any, ...]: ...
+
+    def ping(self) -> bool: ...
+
+    def save_item(self, item: Union[Row, MultiRow]) -> None: ...
+
+    def save_items(self, items: Iterable[Union[Row, MultiRow]]) -> None: ...
+
+    @staticmethod
+    def _expand_items(items: Iterable[Union[Row, MultiRow]]) -> Tuple[List[Row], List[Row]]: ...
+
+    @staticmethod
+    def _group_rows(rows: Iterable[Row]) -> Dict[Type[Row], List[Row]]: ...
+
+    def _remove_rows(self, rows: List[Row]) -> List[Optional[Tuple[str, int]]]: ...
+
+    def remove_item(self, item: Union[Row, MultiRow], general: bool = ...) -> None: ...
+
+    def get_item(self, *args: Any, **kwargs: Any) -> Optional[Row]: ...
+
+    def get_items(self, *args: Any, **kwargs: Any) -> List[Row]: ...
+
+    def _select(self, args: Tuple[Any, ...], kwargs: Dict[str, Any], single: bool) -> Optional[List[Row]]: ...
+
+    def get_count(self, *args: Any, **kwargs: Any) -> int: ...
+
+    def remove_items(self, *args: Any, **kwargs: Any) -> None: ...
+
+    def execute(self, *args: Any, **kwargs: Any) -> None: ...
+
+    def raw_exec(self, *args: Any, **kwargs: Any) -> Any: ...
+
+    def commit(self) -> bool: ...
+
+    def verify_schema(self) -> Dict[str, int]: ...
+
+    def _has_table(self, table: str) -> bool: ...
+
+    def _migrate_uptime(self) -> int: ...
+
+    def _get_indexes(self, table: str) -> Dict[str, Tuple[str, ...]]: ...
+
+    def _create_index(self, table: str, name: str, columns: Sequence[str]) -> None: ...
+
+    def _drop_index(self, table: str, name: str) -> None: ...
+
+    def _update_caches(self, item: Union[Row, MultiRow], removed: bool = ...) -> Optional[Tuple[str, int]]: ...
+
+    def _record_changes(self, changes: Iterable[Optional[Tuple[str, int]]]) -> None: ...
+
+    def sync_caches(self, since: int) -> List[Tuple[str, int]]: ...
+
+    def remove_cache_changes(self, end: int) -> None: ...
+
+    def _update_command_cache(self, command: GuildCommand, removed: bool) -> None: ...
+
+    def _update_quote_cache(self, quote: Quote, removed: bool) -> None: ...
+
+    @staticmethod
+    def _fill_defaults(options: _O, defaults: Tuple[Any, ...]) -> _O: ...
+
+    def _get_defaults(self, cls: Type[Union[GuildOptions, UserOptions]]) -> Tuple[Any, ...]: ...
+
+    def load_defaults(self) -> None: ...
+
     def clean_guild(self, guild_id: int) -> None: ...
 
     # Guild option methods
@@ -187,7 +353,15 @@ class TalosDatabase(common.GenericDatabase):
 
     def get_user(self, user_id: int) -> Optional[TalosUser]: ...
 
-    def user_invoked_command(self, user_id: int, command: str) -> None: ...
+    def record_invocation(self, user_id: int, command: str) -> None: ...
+
+    def replay_journal(self) -> int: ...
+
+    def flush_invocations(self) -> int: ...
+
+    def _flush_invocations(self) -> int: ...
+
+    def user_invoked_command(self, user: TalosUser, command: str) -> None: ...
 
     # Admins methods
 
@@ -207,6 +381,8 @@ class TalosDatabase(common.GenericDatabase):
 
     def get_guild_command(self, guild_id: int, name: str) -> Optional[GuildCommand]: ...
 
+    def _get_command_cache(self, guild_id: int) -> Optional[Dict[str, Optional[str]]]: ...
+
     def get_guild_commands(self, guild_id: int) -> List[GuildCommand]: ...
 
     # Custom guild events
@@ -217,14 +393,64 @@ class TalosDatabase(common.GenericDatabase):
 
     # Quote methods
 
-    def get_quote(self, guild_id: int, qid: int) -> Quote: ...
+    def get_quote(self, guild_id: int, qid: int) -> Optional[Quote]: ...
+
+    def _get_indexed_quote(self, quotes: QuoteIndex, guild_id: int, qid: int) -> Optional[Quote]: ...
 
-    def get_random_quote(self, guild_id: int) -> Quote: ...
+    def get_random_quote(self, guild_id: int) -> Optional[Quote]: ...
+
+    def _get_quote_cache(self, guild_id: int) -> Optional[QuoteIndex]: ...
 
     # Uptime methods
 
     def add_uptime(self, uptime: int) -> None: ...
 
-    def get_uptime(self, start: int) -> List[Tuple[int]]: ...
+    def get_uptime(self, *starts: int) -> List[int]: ...
 
     def remove_uptime(self, end: int) -> None: ...
+
+    # Cluster methods
+
+    def set_guild_count(self, cluster_id: int, guild_count: int) -> None: ...
+
+    def get_guild_count(self, since: int) -> int: ...
+
+class AsyncTalosDatabase:
+
+    __slots__ = ("database", "latencies", "ping_interval", "idle_timeout", "_executor", "_methods", "_idle",
+                 "_clones", "_pool_lock")
+
+    database: TalosDatabase
+    latencies: Optional[stats.LatencyTracker]
+    ping_interval: float
+    idle_timeout: float
+    _executor: ThreadPoolExecutor
+    _methods: Dict[str, Callable[..., Awaitable[Any]]]
+    _idle: List[Tuple[TalosDatabase, float]]
+    _clones: Set[TalosDatabase]
+    _pool_lock: threading.Lock
+
+    def __init__(self, database: TalosDatabase, latencies: Optional[stats.LatencyTracker] = ..., pool_size: int = ...,
+                 ping_interval: float = ..., idle_timeout: float = ...) -> None: ...
+
+    def __getattr__(self, item: str) -> Callable[..., Awaitable[Any]]: ...
+
+    def _checkout(self) -> TalosDatabase: ...
+
+    def _checkin(self, connection: TalosDatabase) -> None: ...
+
+    def _call(self, item: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any: ...
+
+    async def _submit(self, func: Callable[..., _T], *args: Any) -> _T: ...
+
+    async def run(self, func: Callable[..., _T], *args: Any, **kwargs: Any) -> _T: ...
+
+    def _maintain(self) -> None: ...
+
+    async def maintain(self) -> None: ...
+
+    def _reset(self) -> None: ...
+
+    async def reset_connection(self) -> None: ...
+
+    def close(self) -> None: ...
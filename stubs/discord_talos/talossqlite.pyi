@@ -0,0 +1,101 @@
+"""
+    Stub file for the Talos SQLite backend
+
+    author: CraftSpider
+"""
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Tuple, Type, TypeVar, Union
+from spidertools.common.data import Row, MultiRow
+import pathlib
+import sqlite3
+import logging
+import spidertools.common as common
+import discord_talos.talossql as sql
+
+_R = TypeVar("_R", bound=Row)
+
+_values_pattern: Pattern = ...
+_rand_pattern: Pattern = ...
+_extreme_pattern: Pattern = ...
+_trigger_pattern: Pattern = ...
+_text_pattern: Pattern = ...
+
+TRANSLATION_CACHE_SIZE: int = ...
+
+log: logging.Logger = ...
+
+def translate_query(query: str) -> str: ...
+
+def _literal(value: Any) -> str: ...
+
+class SqliteAccessor:
+
+    __slots__ = ("_connection", "_cursor")
+
+    _connection: sqlite3.Connection
+    _cursor: sqlite3.Cursor
+
+    def __init__(self, path: pathlib.Path) -> None: ...
+
+    def execute(self, query: str, args: Sequence[Any]) -> None: ...
+
+    def close(self) -> None: ...
+
+class SqliteDatabase(common.GenericDatabase):
+
+    _path: pathlib.Path
+    _schema: str
+    _schemadef: Dict[str, Any]
+    _accessor: Optional[SqliteAccessor]
+
+    def __init__(self, path: Union[str, pathlib.Path], schemadef: Dict[str, Any]) -> None: ...
+
+    def _connect(self) -> None: ...
+
+    def reset_connection(self) -> None: ...
+
+    def is_connected(self) -> bool: ...
+
+    def execute(self, query: str, args: Sequence[Any] = ...) -> None: ...
+
+    def commit(self) -> bool: ...
+
+    def raw_exec(self, statement: str) -> List[Tuple[Any, ...]]: ...
+
+    def verify_schema(self) -> Dict[str, int]: ...
+
+    @staticmethod
+    def _column_type(column: Dict[str, Any]) -> str: ...
+
+    def _columns(self, table: str) -> List[str]: ...
+
+    @staticmethod
+    def _where(filters: Dict[str, Any]) -> Tuple[str, List[Any]]: ...
+
+    def get_items(self, cls: Type[_R], limit: Union[int, Tuple[int, int], None] = ..., order: Optional[str] = ...,
+                  **filters: Any) -> List[_R]: ...
+
+    def get_item(self, cls: Type[_R], default: Any = ..., order: Optional[str] = ..., **filters: Any) -> Optional[_R]: ...
+
+    def get_count(self, cls: Type[Row], **filters: Any) -> int: ...
+
+    def save_item(self, item: Union[Row, MultiRow]) -> None: ...
+
+    def remove_item(self, item: Union[Row, MultiRow], general: bool = ...) -> None: ...
+
+    def remove_items(self, cls: Type[Row], **filters: Any) -> None: ...
+
+    def _delete(self, table: str, filters: Dict[str, Any]) -> None: ...
+
+    def close(self) -> None: ...
+
+class SqliteTalosDatabase(sql.TalosDatabase, SqliteDatabase):
+
+    def _has_table(self, table: str) -> bool: ...
+
+    def _get_indexes(self, table: str) -> Dict[str, Tuple[str, ...]]: ...
+
+    def _create_index(self, table: str, name: str, columns: Sequence[str]) -> None: ...
+
+    def _drop_index(self, table: str, name: str) -> None: ...
+
+    def _connection_args(self) -> Tuple[pathlib.Path, Dict[str, Any]]: ...
@@ -0,0 +1,47 @@
+"""
+    Stub file for Talos admission control
+
+    author: CraftSpider
+"""
+from typing import Any, Awaitable, Callable, Counter, Deque, Hashable, Optional, OrderedDict, TypeVar
+import asyncio
+import discord.ext.commands as commands
+
+_T = TypeVar("_T")
+
+class AdmissionRefused(commands.CommandError): ...
+
+class AdmissionQueue:
+
+    __slots__ = ("limit", "max_waiting", "max_per_user", "max_per_guild", "active", "_users", "_waiters")
+
+    limit: int
+    max_waiting: int
+    max_per_user: int
+    max_per_guild: Optional[int]
+    active: int
+    _users: Counter[int]
+    _waiters: OrderedDict[Hashable, Deque[asyncio.Future]]
+
+    def __init__(self, limit: int, max_waiting: int = ..., max_per_user: int = ...,
+                 max_per_guild: Optional[int] = ...) -> None: ...
+
+    @property
+    def waiting(self) -> int: ...
+
+    def position(self, key: Hashable, index: int) -> int: ...
+
+    async def acquire(self, user_id: int, key: Hashable,
+                      notify: Optional[Callable[[int], Awaitable[Any]]] = ...) -> None: ...
+
+    def release(self, user_id: int) -> None: ...
+
+    def _remove(self, key: Hashable, future: asyncio.Future) -> None: ...
+
+    def _forget(self, user_id: int) -> None: ...
+
+def admission(queue: AdmissionQueue) -> Callable[[_T], _T]: ...
+
+def get_queue(command: commands.Command) -> Optional[AdmissionQueue]: ...
+
+def fairness_key(ctx: commands.Context) -> Hashable: ...
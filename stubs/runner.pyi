@@ -1,8 +1,16 @@
 
-from typing import Dict
+from typing import Dict, List, Tuple, Optional
 
 
 name_folder: Dict[str, str] = ...
 
+name_bot: Dict[str, Tuple[str, str]] = ...
+
+IMPORT_REPORT_SIZE: int = ...
+
+
+def import_times(module: str, bot: Optional[Tuple[str, str]] = ...) -> Tuple[int, List[Tuple[str, int, int]]]: ...
+
+def report_import_times(module: str, bot: Optional[Tuple[str, str]] = ...) -> int: ...
 
 def main() -> None: ...
@@ -1,10 +1,16 @@
 
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List
 import aiohttp.web as web
 import spidertools.webserver as webserver
 import pathlib
 
 SETTINGS_FILE: pathlib.Path = ...
+METRICS_FOLDER: pathlib.Path = ...
+METRICS_MAX_AGE: int = ...
+
+def merge_metrics(texts: Iterable[str]) -> str: ...
+
+def read_metrics(folder: pathlib.Path, max_age: float = ...) -> List[str]: ...
 
 class TalosAPI(webserver.APIHandler):
 
@@ -12,4 +18,6 @@ class TalosAPI(webserver.APIHandler):
 
     async def on_commands(self, method: str, commands: Dict[str, Any]) -> web.Response: ...
 
+    async def on_metrics(self, method: str, data: Any) -> web.Response: ...
+
 def main() -> int: ...
@@ -0,0 +1,37 @@
+"""
+    Throughput benchmark for Talos message processing. Run with `pytest tests/benchmarks -s` to see the results.
+"""
+
+import time
+import random
+
+from discord.ext.test import get_config, backend, empty_queue
+
+
+MESSAGES = 2000
+COMMAND_RATIO = 0.1
+CHAT = ("hello there", "anyone around?", "lol", "I wrote 2000 words today", "!play some music", "?help")
+COMMANDS = ("^credits", "^version", "^nonexistent")
+
+
+async def test_process_commands_throughput(testlos_m):
+    config = get_config()
+    channel = config.channels[0]
+    member = config.members[0]
+
+    rand = random.Random(0)
+    contents = [
+        rand.choice(COMMANDS) if rand.random() < COMMAND_RATIO else rand.choice(CHAT) for _ in range(MESSAGES)
+    ]
+    messages = [backend.make_message(content, member, channel) for content in contents]
+
+    start = time.perf_counter()
+    for message in messages:
+        await testlos_m.process_commands(message)
+    elapsed = time.perf_counter() - start
+    await empty_queue()
+
+    commands = sum(content in COMMANDS for content in contents)
+    print(f"\nProcessed {MESSAGES} messages ({commands} commands) in {elapsed:.3f}s: "
+          f"{MESSAGES / elapsed:.0f} messages/sec")
+    assert elapsed > 0
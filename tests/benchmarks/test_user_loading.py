@@ -0,0 +1,80 @@
+"""
+    Benchmark of loading a TalosUser in one query against loading each table separately. Run with
+    `pytest tests/benchmarks -s` to see the results.
+"""
+
+import time
+
+import discord_talos.talossql as sql
+
+
+LOADS = 500
+USER_ID = 424242
+TITLES = ("Writer", "Reader", "Editor", "Critic")
+COMMANDS = ("roll", "quote", "xkcd", "profile", "help", "wordcount", "nanowrimo", "tvtropes")
+
+
+def load_user_separately(database, user_id):
+    """The per-table loading get_user did before, for comparison"""
+    user_data = dict()
+    user_data["profile"] = database.get_item(sql.UserProfile, user_id=user_id)
+    if user_data.get("profile") is None:
+        return None
+    user_data["invoked"] = database.get_items(sql.InvokedCommand, order="times_invoked DESC", user_id=user_id)
+    user_data["titles"] = database.get_items(sql.UserTitle, user_id=user_id)
+    user_data["options"] = database.get_user_options(user_id)
+    return sql.TalosUser(user_data)
+
+
+def measure(database, monkeypatch, load):
+    queries = 0
+    execute = database.execute
+
+    def counting_execute(*args, **kwargs):
+        nonlocal queries
+        queries += 1
+        return execute(*args, **kwargs)
+
+    monkeypatch.setattr(database, "execute", counting_execute)
+    start = time.perf_counter()
+    for _ in range(LOADS):
+        database.clear_caches()
+        user = load(USER_ID)
+    elapsed = time.perf_counter() - start
+    monkeypatch.undo()
+    return user, queries / LOADS, elapsed / LOADS
+
+
+def test_user_loading(database, monkeypatch):
+    database.register_user(USER_ID)
+    try:
+        user = database.get_user(USER_ID)
+        for title in TITLES:
+            user.add_title(title)
+        database.save_item(user)
+        for count, command in enumerate(COMMANDS):
+            for _ in range(count + 1):
+                database.record_invocation(USER_ID, command)
+        database.flush_invocations()
+
+        old_user, old_queries, old_time = measure(database, monkeypatch,
+                                                  lambda user_id: load_user_separately(database, user_id))
+        new_user, new_queries, new_time = measure(database, monkeypatch, database.get_user)
+
+        print(f"\nPer-table loading: {old_queries:.1f} queries, {old_time * 1000:.3f}ms per user")
+        print(f"Single query loading: {new_queries:.1f} queries, {new_time * 1000:.3f}ms per user")
+        assert new_user.profile == old_user.profile
+        assert new_user.invoked == old_user.invoked
+        assert new_user.titles == old_user.titles
+        assert new_user.options == old_user.options
+        assert new_queries < old_queries
+
+        database.record_invocation(USER_ID, "roll")
+        pending_user, pending_queries, pending_time = measure(database, monkeypatch, database.get_user)
+        print(f"Single query loading, invocations pending: {pending_queries:.1f} queries, "
+              f"{pending_time * 1000:.3f}ms per user")
+        assert pending_queries == new_queries, "Pending invocations added queries to loading a user"
+        assert pending_user.profile.commands_invoked == new_user.profile.commands_invoked + 1
+    finally:
+        database.remove_item(database.get_user(USER_ID))
+        database.remove_items(sql.UserOptions, user_id=USER_ID)
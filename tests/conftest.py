@@ -9,6 +9,8 @@ import _pytest.python as py
 import discord.ext.test as dpytest
 import discord_talos.talos as dtalos
 import discord_talos.talossql as sql
+import discord_talos.talossqlite as sqlite
+import discord_talos.outbound as outbound
 
 
 log = logging.getLogger("talos.tests.conftest")
@@ -58,7 +60,7 @@ def pytest_pycollect_makeitem(collector, name, obj):
 
 
 @pytest.fixture()
-def database(request):
+def database(request, tmp_path):
     import json
     log.debug("Creating database connection")
     with open("discord_talos/schema.json") as f:
@@ -80,7 +82,14 @@ def database(request):
         database = sql.TalosDatabase("localhost", 3306, "root", "", "talos_data", schemadef)
     database.verify_schema()
     if not database.is_connected():
-        raise pytest.skip("Test database not found")
+        log.debug("MySQL test database not found, falling back to SQLite")
+        database = sqlite.SqliteTalosDatabase(tmp_path / "talos.db", schemadef)
+        database.verify_schema()
+        if hasattr(request.module, "testlos"):
+            testlos = request.module.testlos
+            database.journal = testlos.database.journal
+            testlos.database = database
+            testlos.async_database = sql.AsyncTalosDatabase(database, latencies=testlos.latencies)
     return database
 
 
@@ -89,6 +98,7 @@ def testlos():
     log.debug("Setting up Talos")
     tokens = dtalos.load_token_file(dtalos.TOKEN_FILE)
     testlos = dtalos.Talos(tokens=tokens)
+    testlos.outbound = outbound.Outbound(rate_limit=None)
     testlos.load_extensions(testlos.startup_extensions)
     dpytest.configure(testlos, 2, 2, 2)
 
@@ -107,6 +117,7 @@ def testlos_m(request):
     log.debug("Setting up Module Talos")
     tokens = dtalos.load_token_file(dtalos.TOKEN_FILE)
     testlos = dtalos.Talos(tokens=tokens)
+    testlos.outbound = outbound.Outbound(rate_limit=None)
     testlos.database.verify_schema()
     testlos.load_extensions(testlos.startup_extensions)
     dpytest.configure(testlos, 2, 2, 2)
@@ -0,0 +1,26 @@
+
+import pytest
+import discord_talos.talos as dtalos
+import discord_talos.cluster as cluster
+
+
+def test_shard_ranges():
+    assert cluster.shard_ranges(4, 2) == [[0, 1], [2, 3]]
+    assert cluster.shard_ranges(5, 2) == [[0, 1], [2, 3, 4]]
+    assert cluster.shard_ranges(3, 3) == [[0], [1], [2]]
+
+    ranges = cluster.shard_ranges(16, 3)
+    assert sorted(sum(ranges, [])) == list(range(16)), "Shards lost or duplicated between processes"
+
+    with pytest.raises(ValueError):
+        cluster.shard_ranges(2, 3)
+
+
+def test_cluster_process_args():
+    process = cluster.ClusterProcess(1, [2, 3], 4)
+    args = dtalos.parse_args(process.args()[3:])
+
+    assert args.shard_ids == [2, 3]
+    assert args.shard_count == 4
+    assert args.cluster_id == 1
+    assert not args.auto_shard
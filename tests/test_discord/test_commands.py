@@ -210,6 +210,35 @@ async def test_roll():
     verify_message("Total: 2\nIndividual Rolls: 1, 1")
 
 
+async def test_roll_queries(database, monkeypatch):
+    queries = 0
+    db_type = type(database)
+    execute = db_type.execute
+    raw_exec = db_type.raw_exec
+
+    def counting_execute(self, *args, **kwargs):
+        nonlocal queries
+        queries += 1
+        return execute(self, *args, **kwargs)
+
+    def counting_raw_exec(self, *args, **kwargs):
+        nonlocal queries
+        queries += 1
+        return raw_exec(self, *args, **kwargs)
+
+    monkeypatch.setattr(db_type, "execute", counting_execute)
+    monkeypatch.setattr(db_type, "raw_exec", counting_raw_exec)
+
+    database.clear_caches()
+    await message("^roll 1d1")
+    verify_message("Result: 1")
+    assert queries == 0, "Rolling read from the database"
+
+    await message("^time")
+    verify_message()
+    assert queries > 0, "Reading options didn't load them"
+
+
 async def test_time():
     await message("^time")
     verify_message()
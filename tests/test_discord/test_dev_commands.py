@@ -68,6 +68,17 @@ async def test_exec():
     verify_message("```\n4\n```")
 
 
+async def test_stats():
+    await devmess("^stats")
+    verify_message("Valid options are 'cache' and 'latency'.")
+    await devmess("^stats cache")
+    verify_message("guild_options", equals=False)
+    await devmess("^stats latency")
+    verify_message("callback", equals=False)
+    await devmess("^stats latency nonexistent")
+    verify_message("No latencies recorded for command nonexistent")
+
+
 async def test_grant_title():
     pytest.skip("Grant title testing not yet implemented")
 
@@ -0,0 +1,64 @@
+
+import types
+import discord_talos.talossql as sql
+import discord_talos.indexes as indexes
+
+
+def _message(content, guild_id=None, author_id=1):
+    guild = types.SimpleNamespace(id=guild_id) if guild_id is not None else None
+    return types.SimpleNamespace(content=content, guild=guild, author=types.SimpleNamespace(id=author_id))
+
+
+def test_prefix_index():
+    index = indexes.PrefixIndex("^")
+    index.load(
+        [sql.GuildOptions([-1] + [None] * 11 + ["!", None]), sql.GuildOptions([10] + [None] * 11 + ["$", None])],
+        [sql.UserOptions([5, None, "%"])]
+    )
+
+    assert index.get(_message("", guild_id=10)) == "$"
+    assert index.get(_message("", guild_id=11)) == "!", "Guild without a prefix didn't use the default"
+    assert index.get(_message("", author_id=5)) == "%"
+    assert index.get(_message("", author_id=6)) == "^"
+
+    index.set_guild(10, None)
+    assert index.get(_message("", guild_id=10)) == "!"
+    index.set_user(6, "&")
+    assert index.get(_message("", author_id=6)) == "&"
+
+
+def test_prefix_matches():
+    index = indexes.PrefixIndex("^")
+    index.set_guild(10, ".")
+
+    assert index.matches(_message("^help"), "<@1> ")
+    assert index.matches(_message("<@1> help"), "<@1> ")
+    assert not index.matches(_message("hello there"), "<@1> ")
+    assert index.matches(_message(".help", guild_id=10), "<@1> ")
+    assert not index.matches(_message("^help", guild_id=10), "<@1> ")
+
+
+def _channel(channel_id, name, guild):
+    return types.SimpleNamespace(id=channel_id, name=name, guild=guild)
+
+
+def test_channel_index():
+    guild = types.SimpleNamespace(id=10, channels=[])
+    guild.channels.extend([_channel(1, "general", guild), _channel(2, "mod-log", guild), _channel(3, "general", guild)])
+    index = indexes.ChannelIndex()
+
+    assert index.get(guild, "mod-log").id == 2
+    assert index.get(guild, "general").id == 1, "First channel with a name wasn't preferred"
+    assert [c.id for c in index.get_all(guild, "general")] == [1, 3]
+    assert index.get(guild, "prompts") is None
+
+    index.add(_channel(4, "prompts", guild))
+    assert index.get(guild, "prompts").id == 4
+    index.update(_channel(2, "mod-log", guild), _channel(2, "audit", guild))
+    assert index.get(guild, "mod-log") is None
+    assert index.get(guild, "audit").id == 2
+    index.remove(_channel(1, "general", guild))
+    assert index.get(guild, "general").id == 3
+
+    index.remove_guild(10)
+    assert index.get(guild, "general").id == 1, "Guild not rebuilt after being dropped"
@@ -0,0 +1,43 @@
+
+import discord_talos.journal as journal
+
+
+def test_journal_replay(tmp_path):
+    log = journal.Journal(tmp_path)
+    log.append("invocation", 1, "roll")
+    log.append("invocation", 2, "hi")
+    log.close()
+
+    log = journal.Journal(tmp_path)
+    assert list(log.replay()) == [("invocation", [1, "roll"]), ("invocation", [2, "hi"])]
+    log.append("invocation", 3, "xkcd")
+    assert len(list(log.replay())) == 2, "Open segment was replayed"
+    log.close()
+
+
+def test_journal_discard(tmp_path):
+    log = journal.Journal(tmp_path)
+    log.append("invocation", 1, "roll")
+    first = log.seal()
+    log.append("invocation", 2, "hi")
+    second = log.seal()
+    assert second == first + 1
+    assert log.seal() == second, "Sealing an empty segment created a new one"
+
+    log.discard(first)
+    assert list(log.replay()) == [("invocation", [2, "hi"])]
+    log.discard(first)
+    assert list(log.replay()) == [("invocation", [2, "hi"])], "Discarding a stale mark dropped a later segment"
+    log.discard(second)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_journal_torn_record(tmp_path):
+    log = journal.Journal(tmp_path)
+    log.append("invocation", 1, "roll")
+    log.close()
+    with open(next(tmp_path.iterdir()), "a") as file:
+        file.write('["invocation", 2, "h')
+
+    log = journal.Journal(tmp_path)
+    assert list(log.replay()) == [("invocation", [1, "roll"])]
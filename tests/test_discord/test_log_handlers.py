@@ -0,0 +1,63 @@
+
+import time
+import asyncio
+import logging
+import discord_talos.log_handlers as log_handlers
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(self.format(record))
+
+
+def test_batching_handler():
+    target = ListHandler()
+    handler = log_handlers.BatchingHandler(target, capacity=3, interval=0.1, combine=True)
+    handler.setFormatter(logging.Formatter("%(levelname)s:%(message)s"))
+    logger = logging.getLogger("talos.tests.batching")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    try:
+        logger.info("one")
+        logger.info("two")
+        assert target.records == [], "Batch sent before it was full"
+        time.sleep(0.3)
+        assert target.records == ["INFO:one\nINFO:two"], "Batch not sent after the interval"
+
+        logger.info("three")
+        logger.error("four")
+        assert target.records[-1] == "INFO:three\nERROR:four", "Error didn't flush the batch"
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def test_batching_handler_loop():
+    target = ListHandler()
+    target.setFormatter(logging.Formatter("%(message)s"))
+
+    async def run():
+        handler = log_handlers.BatchingHandler(target, capacity=10, loop=asyncio.get_running_loop())
+        handler.handle(logging.makeLogRecord({"msg": "last", "levelno": logging.INFO}))
+        handler.close()
+        assert target.records == ["last"], "Closing on the loop didn't send the last batch"
+
+    asyncio.run(run())
+
+
+def test_queue_logging():
+    target = ListHandler()
+    target.setFormatter(logging.Formatter("%(name)s:%(message)s"))
+    logger = logging.getLogger("talos.tests.queue")
+    listener = log_handlers.start_queue_logging([logger], [target, None])
+    try:
+        logger.info("queued %s", 1)
+    finally:
+        listener.stop()
+    logger.handlers = []
+    assert target.records == ["talos.tests.queue:queued 1"]
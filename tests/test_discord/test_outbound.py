@@ -0,0 +1,85 @@
+
+import asyncio
+import discord_talos.outbound as outbound
+
+
+class FakeChannel:
+
+    def __init__(self, channel_id=1):
+        self.id = channel_id
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        await asyncio.sleep(0)
+        self.sent.append((content, kwargs))
+        return len(self.sent)
+
+
+class BlockedChannel(FakeChannel):
+
+    async def send(self, content=None, **kwargs):
+        await asyncio.Event().wait()
+
+
+async def test_send_coalescing():
+    sender = outbound.Outbound(rate_limit=None)
+    channel = FakeChannel()
+
+    first = asyncio.ensure_future(sender.send(channel, "line 0", merge_key=1))
+    await asyncio.sleep(0)
+    results = await asyncio.gather(first, *(sender.send(channel, f"line {i}", merge_key=1) for i in range(1, 5)))
+    assert channel.sent[0] == ("line 0", {})
+    assert channel.sent[1] == ("line 1\nline 2\nline 3\nline 4", {}), "Queued plain text sends weren't merged"
+    assert results == [1, 2, 2, 2, 2]
+
+    channel.sent.clear()
+    await asyncio.gather(sender.send(channel, "text", merge_key=1), sender.send(channel, embed=0, merge_key=1),
+                         sender.send(channel, "text", merge_key=1))
+    assert len(channel.sent) == 3, "Send with an embed was merged"
+
+    channel.sent.clear()
+    await asyncio.gather(*(sender.send(channel, "x" * 1500, merge_key=1) for _ in range(3)))
+    assert len(channel.sent) == 3, "Merged send went over the message limit"
+
+    channel.sent.clear()
+    await asyncio.gather(sender.send(channel, "a", merge_key=1), sender.send(channel, "b", merge_key=1),
+                         sender.send(channel, "c", merge_key=2), sender.send(channel, "d"), sender.send(channel, "e"))
+    assert [content for content, _ in channel.sent] == ["a\nb", "c", "d", "e"], \
+        "Sends from different origins were merged"
+
+
+async def test_send_cancel():
+    sender = outbound.Outbound(rate_limit=None)
+    channel = BlockedChannel()
+
+    sent = asyncio.ensure_future(sender.send(channel, "text"))
+    queued = asyncio.ensure_future(sender.send(channel, embed=0))
+    for _ in range(3):
+        await asyncio.sleep(0)
+    sender._senders[channel.id]._task.cancel()
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert sent.cancelled(), "Send in flight wasn't cancelled with the worker"
+    assert queued.cancelled()
+
+
+async def test_send_all():
+    sender = outbound.Outbound(rate_limit=None)
+    channel = FakeChannel()
+
+    results = await sender.send_all(channel, [{"embed": i} for i in range(3)])
+    assert channel.sent == [(None, {"embed": 0}), (None, {"embed": 1}), (None, {"embed": 2})]
+    assert results == [1, 2, 3]
+    await asyncio.sleep(0)
+    assert not sender._senders, "Idle channel queue wasn't dropped"
+
+
+async def test_send_pacing():
+    sender = outbound.Outbound(rate_limit=2, rate_period=0.05)
+    channel = FakeChannel()
+
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    await sender.send_all(channel, [{"embed": i} for i in range(5)])
+    assert loop.time() - start >= 0.1, "Sends weren't paced to the rate limit"
+    assert len(channel.sent) == 5
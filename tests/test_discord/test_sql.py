@@ -1,4 +1,7 @@
 
+import asyncio
+import threading
+import pytest
 import spidertools.discord.events as events
 import discord_talos.talossql as data
 
@@ -154,6 +157,282 @@ def test_guild_event():
     assert event.text == "Hello World!"
 
 
+def test_lru_cache():
+
+    cache = data.LRUCache(2)
+
+    assert cache.get(1) is None
+    assert cache.misses == 1
+    cache.put(1, "one")
+    cache.put(2, "two")
+    assert cache.get(1) == "one"
+    assert cache.hits == 1
+    cache.put(3, "three")
+    assert len(cache) == 2
+    assert 2 not in cache, "Least recently used entry not evicted"
+    assert 1 in cache and 3 in cache
+    cache.invalidate(1)
+    assert 1 not in cache
+    assert cache.hit_ratio() == 0.5
+    cache.clear()
+    assert len(cache) == 0
+
+    version = cache.version
+    cache.put(1, "one")
+    assert not cache.put(2, "stale", version), "Value read before a write was put"
+    assert cache.put(2, "two", cache.version)
+    assert cache.get(2) == "two"
+
+    cache.put(3, {})
+    version = cache.version
+    assert cache.update(3, lambda value: value.update(a=1))
+    assert cache.get(3) == {"a": 1}
+    assert cache.version == version + 1, "Update in place didn't count as a write"
+    assert not cache.update(4, lambda value: None)
+
+
+def test_options_cache(database):
+    database.save_item(data.GuildOptions([5, None, None, None, None, None, None, None, None, None, None, None,
+                                          "!", None]))
+
+    options = database.get_guild_options(5)
+    assert options.prefix == "!"
+    assert options.timezone == database.get_guild_defaults().timezone
+    hits = database.caches["guild_options"].hits
+    options.prefix = "?"
+    assert database.get_guild_options(5).prefix == "!", "Cached options modified through returned copy"
+    assert database.caches["guild_options"].hits == hits + 1
+
+    database.save_item(options)
+    assert database.get_guild_options(5).prefix == "?", "Saved options not written through to cache"
+
+    database.remove_item(options)
+    assert database.get_guild_options(5).prefix == database.get_guild_defaults().prefix
+
+
+def test_defaults_snapshot(database):
+    defaults = database.get_guild_defaults()
+    assert database.defaults["guild_options"] == tuple(defaults.to_row())
+
+    changed = data.GuildOptions(defaults.to_row())
+    changed.timezone = "EST"
+    database.save_item(changed)
+    try:
+        assert database.get_guild_defaults().timezone == "EST", "Saved default row not written to snapshot"
+        assert database.get_guild_options(8).timezone == "EST"
+    finally:
+        database.save_item(defaults)
+    assert database.get_guild_options(8).timezone == defaults.timezone
+
+
+def test_guild_command_cache(database):
+    command = data.GuildCommand((6, "greet", "Hello"))
+    database.save_item(command)
+    try:
+        assert database.get_guild_command(6, "greet") == command
+        misses = database.caches["guild_commands"].misses
+        assert database.get_guild_command(6, "nothing") is None
+        assert database.caches["guild_commands"].misses == misses, "Negative lookup missed the command cache"
+
+        database.save_item(data.GuildCommand((6, "greet", "Hi")))
+        assert database.get_guild_command(6, "greet").text == "Hi", "Edited command not written through to cache"
+        assert database.get_guild_command(6, "GREET").text == "Hi", "Command lookup was case-sensitive"
+    finally:
+        database.remove_item(data.GuildCommand((6, "greet", None)), True)
+    assert database.get_guild_command(6, "greet") is None
+
+
+def test_statement_cache(database):
+    database.save_item(data.GuildCommand((9, "greet", "Hello")))
+    try:
+        statements = database.caches["statements"]
+        assert database.get_item(data.GuildCommand, guild_id=9, name="greet").text == "Hello"
+        hits = statements.hits
+        assert database.get_item(data.GuildCommand, guild_id=9, name="missing") is None
+        assert statements.hits == hits + 1, "Lookup with the same shape built a new statement"
+        assert database.get_items(data.GuildCommand, limit=(0, 1), order="name", guild_id=9) == \
+            [data.GuildCommand((9, "greet", "Hello"))]
+        assert database.get_item(data.GuildCommand, default=5, guild_id=10) == 5
+        assert database.get_item(data.GuildCommand, guild_id=9, name=None) is None
+    finally:
+        database.remove_item(data.GuildCommand((9, "greet", None)), True)
+
+
+def test_get_user(database):
+    database.register_user(13)
+    try:
+        database.save_item(data.UserOptions((13, None, "!")))
+        database.save_item(data.UserTitle((13, "Tester")))
+        database.record_invocation(13, "roll")
+        database.record_invocation(13, "help")
+        database.record_invocation(13, "help")
+        database.clear_caches()
+
+        user = database.get_user(13)
+        assert database.invocations, "Loading a user flushed the buffered invocations"
+        assert user.profile.commands_invoked == 3
+        assert [(item.command_name, item.times_invoked) for item in user.invoked] == [("help", 2), ("roll", 1)]
+        assert user.check_title("Tester")
+        assert user.options.prefix == "!"
+        assert user.options.rich_embeds == database.get_user_defaults().rich_embeds
+        assert database.caches["user_options"].get(13).prefix == "!", "Loaded options weren't cached"
+        assert database.get_user(13).options == user.options
+        assert database.get_user(14) is None
+
+        user.profile.description = "Edited"
+        database.save_item(user)
+        database.flush_invocations()
+        user = database.get_user(13)
+        assert user.profile.description == "Edited"
+        assert user.profile.commands_invoked == 3, "Saving a loaded user counted buffered invocations twice"
+        assert [(item.command_name, item.times_invoked) for item in user.invoked] == [("help", 2), ("roll", 1)]
+    finally:
+        database.remove_item(database.get_user(13))
+
+
+def test_quote_cache(database):
+    database.remove_items(data.Quote, guild_id=11)
+    for text in ("First", "Second", "Third"):
+        database.save_item(data.Quote([11, None, "Author", text]))
+    try:
+        assert database.get_quote(11, 2).quote == "Second"
+        quotes = database.caches["quotes"].get(11)
+        assert quotes.ids == [1, 2, 3]
+        assert quotes.quotes[2] is not None and quotes.quotes[1] is None, "Quotes weren't loaded as asked for"
+
+        assert {database.get_random_quote(11).id for _ in range(50)} == {1, 2, 3}
+        database.remove_item(database.get_quote(11, 2))
+        assert database.get_quote(11, 2) is None
+        assert database.caches["quotes"].get(11).ids == [1, 3], "Removed quote left in the cache"
+
+        database.save_item(data.Quote([11, 3, "Author", "Edited"]))
+        assert database.get_quote(11, 3).quote == "Edited", "Edited quote not written through to cache"
+        assert database.get_random_quote(12) is None
+
+        database.caches["quotes"].invalidate(11)
+        assert database.get_quote(11, 3).quote == "Edited"
+        database.execute(f"DELETE FROM {database._schema}.quotes WHERE guild_id = %s AND id = %s", [11, 1])
+        assert {database.get_random_quote(11).id for _ in range(20)} == {3}, "Deleted quote was picked"
+        database.caches["quotes"].invalidate(11)
+        assert database.get_quote(11, 1) is None
+        database.execute(f"DELETE FROM {database._schema}.quotes WHERE guild_id = %s", [11])
+        assert database.get_random_quote(11) is None
+
+        stale = data.QuoteIndex([4])
+        database.caches["quotes"].put(11, data.QuoteIndex([]))
+        assert database._get_indexed_quote(stale, 11, 4) is None
+        assert 4 not in stale, "Deleted quote wasn't dropped from the index it was picked from"
+    finally:
+        database.remove_items(data.Quote, guild_id=11)
+
+
+def test_bulk_items(database):
+    commands = [data.GuildCommand((15, f"command{i}", f"Text {i}")) for i in range(5)]
+    events = [data.GuildEvent((15, f"event{i}", "3600", 0, 1, "Event")) for i in range(3)]
+    database.save_items(commands + events)
+    try:
+        assert database.get_count(data.GuildCommand, guild_id=15) == 5
+        assert database.get_count(data.GuildEvent, guild_id=15) == 3
+        assert database.get_guild_command(15, "command2").text == "Text 2"
+
+        for event in events:
+            event.last_active = 10
+        database.save_items([data.GuildCommand((15, "command2", "Edited"))] + events)
+        assert database.get_guild_command(15, "command2").text == "Edited", "Bulk save didn't update the cache"
+        assert database.get_count(data.GuildCommand, guild_id=15) == 5, "Saving existing rows inserted them again"
+        assert all(event.last_active == 10 for event in database.get_guild_events(15))
+
+        database.remove_items(commands[:3] + events[:1])
+        assert sorted(command.name for command in database.get_guild_commands(15)) == ["command3", "command4"]
+        assert database.get_guild_command(15, "command0") is None, "Bulk remove left the command cached"
+        assert database.get_count(data.GuildEvent, guild_id=15) == 2
+    finally:
+        database.remove_items(data.GuildCommand, guild_id=15)
+        database.remove_items(data.GuildEvent, guild_id=15)
+
+
+def test_bulk_user_save(database):
+    database.register_user(16)
+    try:
+        user = database.get_user(16)
+        user.add_title("First")
+        user.add_title("Second")
+        database.save_item(user)
+        user = database.get_user(16)
+        user.remove_title("First")
+        user.profile.description = "Bulk"
+        database.save_item(user)
+
+        user = database.get_user(16)
+        assert [title.title for title in user.titles] == ["Second"], "Removed title wasn't deleted"
+        assert user.profile.description == "Bulk"
+    finally:
+        database.remove_item(database.get_user(16))
+
+
+def test_schema_indexes(database):
+    assert database._get_indexes("invoked_commands")["idx_invoked_commands"] == ("user_id", "times_invoked")
+
+    database._drop_index("invoked_commands", "idx_invoked_commands")
+    database._create_index("invoked_commands", "idx_invoked_stale", ("times_invoked",))
+    results = database.verify_schema()
+    assert results["indexes_add"] == 1
+    assert results["indexes_remove"] == 1, "Index missing from the schema wasn't dropped"
+    assert database._get_indexes("invoked_commands") == {"idx_invoked_commands": ("user_id", "times_invoked")}
+
+
+def test_uptime_intervals(database):
+    database.remove_uptime(2 ** 40)
+    for mark in (1000, 1060, 1120, 1300):
+        database.add_uptime(mark)
+    assert database.get_uptime(0, 1000, 1290) == [240, 180, 10]
+
+    database.remove_uptime(1000)
+    assert database.get_uptime(0) == [180], "Interval spanning the cutoff wasn't trimmed"
+    database.remove_uptime(1200)
+    assert database.get_uptime(0) == [60]
+    database.remove_uptime(2 ** 40)
+
+
+async def test_async_database(database):
+    async_database = data.AsyncTalosDatabase(database)
+    try:
+        assert await async_database.get_guild_options(7) == database.get_guild_options(7)
+        thread = await async_database.run(threading.current_thread)
+        assert thread is not threading.current_thread(), "Async database ran query on the event loop thread"
+        with pytest.raises(AttributeError):
+            async_database._schema
+    finally:
+        async_database.close()
+
+
+async def test_database_pool(database):
+    async_database = data.AsyncTalosDatabase(database, pool_size=3)
+    try:
+        barrier = threading.Barrier(3, timeout=5)
+
+        def hold_connection():
+            connection = async_database._checkout()
+            try:
+                barrier.wait()
+                return connection
+            finally:
+                async_database._checkin(connection)
+
+        connections = await asyncio.gather(*(async_database.run(hold_connection) for _ in range(3)))
+        assert len(set(map(id, connections))) == 3, "Concurrent queries shared a connection"
+        assert database not in connections, "Pool shared the event loop's connection"
+        for connection in connections:
+            assert connection.caches is database.caches, "Pooled connection doesn't share the caches"
+            assert connection.invocations is database.invocations
+
+        async_database.idle_timeout = 0
+        await async_database.maintain()
+        assert async_database._idle == [], "Idle clones weren't dropped"
+    finally:
+        async_database.close()
+
+
 def test_data_classes(database):
     options = data.UserOptions([2, 0, "^"])
     profile = data.TalosUser({"profile": data.UserProfile([1, "", 100, ""]),
@@ -173,6 +452,27 @@ def test_data_classes(database):
     assert database.get_item(data.UserProfile, user_id=1) is None
 
 
+def test_flush_invocations(database):
+    database.register_user(3)
+    try:
+        database.record_invocation(3, "help")
+        database.record_invocation(3, "help")
+        database.record_invocation(3, "info")
+        database.record_invocation(4, "help")
+        assert database.flush_invocations() == 3, "Unregistered user invocations were written"
+        assert len(database.invocations) == 0
+
+        user = database.get_user(3)
+        assert user.profile.commands_invoked == 3
+        assert user.get_favorite_command().command_name == "help"
+        assert user.get_favorite_command().times_invoked == 2
+
+        database.record_invocation(3, "help")
+        assert database.get_user(3).get_favorite_command().times_invoked == 3, "get_user didn't flush invocations"
+    finally:
+        database.remove_item(database.get_user(3))
+
+
 def test_talos_database(database):
     assert database.is_connected() is True, "Connected database considered not connected"
     assert database.commit() is True, "Database not committed despite existing"
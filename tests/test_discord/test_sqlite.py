@@ -0,0 +1,160 @@
+
+import json
+import time
+import pytest
+import discord_talos.talossql as data
+import discord_talos.talossqlite as sqlite
+
+
+@pytest.fixture()
+def sqlite_database(tmp_path):
+    with open("discord_talos/schema.json") as f:
+        schemadef = json.load(f)
+    database = sqlite.SqliteTalosDatabase(tmp_path / "talos.db", schemadef)
+    yield database
+    database.close()
+
+
+def test_translate_query():
+    assert sqlite.translate_query("SELECT * FROM main.quotes WHERE guild_id = %s ORDER BY RAND() LIMIT %s") == \
+        "SELECT * FROM main.quotes WHERE guild_id = ? ORDER BY RANDOM() LIMIT ?"
+    assert sqlite.translate_query("SELECT SUM(end_time - GREATEST(start_time, %s)) FROM main.uptime_intervals") == \
+        "SELECT SUM(end_time - MAX(start_time, ?)) FROM main.uptime_intervals"
+    assert sqlite.translate_query(
+        "INSERT INTO main.user_profiles (user_id, commands_invoked) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE commands_invoked = commands_invoked + VALUES(commands_invoked)"
+    ) == "INSERT INTO main.user_profiles (user_id, commands_invoked) VALUES (?, ?) " \
+         "ON CONFLICT DO UPDATE SET commands_invoked = commands_invoked + excluded.commands_invoked"
+
+
+def test_sqlite_schema(sqlite_database):
+    results = sqlite_database.verify_schema()
+    assert results["tables"] == len(sqlite_database._schemadef["tables"])
+    assert results["indexes_add"] == 2
+    assert sqlite_database.raw_exec("PRAGMA journal_mode") == [("wal",)]
+    assert sqlite_database.get_guild_defaults().id == -1
+
+    results = sqlite_database.verify_schema()
+    assert results == {"tables": 0, "columns_add": 0, "columns_remove": 0, "indexes_add": 0, "indexes_remove": 0}, \
+        "Verifying twice changed the schema"
+
+
+def test_sqlite_uptime_migration(sqlite_database):
+    sqlite_database.raw_exec("CREATE TABLE main.uptime (time bigint NOT NULL, PRIMARY KEY (time))")
+    for mark in (1000, 1060, 1120, 1180, 2000, 2060):
+        sqlite_database.execute("INSERT INTO main.uptime VALUES (%s)", [mark])
+
+    sqlite_database.verify_schema()
+    assert sqlite_database.raw_exec("SELECT * FROM main.uptime_intervals ORDER BY start_time") == \
+        [(940, 1180), (1940, 2060)], "Old uptime wasn't joined into intervals"
+    assert sqlite_database.get_uptime(0) == [360]
+    assert not sqlite_database._has_table("uptime"), "Old uptime table wasn't dropped"
+    sqlite_database.verify_schema()
+    assert sqlite_database.get_uptime(0) == [360]
+
+
+def test_sqlite_items(sqlite_database):
+    sqlite_database.verify_schema()
+
+    command = data.GuildCommand((1, "greet", "Hello"))
+    sqlite_database.save_item(command)
+    assert sqlite_database.get_guild_command(1, "greet") == command
+    sqlite_database.save_item(data.GuildCommand((1, "greet", "Hi")))
+    assert sqlite_database.get_count(data.GuildCommand, guild_id=1) == 1, "Saving an existing row inserted it again"
+    assert sqlite_database.get_guild_command(1, "greet").text == "Hi"
+
+    sqlite_database.clear_caches()
+    assert sqlite_database.get_guild_command(1, "GREET").text == "Hi", "Command names were compared with case"
+    sqlite_database.save_item(data.GuildCommand((1, "Greet", "Hey")))
+    assert sqlite_database.get_count(data.GuildCommand, guild_id=1) == 1, "Names differing in case were both kept"
+
+    sqlite_database.save_item(data.GuildCommand((1, "bye", "Bye")))
+    assert [item.name for item in sqlite_database.get_items(data.GuildCommand, order="name", guild_id=1)] == \
+        ["bye", "greet"]
+    sqlite_database.remove_item(data.GuildCommand((1, "greet", None)), True)
+    sqlite_database.remove_items(data.GuildCommand, guild_id=1)
+    assert sqlite_database.get_count(data.GuildCommand) == 0
+
+
+def test_sqlite_user(sqlite_database):
+    sqlite_database.verify_schema()
+
+    sqlite_database.register_user(2)
+    user = sqlite_database.get_user(2)
+    user.add_title("Tester")
+    sqlite_database.save_item(user)
+    assert sqlite_database.get_user(2).check_title("Tester")
+
+    sqlite_database.record_invocation(2, "roll")
+    sqlite_database.record_invocation(2, "roll")
+    sqlite_database.record_invocation(3, "roll")
+    assert sqlite_database.flush_invocations() == 2
+    sqlite_database.record_invocation(2, "roll")
+    sqlite_database.flush_invocations()
+    assert sqlite_database.get_item(data.InvokedCommand, user_id=2, command_name="roll").times_invoked == 3
+
+    sqlite_database.remove_item(sqlite_database.get_user(2))
+    assert sqlite_database.get_count(data.UserTitle, user_id=2) == 0
+
+
+def test_sqlite_quotes(sqlite_database):
+    sqlite_database.verify_schema()
+
+    for text in ("First", "Second"):
+        sqlite_database.save_item(data.Quote([4, None, "Author", text]))
+    sqlite_database.save_item(data.Quote([5, None, "Author", "Other"]))
+    assert sqlite_database.get_quote(4, 2).quote == "Second", "Quote ids weren't numbered per guild"
+    assert sqlite_database.get_quote(5, 1).quote == "Other"
+    assert sqlite_database.get_random_quote(4).quote in ("First", "Second")
+
+
+def test_sqlite_clone(sqlite_database):
+    sqlite_database.verify_schema()
+
+    other = sqlite_database.clone()
+    try:
+        sqlite_database.save_item(data.GuildCommand((6, "greet", "Hello")))
+        assert other.get_item(data.GuildCommand, guild_id=6, name="greet").text == "Hello"
+        assert other.caches is sqlite_database.caches
+    finally:
+        other.close()
+
+
+def test_sqlite_cache_sync(sqlite_database):
+    sqlite_database.verify_schema()
+
+    other = sqlite.SqliteTalosDatabase(sqlite_database._path, sqlite_database._schemadef)
+    try:
+        since = int(time.time())
+        sqlite_database.save_item(data.GuildCommand((7, "greet", "Hello")))
+        assert other.sync_caches(since) == [], "Changes were recorded outside cluster mode"
+
+        sqlite_database.record_changes = True
+        assert other.get_user_options(7).prefix == "^"
+        options = sqlite_database.get_user_options(7)
+        options.prefix = "!"
+        sqlite_database.save_item(options)
+        assert other.get_user_options(7).prefix == "^", "Options were read again before syncing"
+        assert other.sync_caches(since) == [("user_options", 7)]
+        assert other.get_user_options(7).prefix == "!"
+
+        queries = []
+        execute = sqlite_database.execute
+        sqlite_database.execute = lambda query, args=(): queries.append(query) or execute(query, args)
+        sqlite_database.save_items([data.GuildCommand((8, name, "Hi")) for name in ("a", "b", "c")])
+        del sqlite_database.execute
+        assert sum("cache_changes" in query for query in queries) == 1, "Changes weren't recorded in one statement"
+        assert sorted(other.sync_caches(since)) == [("guild_commands", 8), ("user_options", 7)]
+    finally:
+        other.close()
+
+
+def test_sqlite_guild_count(sqlite_database):
+    sqlite_database.verify_schema()
+
+    since = int(time.time())
+    sqlite_database.set_guild_count(0, 10)
+    sqlite_database.set_guild_count(1, 15)
+    sqlite_database.set_guild_count(0, 12)
+    assert sqlite_database.get_guild_count(since) == 27
+    assert sqlite_database.get_guild_count(since + 3600) == 0, "Old reports were counted"
@@ -0,0 +1,104 @@
+
+import os
+import re
+import time
+import types
+import asyncio
+import pytest
+import discord_talos.stats as stats
+import discord_talos.talossql as sql
+import website.talos_server as server
+
+_sample_pattern = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? (\S+)$")
+
+
+def test_histogram():
+    histogram = stats.Histogram()
+    assert histogram.percentile(50) == 0
+    assert histogram.mean() == 0
+
+    for i in range(1, 101):
+        histogram.record(i / 1000)
+
+    assert histogram.count == 100
+    assert histogram.mean() == pytest.approx(0.0505)
+    for percent in (50, 95, 99):
+        value = percent / 1000
+        assert value <= histogram.percentile(percent) <= value * stats.BUCKET_FACTOR, \
+            f"p{percent} outside of bucket accuracy"
+
+
+def test_latency_tracker():
+    tracker = stats.LatencyTracker()
+    tracker.record("send", 0.1, "roll")
+    with tracker.timer("callback", "roll"):
+        pass
+
+    token = tracker.current_command.set("quote")
+    try:
+        tracker.record("database", 0.01)
+    finally:
+        tracker.current_command.reset(token)
+
+    assert set(tracker.get_stages()) == {"send", "callback", "database"}
+    assert set(tracker.get_stages("roll")) == {"send", "callback"}
+    assert set(tracker.get_stages("quote")) == {"database"}, "Timing not filed under the current command"
+    assert tracker.get_stages("other") == {}
+
+    tracker.clear()
+    assert tracker.get_stages() == {}
+
+
+def scrape(text):
+    """Stand-in scraper, parses the Prometheus text format and fails on anything malformed"""
+    samples = {}
+    types_seen = set()
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            name = line.split()[2]
+            assert name not in types_seen, f"Metric family {name} split up"
+            types_seen.add(name)
+        elif line and not line.startswith("#"):
+            match = _sample_pattern.match(line)
+            assert match, f"Malformed sample line {line}"
+            samples[match.group(1) + (match.group(2) or "")] = float(match.group(3))
+    return samples
+
+
+def _fake_bot(cluster_id, loop):
+    latencies = stats.LatencyTracker()
+    latencies.record("callback", 0.002, "roll")
+    latencies.record("database", 0.001)
+    cache = sql.LRUCache(10)
+    cache.put(1, "value")
+    cache.get(1)
+    return types.SimpleNamespace(
+        cluster_id=cluster_id, guilds=[1, 2], users=[1, 2, 3], latency=0.05, loop=loop, latencies=latencies,
+        database=types.SimpleNamespace(caches={"guild_options": cache})
+    )
+
+
+def test_metrics(tmp_path, monkeypatch):
+    loop = asyncio.new_event_loop()
+    try:
+        texts = [stats.render_metrics(_fake_bot(cluster_id, loop)) for cluster_id in (0, 1)]
+    finally:
+        loop.close()
+
+    monkeypatch.setattr(stats, "METRICS_FOLDER", tmp_path)
+    for cluster_id, text in enumerate(texts):
+        stats.write_metrics(text, stats.metrics_path(cluster_id))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["talos-0.prom", "talos-1.prom"]
+
+    stale = time.time() - server.METRICS_MAX_AGE - 60
+    os.utime(stats.metrics_path(1), (stale, stale))
+    assert server.read_metrics(tmp_path) == [texts[0]], "A stopped process's metrics were read"
+
+    merged = server.merge_metrics(path.read_text() for path in sorted(tmp_path.iterdir()))
+    samples = scrape(merged)
+    assert samples['talos_guilds{cluster="0"}'] == 2
+    assert samples['talos_users{cluster="1"}'] == 3
+    assert samples['talos_command_invocations_total{cluster="0",command="roll"}'] == 1
+    assert samples['talos_stage_latency_seconds_count{cluster="0",stage="database"}'] == 1
+    assert samples['talos_cache_hits_total{cluster="1",cache="guild_options"}'] == 1
+    assert 'talos_pending_tasks{cluster="0"}' in samples
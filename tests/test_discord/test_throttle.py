@@ -0,0 +1,80 @@
+
+import asyncio
+import pytest
+import discord_talos.throttle as throttle
+
+
+async def test_admission_limit():
+    queue = throttle.AdmissionQueue(2, max_waiting=1)
+    await queue.acquire(1, "a")
+    await queue.acquire(2, "a")
+    assert queue.active == 2
+
+    positions = []
+
+    async def notify(position):
+        positions.append(position)
+
+    waiter = asyncio.ensure_future(queue.acquire(3, "a", notify))
+    await asyncio.sleep(0)
+    assert positions == [1]
+    assert not waiter.done()
+
+    with pytest.raises(throttle.AdmissionRefused):
+        await queue.acquire(4, "b")
+
+    queue.release(1)
+    await waiter
+    assert queue.active == 2, "Slot wasn't handed straight to the waiting request"
+    queue.release(2)
+    queue.release(3)
+    assert queue.active == 0
+
+
+async def test_admission_per_user():
+    queue = throttle.AdmissionQueue(2)
+    await queue.acquire(1, "a")
+    with pytest.raises(throttle.AdmissionRefused):
+        await queue.acquire(1, "a")
+    queue.release(1)
+    await queue.acquire(1, "a")
+    queue.release(1)
+
+
+async def test_admission_fairness():
+    queue = throttle.AdmissionQueue(1, max_waiting=10)
+    await queue.acquire(0, "busy")
+
+    order = []
+
+    async def run(user_id, key):
+        await queue.acquire(user_id, key)
+        order.append(key)
+        queue.release(user_id)
+
+    tasks = [asyncio.ensure_future(run(i, "busy")) for i in range(1, 4)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.ensure_future(run(4, "quiet")))
+    await asyncio.sleep(0)
+    assert queue.position("quiet", 0) == 2, "Quiet guild wasn't put second in line"
+
+    queue.release(0)
+    await asyncio.gather(*tasks)
+    assert order == ["busy", "quiet", "busy", "busy"]
+    assert queue.active == 0
+
+
+async def test_admission_cancel():
+    queue = throttle.AdmissionQueue(1)
+    await queue.acquire(1, "a")
+    waiter = asyncio.ensure_future(queue.acquire(2, "a"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert queue.waiting == 0
+
+    queue.release(1)
+    assert queue.active == 0
+    await queue.acquire(2, "a")
+    queue.release(2)
@@ -1,5 +1,6 @@
 
 import sys
+import time
 import pathlib
 import logging
 import aiohttp.web as web
@@ -13,6 +14,53 @@ log.addHandler(logging.FileHandler(utils.log_folder / "server.log"))
 
 
 SETTINGS_FILE = pathlib.Path(__file__).parent / "settings.json"
+# Folder the Talos bot processes write their metrics files to
+METRICS_FOLDER = utils.log_folder
+# Seconds since a metrics file was last written before it's taken to be from a stopped process. Running processes
+# write theirs once a minute
+METRICS_MAX_AGE = 300
+
+
+def merge_metrics(texts):
+    """
+        Merge metrics texts from several Talos processes into one, keeping each metric family together
+    :param texts: Iterable of metrics texts in the Prometheus text format
+    :return: Merged metrics text
+    """
+    families = {}
+    for text in texts:
+        name = None
+        for line in text.splitlines():
+            if not line:
+                continue
+            if line.startswith("# "):
+                name = line.split()[2]
+                family = families.setdefault(name, ([], []))
+                if line not in family[0]:
+                    family[0].append(line)
+            elif name is not None:
+                families[name][1].append(line)
+    return "".join("\n".join(comments + samples) + "\n" for comments, samples in families.values())
+
+
+def read_metrics(folder, max_age=METRICS_MAX_AGE):
+    """
+        Read the metrics files of every running Talos process. Files that haven't been written in a while are from
+        processes that stopped, and are skipped
+    :param folder: Folder holding the metrics files
+    :param max_age: Seconds since a file was written before it's skipped
+    :return: List of metrics texts
+    """
+    oldest = time.time() - max_age
+    texts = []
+    for path in sorted(folder.glob("talos-*.prom")):
+        try:
+            if path.stat().st_mtime < oldest:
+                continue
+            texts.append(path.read_text())
+        except OSError:
+            log.warning(f"Couldn't read metrics file {path}")
+    return texts
 
 
 @webserver.auth_required
@@ -30,6 +78,16 @@ class TalosAPI(webserver.APIHandler):
         """
         return web.json_response(data={"error": "Talos Command posting is WIP"})
 
+    async def on_metrics(self, method, data):
+        """
+            Handle a GET to the Talos Metrics endpoint. Serves the metrics published by every running Talos process
+        :param method: Method of the request
+        :param data: Data of the request, unused
+        :return: Response with the metrics in the Prometheus text format
+        """
+        texts = read_metrics(METRICS_FOLDER)
+        return web.Response(text=merge_metrics(texts), content_type="text/plain", charset="utf-8")
+
 
 def main():
     """